@@ -0,0 +1 @@
+"""Throughput benchmarks for theranostics; run with ``python benchmarks/run.py`` (see README.md)."""
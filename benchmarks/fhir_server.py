@@ -0,0 +1,86 @@
+"""Local mock FHIR server serving paged Patient Bundles for benchmarks and tests.
+
+``MockFHIRServer(n_patients)`` serves ``GET /Patient?_count=<page>`` as a
+searchset Bundle with ``next`` links (``&_offset=``), like a real server's
+paging, from a deterministic set of patients. Use it as a context manager;
+``server.base_url`` is the base to pass to `fhir_ingest.fetch_patients`.
+"""
+from __future__ import annotations
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+def make_patient(i: int) -> dict:
+    return {
+        "resourceType": "Patient",
+        "id": f"p{i:08d}",
+        "identifier": [{"system": "urn:bench", "value": f"p{i:08d}"}],
+        "name": [{"given": [f"Given{i % 997}"], "family": f"Family{i % 503}"}],
+        "birthDate": f"{1940 + i % 60}-{1 + i % 12:02d}-{1 + i % 28:02d}",
+    }
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):  # noqa: N802 - http.server API
+        parsed = urlparse(self.path)
+        if parsed.path.rstrip("/") != "/Patient":
+            self.send_error(404)
+            return
+        query = parse_qs(parsed.query)
+        count = int(query.get("_count", ["50"])[0])
+        offset = int(query.get("_offset", ["0"])[0])
+        patients = self.server.patients
+        page = patients[offset : offset + count]
+        bundle = {
+            "resourceType": "Bundle",
+            "type": "searchset",
+            "total": len(patients),
+            "entry": [{"resource": p} for p in page],
+            "link": [{"relation": "self", "url": f"{self.server.base_url}{self.path}"}],
+        }
+        if offset + count < len(patients):
+            bundle["link"].append(
+                {"relation": "next", "url": f"{self.server.base_url}/Patient?_count={count}&_offset={offset + count}"}
+            )
+        body = json.dumps(bundle).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/fhir+json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class MockFHIRServer:
+    """Threaded HTTP server on localhost serving `n_patients` Patient resources."""
+
+    def __init__(self, n_patients: int, host: str = "127.0.0.1", port: int = 0):
+        self.httpd = ThreadingHTTPServer((host, port), _Handler)
+        self.httpd.daemon_threads = True
+        self.httpd.patients = [make_patient(i) for i in range(n_patients)]
+        self.base_url = f"http://{host}:{self.httpd.server_address[1]}"
+        self.httpd.base_url = self.base_url
+        self._thread = None
+
+    def start(self) -> "MockFHIRServer":
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="mock-fhir", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+        return False
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""Run the benchmark suite or compare two result files.
+
+Usage:
+    python benchmarks/run.py --suite quick --out bench/base.json
+    python benchmarks/run.py --suite full --only generate_cohort fit_km --out bench/head.json
+    python benchmarks/run.py compare bench/base.json bench/head.json --threshold 0.15
+
+Each result records min / median wall time over `--repeat` calls (a first call
+under half a second is a discarded warm-up; slower cases stop repeating once
+`--max-seconds` is spent) and throughput in items per second, together with
+the commit, Python and library versions. `compare` matches results by id and
+exits with status 1 when any case got slower by more than `--threshold`.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional
+
+# Ensure repo root is on path when running directly
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+WARMUP_BELOW_SECONDS = 0.5
+
+
+def environment() -> Dict[str, Any]:
+    import numpy
+    import pandas
+
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=ROOT, capture_output=True, text=True, timeout=30
+        ).stdout.strip()
+    except Exception:
+        commit = ""
+    return {
+        "commit": commit,
+        "python": platform.python_version(),
+        "numpy": numpy.__version__,
+        "pandas": pandas.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+
+def measure(fn, repeat: int = 5, max_seconds: float = 30.0) -> List[float]:
+    """Wall times of up to `repeat` calls of `fn`."""
+    times: List[float] = []
+    spent = 0.0
+    first = True
+    while len(times) < repeat:
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        spent += elapsed
+        if first and elapsed < WARMUP_BELOW_SECONDS:
+            first = False
+            continue  # warm-up: imports, caches, first-touch allocation
+        first = False
+        times.append(elapsed)
+        if spent > max_seconds:
+            break
+    return times
+
+
+def run_suite(suite: str = "quick", only=None, repeat: int = 5, max_seconds: float = 30.0, sizes=None, log=print) -> Dict[str, Any]:
+    from benchmarks.suite import CASES
+
+    results = []
+    workdir = tempfile.mkdtemp(prefix="theranostics-bench-")
+    try:
+        for case in CASES:
+            if only and case.name not in only:
+                continue
+            for size in sizes or case.sizes[suite]:
+                fn = case.setup(size, workdir)
+                try:
+                    times = measure(fn, repeat=repeat, max_seconds=max_seconds)
+                finally:
+                    getattr(fn, "cleanup", lambda: None)()
+                median = statistics.median(times)
+                result = {
+                    "id": f"{case.name}[{size}]",
+                    "name": case.name,
+                    case.param: size,
+                    "times": times,
+                    "min": min(times),
+                    "median": median,
+                    "throughput": size / median if median > 0 else None,
+                    "unit": f"{case.param}/s",
+                }
+                results.append(result)
+                log(f"{result['id']:<36} min {result['min']:.4f}s  median {median:.4f}s  {result['throughput']:,.0f} {result['unit']}")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return {"suite": suite, "environment": environment(), "results": results}
+
+
+def compare(base: Dict[str, Any], head: Dict[str, Any], threshold: float = 0.15, stat: str = "min") -> List[Dict[str, Any]]:
+    """Rows (id, base, head, ratio, status) for results present in both runs; ratio = head / base time."""
+    base_by_id = {r["id"]: r for r in base["results"]}
+    rows = []
+    for r in head["results"]:
+        b = base_by_id.get(r["id"])
+        if b is None:
+            continue
+        ratio = r[stat] / b[stat] if b[stat] > 0 else float("inf")
+        status = "slower" if ratio > 1 + threshold else "faster" if ratio < 1 / (1 + threshold) else "same"
+        rows.append({"id": r["id"], "base": b[stat], "head": r[stat], "ratio": ratio, "status": status})
+    return rows
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    argv = list(sys.argv[1:] if argv is None else argv)
+    if argv and argv[0] == "compare":
+        parser = argparse.ArgumentParser(prog="run.py compare")
+        parser.add_argument("base")
+        parser.add_argument("head")
+        parser.add_argument("--threshold", type=float, default=0.15, help="allowed slowdown (0.15 = 15%%)")
+        parser.add_argument("--stat", choices=["min", "median"], default="min")
+        args = parser.parse_args(argv[1:])
+        with open(args.base) as f:
+            base = json.load(f)
+        with open(args.head) as f:
+            head = json.load(f)
+        rows = compare(base, head, args.threshold, args.stat)
+        print(f"base {base['environment'].get('commit', '')[:10]}  head {head['environment'].get('commit', '')[:10]}  ({args.stat} time)")
+        for row in rows:
+            print(f"{row['id']:<36} {row['base']:.4f}s -> {row['head']:.4f}s  x{row['ratio']:.2f}  {row['status']}")
+        slower = [row["id"] for row in rows if row["status"] == "slower"]
+        if slower:
+            print(f"{len(slower)} regression(s) beyond {args.threshold:.0%}: {', '.join(slower)}")
+            return 1
+        return 0
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--suite", choices=["quick", "full"], default="quick")
+    parser.add_argument("--only", nargs="+", default=None, help="case names to run (see benchmarks/suite.py)")
+    parser.add_argument("--sizes", type=int, nargs="+", default=None, help="override the suite's sizes")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--max-seconds", type=float, default=30.0, help="stop repeating a case after this long")
+    parser.add_argument("--out", default=None, help="write results JSON here")
+    args = parser.parse_args(argv)
+    report = run_suite(args.suite, args.only, args.repeat, args.max_seconds, args.sizes)
+    if args.out:
+        out_dir = os.path.dirname(args.out)
+        if out_dir:
+            os.makedirs(out_dir, exist_ok=True)
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Wrote {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,139 @@
+"""Benchmark cases.
+
+Each case builds its inputs once per size (with fixed seeds, outside the timed
+region) and returns the callable to time. Sizes are given per suite:
+``quick`` finishes in about a minute and is meant for every change, ``full``
+goes up to 1e7-row cohorts.
+"""
+from __future__ import annotations
+
+import importlib.util
+import os
+import warnings
+from typing import Callable, Dict, List, NamedTuple
+
+SEED = 0
+
+
+class Case(NamedTuple):
+    name: str
+    param: str  # what the size means: rows, files, patients
+    sizes: Dict[str, List[int]]
+    # setup(size, workdir) -> zero-argument callable to time
+    setup: Callable[[int, str], Callable[[], object]]
+
+
+def _cohort(n: int):
+    from theranostics.simulate import generate_cohort
+
+    return generate_cohort(n, seed=SEED, censor_rate=0.3)
+
+
+def _setup_generate_cohort(n, workdir):
+    from theranostics.simulate import generate_cohort
+
+    return lambda: generate_cohort(n, seed=SEED, censor_rate=0.3)
+
+
+def _setup_fit_km(n, workdir):
+    from theranostics.models import fit_km
+
+    df = _cohort(n)
+    return lambda: fit_km(df)
+
+
+def _setup_fit_cox(backend):
+    def setup(n, workdir):
+        from theranostics.models import fit_cox
+
+        df = _cohort(n)
+
+        def run():
+            # a lifelines failure falls back to the native fitter with a
+            # warning; fail the case instead of timing the wrong backend
+            with warnings.catch_warnings():
+                warnings.filterwarnings("error", message="lifelines Cox fit failed", category=RuntimeWarning)
+                return fit_cox(df, backend=backend)
+
+        return run
+
+    return setup
+
+
+def _make_test_dicom():
+    """`scripts/make_test_dicom.py` loaded as a module (scripts/ is not a package)."""
+    path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "scripts", "make_test_dicom.py")
+    spec = importlib.util.spec_from_file_location("make_test_dicom", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def build_dicom_tree(root: str, n_files: int, per_dir: int = 50) -> str:
+    """Write `n_files` minimal DICOMs under `root`, `per_dir` per series directory."""
+    from pathlib import Path
+
+    make = _make_test_dicom().make_minimal_dicom
+    for i in range(n_files):
+        series = Path(root) / f"series_{i // per_dir:04d}"
+        series.mkdir(parents=True, exist_ok=True)
+        make(series / f"img_{i:06d}.dcm")
+    return root
+
+
+def _setup_ingest(to_parquet, workers=1, executor="thread"):
+    def setup(n, workdir):
+        from theranostics.dicom_ingest import ingest_directory
+
+        tree = os.path.join(workdir, f"dicom_{n}")
+        if not os.path.isdir(tree):
+            build_dicom_tree(tree, n)
+        out = os.path.join(workdir, "out", "dicom.parquet" if to_parquet else "dicom.csv")
+        return lambda: ingest_directory(tree, out, to_parquet=to_parquet, workers=workers, executor=executor)
+
+    return setup
+
+
+def _setup_ingest_incremental_rescan(n, workdir):
+    """Re-run of an incremental ingest over an unchanged tree: the nightly no-op cost (stat + manifest)."""
+    from theranostics.dicom_incremental import ingest_incremental
+
+    tree = os.path.join(workdir, f"dicom_{n}")
+    if not os.path.isdir(tree):
+        build_dicom_tree(tree, n)
+    dataset = os.path.join(workdir, f"dataset_{n}")
+    ingest_incremental(tree, dataset)
+    return lambda: ingest_incremental(tree, dataset)
+
+
+def _setup_fetch_patients(page_size):
+    def setup(n, workdir):
+        from benchmarks.fhir_server import MockFHIRServer
+        from theranostics.fhir_ingest import fetch_patients
+
+        server = MockFHIRServer(n).start()
+        out = os.path.join(workdir, "patients.ndjson")
+
+        def run():
+            return fetch_patients(server.base_url, out, page_size=page_size)
+
+        run.cleanup = server.stop
+        return run
+
+    return setup
+
+
+CASES: List[Case] = [
+    Case("generate_cohort", "rows", {"quick": [1_000, 10_000, 100_000], "full": [1_000, 10_000, 100_000, 1_000_000, 10_000_000]}, _setup_generate_cohort),
+    Case("fit_km", "rows", {"quick": [1_000, 10_000, 100_000], "full": [1_000, 10_000, 100_000, 1_000_000]}, _setup_fit_km),
+    Case("fit_cox_native", "rows", {"quick": [1_000, 10_000], "full": [1_000, 10_000, 100_000, 1_000_000]}, _setup_fit_cox("native")),
+    Case("fit_cox_lifelines", "rows", {"quick": [1_000], "full": [1_000, 10_000, 100_000]}, _setup_fit_cox("lifelines")),
+    Case("ingest_directory_csv", "files", {"quick": [100], "full": [100, 1_000]}, _setup_ingest(False)),
+    Case("ingest_directory_parquet", "files", {"quick": [100], "full": [100, 1_000, 5_000]}, _setup_ingest(True)),
+    Case("ingest_directory_threads4", "files", {"quick": [100], "full": [1_000, 5_000]}, _setup_ingest(False, 4, "thread")),
+    Case("ingest_directory_threads16", "files", {"quick": [100], "full": [1_000, 5_000]}, _setup_ingest(False, 16, "thread")),
+    Case("ingest_directory_processes4", "files", {"quick": [100], "full": [1_000, 5_000]}, _setup_ingest(False, 4, "process")),
+    Case("ingest_incremental_rescan", "files", {"quick": [100], "full": [1_000, 5_000]}, _setup_ingest_incremental_rescan),
+    Case("fetch_patients_page50", "patients", {"quick": [1_000], "full": [1_000, 10_000]}, _setup_fetch_patients(50)),
+    Case("fetch_patients_page500", "patients", {"quick": [1_000], "full": [1_000, 10_000, 100_000]}, _setup_fetch_patients(500)),
+]
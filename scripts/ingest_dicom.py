@@ -1,4 +1,5 @@
 """CLI to run DICOM directory ingest."""
+import argparse
 import sys
 from pathlib import Path
 
@@ -7,17 +8,55 @@ repo_root = str(Path(__file__).resolve().parents[1])
 if repo_root not in sys.path:
     sys.path.insert(0, repo_root)
 
+from theranostics.dicom_incremental import ingest_incremental
 from theranostics.dicom_ingest import ingest_directory
+from theranostics.dicom_lake import PARTITION_COLUMNS
 
 
 def main():
-    if len(sys.argv) < 3:
-        print("Usage: ingest_dicom.py <dicom_dir> <out_csv>")
-        sys.exit(2)
-    dicom_dir = sys.argv[1]
-    out_csv = sys.argv[2]
-    n = ingest_directory(dicom_dir, out_csv)
-    print(f"Processed {n} DICOM files, wrote {out_csv}")
+    parser = argparse.ArgumentParser(
+        usage="ingest_dicom.py <dicom_dir> <out_csv | dataset_dir> [--workers N] [--processes] [--dedupe] [--rollups DIR] [--lake | --incremental [--hash] [--merge]]"
+    )
+    parser.add_argument("dicom_dir")
+    parser.add_argument("out_csv")
+    parser.add_argument("--workers", type=int, default=1, help="parse headers on N threads (default: serial)")
+    parser.add_argument("--processes", action="store_true", help="use worker processes instead of threads")
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="parse only new/changed files into a new Parquet partition of the dataset directory given as out",
+    )
+    parser.add_argument(
+        "--lake",
+        action="store_true",
+        help="append to a Parquet lake directory partitioned by modality/study_date, with a lookup index",
+    )
+    parser.add_argument("--dedupe", action="store_true", help="keep only the first file of each SOP instance UID")
+    parser.add_argument("--rollups", default=None, metavar="DIR", help="also write series and study rollup tables to DIR")
+    parser.add_argument("--hash", action="store_true", help="with --incremental, also compare content hashes")
+    parser.add_argument("--merge", action="store_true", help="with --incremental, compact the dataset into one partition")
+    args = parser.parse_args()
+    executor = "process" if args.processes else "thread"
+    if args.incremental:
+        summary = ingest_incremental(
+            args.dicom_dir, args.out_csv, hash_files=args.hash, merge=args.merge, workers=args.workers, executor=executor
+        )
+        print(
+            f"Run {summary['run_id']}: {summary['new']} new, {summary['changed']} changed, "
+            f"{summary['unchanged']} unchanged, {summary['deleted']} deleted; {summary['rows']} rows written"
+            + (f" ({summary['partition']})" if summary["partition"] else "")
+        )
+        return
+    n = ingest_directory(
+        args.dicom_dir,
+        args.out_csv,
+        workers=args.workers,
+        executor=executor,
+        partition_by=PARTITION_COLUMNS if args.lake else None,
+        dedupe=args.dedupe,
+        rollup_dir=args.rollups,
+    )
+    print(f"Processed {n} DICOM files, wrote {args.out_csv}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""Build memory-mapped PET/SPECT volumes from ingest metadata and report SUV statistics.
+
+Usage:
+    python scripts/pet_volumes.py data/bronze/dicom_metadata.csv data/silver/volumes --suv
+"""
+import argparse
+import os
+import sys
+
+# Ensure repo root is on path when running directly
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from theranostics.dicom_pixels import build_series_volumes, load_volume, roi_stats, suv_factor, suv_volume
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("metadata", help="ingest output (CSV or Parquet) with series_instance_uid, modality, file_path")
+    parser.add_argument("out_dir")
+    parser.add_argument("--modalities", nargs="+", default=["PT", "NM"])
+    parser.add_argument("--workers", type=int, default=4, help="threads decoding slices")
+    parser.add_argument("--suv", action="store_true", help="also write <series>.suv.npy volumes")
+    parser.add_argument("--threshold", type=float, default=None, help="SUV threshold for the reported ROI")
+    args = parser.parse_args()
+
+    volumes = build_series_volumes(args.metadata, args.out_dir, modalities=args.modalities, workers=args.workers)
+    for series_uid, path in volumes.items():
+        volume, meta = load_volume(path)
+        try:
+            factor = suv_factor(meta)
+        except ValueError as exc:
+            print(f"{series_uid}: {tuple(volume.shape)} volume, no SUV ({exc})")
+            continue
+        if args.suv:
+            suv_volume(path, os.path.join(args.out_dir, f"{series_uid}.suv.npy"))
+        stats = roi_stats(volume, threshold=args.threshold, scale=factor, spacing_mm=meta["spacing_mm"])
+        print(
+            f"{series_uid}: {tuple(volume.shape)} volume, SUVmax {stats['max']:.2f}, SUVmean {stats['mean']:.2f}, "
+            f"{stats['volume_ml']:.1f} ml"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""CLI for Monte Carlo power analysis with theranostics.power.power_analysis
+
+Usage:
+    python scripts/power_analysis.py --n 200 400 800 1600 --censor-rates 0.4 --biomarker-effects 0.3 --power 0.8
+"""
+import argparse
+import os
+import sys
+
+# Ensure repo root is on path when running directly
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from theranostics.power import DEFAULT_TARGETS, power_analysis, required_sample_size
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--n", type=int, nargs="+", default=[200, 400, 800, 1600], help="sample sizes")
+    parser.add_argument("--censor-rates", type=float, nargs="+", default=[0.0, 0.4])
+    parser.add_argument("--biomarker-effects", type=float, nargs="+", default=[0.3])
+    parser.add_argument("--targets", nargs="+", default=list(DEFAULT_TARGETS))
+    parser.add_argument("--alpha", type=float, default=0.05)
+    parser.add_argument("--mcse", type=float, default=0.01, help="stop a design point once the power MCSE is below this")
+    parser.add_argument("--max-replicates", type=int, default=5000)
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: all CPUs)")
+    parser.add_argument("--power", type=float, default=0.8, help="target power for the sample-size summary")
+    parser.add_argument("--out", type=str, default=None, help="write the full results table (CSV)")
+    args = parser.parse_args()
+
+    results = power_analysis(
+        args.n,
+        censor_rates=args.censor_rates,
+        biomarker_effects=args.biomarker_effects,
+        targets=args.targets,
+        alpha=args.alpha,
+        mcse=args.mcse,
+        max_replicates=args.max_replicates,
+        workers=args.workers,
+    )
+    cols = ["n", "censor_rate", "biomarker_effect", "covariate", "true_coef", "replicates", "power", "power_mcse", "bias", "coverage"]
+    print(results[cols].to_string(index=False))
+    for target in args.targets:
+        print(f"\nSmallest n with power >= {args.power} for {target}:")
+        print(required_sample_size(results, args.power, target).to_string(index=False))
+    if args.out:
+        results.to_csv(args.out, index=False)
+        print(f"Wrote {args.out}")
+
+
+if __name__ == "__main__":
+    main()
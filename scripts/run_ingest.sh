@@ -4,7 +4,7 @@ set -euo pipefail
 REPO_ROOT=$(cd "$(dirname "$0")/.." && pwd)
 export PYTHONPATH="$REPO_ROOT"
 if [ "$#" -lt 2 ]; then
-  echo "Usage: $0 <dicom_dir> <out_path>"
+  echo "Usage: $0 <dicom_dir> <out_path> [--workers N] [--processes] [--dedupe] [--rollups DIR] [--lake | --incremental [--hash] [--merge]]"
   exit 2
 fi
-python "$REPO_ROOT/scripts/ingest_dicom.py" "$1" "$2"
+python "$REPO_ROOT/scripts/ingest_dicom.py" "$@"
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""CLI to run a censor_rate x biomarker_effect grid sweep with theranostics.experiments.run_sweep
+
+Usage:
+    python scripts/run_sweep.py --censor-rates 0 0.2 0.4 --biomarker-effects 0.3 1.0 1.5 --workers 4
+"""
+import argparse
+import os
+import sys
+
+# Ensure repo root is on path when running directly
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from theranostics.experiments import run_sweep
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--n", type=int, default=500, help="patients per synthetic cohort")
+    parser.add_argument("--censor-rates", type=float, nargs="+", default=[0.0, 0.2, 0.4])
+    parser.add_argument("--biomarker-effects", type=float, nargs="+", default=[0.3, 1.0, 1.5])
+    parser.add_argument("--replicates", type=int, default=1, help="cohorts per grid point (seeds 42, 43, ...)")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: all CPUs)")
+    parser.add_argument("--artifacts", type=str, default="artifacts/experiments/sweep", help="artifacts directory")
+    parser.add_argument("--format", choices=["csv", "parquet", "arrow"], default="csv", help="artifact file format")
+    parser.add_argument(
+        "--consolidate", action="store_true", help="write one sweep-level file per table instead of per-run directories"
+    )
+    parser.add_argument(
+        "--manifest",
+        nargs="?",
+        const=True,
+        default=None,
+        help="resume from a run manifest (default: <artifacts>/manifest, or a shared directory)",
+    )
+    args = parser.parse_args()
+
+    grid = {"censor_rate": args.censor_rates, "biomarker_effect": args.biomarker_effects}
+    table = run_sweep(
+        grid,
+        replicates=args.replicates,
+        workers=args.workers,
+        base_params={"n": args.n},
+        artifacts_dir=args.artifacts,
+        artifact_format=args.format,
+        consolidate=args.consolidate,
+        manifest=args.manifest,
+    )
+    print(table.drop(columns=["artifacts_dir", "run_id"], errors="ignore").to_string(index=False))
+    ext = {"csv": ".csv", "parquet": ".parquet", "arrow": ".arrow"}[args.format]
+    print(f"Wrote {os.path.join(args.artifacts, 'sweep_results' + ext)}")
+    print(f"Recorded sweep {table.attrs['sweep_id']} in the results store")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""Regenerate the results table in reports/grid_sweep_report.md from the results store.
+
+The table is built by querying the store (theranostics.store.ResultsStore) for
+one sweep -- the most recent by default -- and averaging replicates per grid point.
+
+Usage:
+    python scripts/sweep_report.py                    # latest sweep, rewrite the report table
+    python scripts/sweep_report.py --sweep-id <id> --stdout
+"""
+import argparse
+import os
+import re
+import sys
+
+# Ensure repo root is on path when running directly
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from theranostics.store import ResultsStore, to_markdown
+
+START, END = "<!-- results-table:start -->", "<!-- results-table:end -->"
+COLUMNS = ["censor_rate", "biomarker_effect", "coef", "p", "exp(coef)", "event_rate", "cox_concordance"]
+
+
+def build_table(store, sweep_id=None, experiment="theranostics_local", covariate="biomarker"):
+    if sweep_id is None:
+        sweeps = store.sweeps(experiment)
+        if sweeps.empty:
+            raise SystemExit(f"no sweeps recorded in {store.path}; run scripts/run_sweep.py first")
+        sweep_id = sweeps["sweep_id"].iloc[0]
+    runs = store.runs(sweep_id=sweep_id, order_by="coef", covariate=covariate)
+    keys = [c for c in ("censor_rate", "biomarker_effect") if c in runs]
+    values = [c for c in COLUMNS if c in runs and c not in keys]
+    table = runs.groupby(keys, as_index=False)[values].mean() if keys else runs[values]
+    return sweep_id, table.sort_values(keys) if keys else table
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--db", default=None, help="results database (default: mlruns/results.db)")
+    parser.add_argument("--sweep-id", default=None, help="sweep to report (default: the most recent)")
+    parser.add_argument("--experiment", default="theranostics_local")
+    parser.add_argument("--covariate", default="biomarker")
+    parser.add_argument("--report", default=os.path.join(ROOT, "reports", "grid_sweep_report.md"))
+    parser.add_argument("--stdout", action="store_true", help="print the table instead of updating the report")
+    args = parser.parse_args()
+
+    sweep_id, table = build_table(ResultsStore(args.db), args.sweep_id, args.experiment, args.covariate)
+    markdown = f"Sweep `{sweep_id}`, mean over replicates per grid point.\n\n" + to_markdown(table)
+    if args.stdout:
+        print(markdown)
+        return
+    with open(args.report) as f:
+        text = f.read()
+    if START not in text or END not in text:
+        raise SystemExit(f"{args.report} has no {START} ... {END} block")
+    text = re.sub(re.escape(START) + ".*?" + re.escape(END), lambda _: f"{START}\n{markdown}\n{END}", text, flags=re.S)
+    with open(args.report, "w") as f:
+        f.write(text)
+    print(f"Updated {args.report} from sweep {sweep_id}")
+
+
+if __name__ == "__main__":
+    main()
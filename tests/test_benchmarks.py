@@ -0,0 +1,34 @@
+from benchmarks.fhir_server import MockFHIRServer
+from benchmarks.run import compare, run_suite
+from theranostics.fhir_ingest import fetch_patients
+
+
+def test_fetch_patients_pages_through_mock_server(tmp_path):
+    with MockFHIRServer(125) as server:
+        out = tmp_path / "patients.csv"
+        assert fetch_patients(server.base_url, str(out), page_size=50, to_csv=True) == 125
+    lines = out.read_text().splitlines()
+    assert len(lines) == 126 and lines[1].startswith("p00000000,")
+
+
+def test_run_suite_and_compare():
+    report = run_suite(only=["generate_cohort", "fit_km"], repeat=2, sizes=[500], log=lambda *_: None)
+    assert [r["id"] for r in report["results"]] == ["generate_cohort[500]", "fit_km[500]"]
+    slower = {"results": [dict(r, min=r["min"] * 2) for r in report["results"]]}
+    assert [row["status"] for row in compare(report, slower)] == ["slower", "slower"]
+    assert [row["status"] for row in compare(report, report)] == ["same", "same"]
+
+
+def test_fit_cox_lifelines_case_fails_instead_of_timing_the_fallback(monkeypatch):
+    import pytest
+    from lifelines import CoxPHFitter
+
+    report = run_suite(only=["fit_cox_lifelines"], repeat=1, sizes=[300], log=lambda *_: None)
+    assert [r["id"] for r in report["results"]] == ["fit_cox_lifelines[300]"]
+
+    def broken(self, *args, **kwargs):
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(CoxPHFitter, "fit", broken)
+    with pytest.raises(RuntimeWarning, match="boom"):
+        run_suite(only=["fit_cox_lifelines"], repeat=1, sizes=[300], log=lambda *_: None)
@@ -0,0 +1,30 @@
+import numpy as np
+
+from theranostics.bootstrap import bootstrap
+from theranostics.models import fit_cox
+from theranostics.simulate import generate_cohort
+
+
+def test_bootstrap_reproducible_across_workers():
+    df = generate_cohort(150, seed=11, censor_rate=0.3, biomarker_effect=1.0)
+    serial = bootstrap(df, n_resamples=24, seed=5, workers=1)
+    pooled = bootstrap(df, n_resamples=24, seed=5, workers=2, chunk_size=5)
+    np.testing.assert_allclose(serial.replicates.to_numpy(), pooled.replicates.to_numpy())
+    assert serial.n_resamples == 24
+
+    cph, _ = fit_cox(df, backend="native")
+    summary = serial.summary
+    assert np.allclose(summary.loc[[f"coef:{c}" for c in cph.params_.index], "estimate"], cph.params_)
+    assert abs(summary.loc["cox_concordance", "estimate"] - cph.concordance_index_) < 1e-12
+    assert (summary["lower"] <= summary["upper"]).all()
+
+
+def test_run_experiment_bootstrap_metrics(tmp_path):
+    from theranostics.experiments import run_experiment
+
+    res = run_experiment(
+        params={"n": 60, "bootstrap_resamples": 20, "bootstrap_workers": 1}, artifacts_dir=str(tmp_path), results_store=False
+    )
+    m = res["metrics"]
+    assert m["cox_concordance_ci_lower"] <= m["cox_concordance_ci_upper"]
+    assert "bootstrap_ci_csv" in res["artifacts"]
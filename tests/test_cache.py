@@ -0,0 +1,52 @@
+import pandas as pd
+
+from theranostics.cache import ResultCache, cached_cohort, cached_fit, frame_fingerprint
+from theranostics.simulate import generate_cohort
+
+
+def test_cached_cohort_roundtrip(tmp_path):
+    cache = ResultCache(str(tmp_path))
+    first = cached_cohort(cache, n=50, seed=3, censor_rate=0.2)
+    second = cached_cohort(cache, n=50, seed=3, censor_rate=0.2)
+    pd.testing.assert_frame_equal(first, second)
+    pd.testing.assert_frame_equal(second, generate_cohort(n=50, seed=3, censor_rate=0.2))
+    assert (cache.hits, cache.misses) == (1, 1)
+    cached_cohort(cache, n=50, seed=4, censor_rate=0.2)
+    assert cache.misses == 2
+    # explicit defaults share the entry of the short spelling
+    cached_cohort(cache, n=50, seed=3, censor_rate=0.2, biomarker_effect=0.3, compact=False)
+    assert (cache.hits, cache.misses) == (2, 2)
+
+
+def test_cached_fit_reuses_summaries(tmp_path):
+    cache = ResultCache(str(tmp_path))
+    df = generate_cohort(80, seed=5, censor_rate=0.3)
+    km, cph = cached_fit(df, cache)
+    km2, cph2 = cached_fit(df.copy(), cache)
+    assert cache.hits == 1
+    pd.testing.assert_frame_equal(cph.summary, cph2.summary)
+    pd.testing.assert_frame_equal(km.survival_function_, km2.survival_function_)
+    assert km2.median_survival_time_ == km.median_survival_time_
+    assert cph2.concordance_index_ == cph.concordance_index_
+
+    changed = df.copy()
+    changed.loc[0, "biomarker"] += 1.0
+    assert frame_fingerprint(changed) != frame_fingerprint(df)
+
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    import time
+
+    cache = ResultCache(str(tmp_path))
+    for seed in range(3):
+        cached_cohort(cache, n=200, seed=seed)
+        time.sleep(0.01)
+    cached_cohort(cache, n=200, seed=0)  # refresh the oldest entry
+    size = cache.stats()["bytes"]
+    cache.max_bytes = size - 1
+    assert cache.evict() == 1
+    assert cache.stats()["entries"] == 2
+    hits, misses = cache.hits, cache.misses
+    cached_cohort(cache, n=200, seed=0)
+    cached_cohort(cache, n=200, seed=1)  # the least recently used entry was dropped
+    assert (cache.hits, cache.misses) == (hits + 1, misses + 1)
@@ -0,0 +1,76 @@
+import os
+
+import pytest
+
+pytest.importorskip("pyarrow")
+
+from theranostics.dicom_incremental import compact, deleted_files, ingest_incremental, read_dataset, runs, skipped_files
+
+
+def _write(path):
+    from tests.test_dicom_ingest import make_minimal_dicom
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    make_minimal_dicom(str(path))
+
+
+def _parts(dataset):
+    return sorted(p for p in os.listdir(dataset) if p.startswith("part-"))
+
+
+def test_incremental_ingest_parses_only_new_and_changed_files(tmp_path):
+    tree, dataset = tmp_path / "tree", tmp_path / "dataset"
+    for i in range(6):
+        _write(tree / f"s{i % 2}" / f"img{i}.dcm")
+    first = ingest_incremental(str(tree), str(dataset))
+    assert (first["new"], first["rows"], first["deleted"]) == (6, 6, 0)
+
+    again = ingest_incremental(str(tree), str(dataset))
+    assert (again["new"], again["changed"], again["unchanged"], again["partition"]) == (0, 0, 6, None)
+
+    changed = tree / "s0" / "img0.dcm"
+    before = read_dataset(str(dataset)).set_index("file_path").loc[str(changed), "sop_instance_uid"]
+    _write(changed)
+    os.utime(changed, ns=(1, 1))  # make sure the mtime moves on coarse filesystems
+    _write(tree / "s2" / "img6.dcm")
+    (tree / "s2" / "notes.txt").write_text("not DICOM")
+    os.remove(tree / "s1" / "img1.dcm")
+    third = ingest_incremental(str(tree), str(dataset))
+    assert third["new"] == 2 and third["changed"] == 1 and third["unchanged"] == 4 and third["deleted"] == 1
+    assert (third["rows"], third["unreadable"]) == (2, 1)
+    assert list(skipped_files(str(dataset))["skip_reason"]) == ["not_dicom"]
+
+    table = read_dataset(str(dataset))
+    assert len(table) == len(set(table["file_path"])) == 6
+    assert str(tree / "s1" / "img1.dcm") not in set(table["file_path"])
+    assert table.set_index("file_path").loc[str(changed), "sop_instance_uid"] != before
+    assert list(deleted_files(str(dataset))["file_path"]) == [str(tree / "s1" / "img1.dcm")]
+    assert list(runs(str(dataset))["rows"]) == [6, 0, third["rows"]]
+    assert len(_parts(dataset)) == 2
+
+    merged = compact(str(dataset))
+    assert _parts(dataset) == [os.path.basename(merged)]
+    pd = pytest.importorskip("pandas")
+    key = ["file_path"]
+    pd.testing.assert_frame_equal(
+        read_dataset(str(dataset)).sort_values(key).reset_index(drop=True), table.sort_values(key).reset_index(drop=True)
+    )
+
+
+def test_content_hash_skips_touched_files(tmp_path):
+    tree, dataset = tmp_path / "tree", tmp_path / "dataset"
+    _write(tree / "a.dcm")
+    ingest_incremental(str(tree), str(dataset), hash_files=True)
+    os.utime(tree / "a.dcm", ns=(10**18, 10**18))
+    touched = ingest_incremental(str(tree), str(dataset), hash_files=True)
+    assert (touched["changed"], touched["unchanged"]) == (0, 1)
+    os.utime(tree / "a.dcm", ns=(2 * 10**18, 2 * 10**18))
+    assert ingest_incremental(str(tree), str(dataset))["changed"] == 1
+
+
+def test_manifest_is_tied_to_one_directory(tmp_path):
+    _write(tmp_path / "a" / "x.dcm")
+    _write(tmp_path / "b" / "y.dcm")
+    ingest_incremental(str(tmp_path / "a"), str(tmp_path / "dataset"))
+    with pytest.raises(ValueError, match="manifest belongs to"):
+        ingest_incremental(str(tmp_path / "b"), str(tmp_path / "dataset"))
@@ -41,3 +41,66 @@ def test_extract_metadata_and_ingest(tmp_path):
     n = ingest_directory(str(tmp_path), str(out_csv))
     assert n >= 1
     assert os.path.exists(out_csv)
+
+
+@pytest.mark.parametrize("workers,executor", [(4, "thread"), (2, "process")])
+def test_parallel_ingest_matches_serial(tmp_path, workers, executor):
+    tree = tmp_path / "tree"
+    for i in range(23):
+        series = tree / f"s{i % 4}"
+        series.mkdir(parents=True, exist_ok=True)
+        make_minimal_dicom(str(series / f"img{i:03d}.dcm"))
+    serial, parallel = tmp_path / "serial.csv", tmp_path / "parallel.csv"
+    n = ingest_directory(str(tree), str(serial))
+    assert ingest_directory(str(tree), str(parallel), workers=workers, executor=executor) == n == 23
+    assert parallel.read_text() == serial.read_text()
+
+
+def test_read_metadata_sniffs_and_reports_skip_reasons(tmp_path):
+    from theranostics.dicom_ingest import read_metadata
+
+    dcm = tmp_path / "a.dcm"
+    make_minimal_dicom(str(dcm))
+    meta, reason = read_metadata(str(dcm))
+    assert reason is None and meta == extract_metadata(str(dcm))
+    assert read_metadata(str(dcm), {"modality": "Modality"}) == ({"modality": "CT", "file_path": str(dcm)}, None)
+
+    # with preamble and DICM magic, and a bare dataset without either
+    import pydicom
+
+    ds = pydicom.dcmread(str(dcm), force=True)
+    standard, bare = tmp_path / "standard.dcm", tmp_path / "bare.dcm"
+    ds.save_as(str(standard), write_like_original=False)
+    assert open(standard, "rb").read(132)[128:] == b"DICM"
+    del ds.file_meta
+    ds.save_as(str(bare), write_like_original=True)
+    for path in (standard, bare):
+        assert read_metadata(str(path))[0]["patient_id"] == "TESTPATIENT"
+
+    (tmp_path / "notes.txt").write_text("not a DICOM file, but long enough to have a preamble " * 4)
+    (tmp_path / "tiny").write_bytes(b"\x00")
+    assert read_metadata(str(tmp_path / "notes.txt")) == (None, "not_dicom")
+    assert read_metadata(str(tmp_path / "tiny")) == (None, "too_short")
+    assert read_metadata(str(tmp_path / "gone.dcm")) == (None, "missing")
+    with pytest.raises(pydicom.errors.InvalidDicomError, match="not_dicom"):
+        extract_metadata(str(tmp_path / "notes.txt"))
+    assert ingest_directory(str(tmp_path), str(tmp_path / "out" / "meta.csv")) == 3
+
+
+def test_corrupt_headers_are_skipped_not_fatal(tmp_path):
+    from theranostics.dicom_ingest import read_metadata
+
+    pydicom = pytest.importorskip("pydicom")
+    good = tmp_path / "good.dcm"
+    make_minimal_dicom(str(good))
+    pydicom.dcmread(str(good), force=True).save_as(str(good), write_like_original=False)
+    raw = good.read_bytes()
+    # Modality (0008,0060) with an unknown VR: parses, then fails to decode
+    at = raw.index(b"\x08\x00\x60\x00CS") + 4
+    (tmp_path / "bad_vr.dcm").write_bytes(raw[:at] + b"ZZ" + raw[at + 2 :])
+    # preamble and DICM magic, then a few bytes of nothing
+    (tmp_path / "truncated.dcm").write_bytes(raw[:132] + b"\x02\x00\x00")
+
+    assert read_metadata(str(tmp_path / "bad_vr.dcm")) == (None, "bad_header")
+    assert read_metadata(str(tmp_path / "truncated.dcm")) == (None, "bad_header")
+    assert ingest_directory(str(tmp_path), str(tmp_path / "out" / "meta.csv")) == 1
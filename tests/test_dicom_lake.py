@@ -0,0 +1,79 @@
+import os
+
+import pytest
+
+pq = pytest.importorskip("pyarrow.parquet")
+
+from theranostics.dicom_ingest import ingest_directory
+from theranostics.dicom_lake import INDEX_NAME, lookup, open_lake, rebuild_index
+
+
+def _write_tree(root, n=36):
+    try:
+        from pydicom.dataset import Dataset, FileMetaDataset
+        from pydicom.uid import ExplicitVRLittleEndian, generate_uid
+    except Exception:
+        pytest.skip("pydicom not installed")
+    os.makedirs(root, exist_ok=True)
+    for i in range(n):
+        file_meta = FileMetaDataset()
+        file_meta.MediaStorageSOPClassUID = generate_uid()
+        file_meta.MediaStorageSOPInstanceUID = generate_uid()
+        file_meta.TransferSyntaxUID = ExplicitVRLittleEndian
+        ds = Dataset()
+        ds.file_meta = file_meta
+        ds.is_little_endian = True
+        ds.is_implicit_VR = False
+        ds.SOPInstanceUID = generate_uid()
+        ds.StudyInstanceUID = f"1.2.{i // 6}"
+        ds.SeriesInstanceUID = f"1.2.{i // 6}.{i // 3}"
+        ds.PatientID = f"P{i // 12:03d}"
+        ds.Modality = ("CT", "PT")[i % 2]
+        ds.StudyDate = ("20250101", "20250102", "")[i * 3 // n]
+        ds.Manufacturer = "TESTMANU"
+        ds.save_as(os.path.join(root, f"img{i:03d}.dcm"))
+    return root
+
+
+def test_lake_layout_and_index_lookups(tmp_path):
+    tree = _write_tree(str(tmp_path / "tree"))
+    lake = str(tmp_path / "lake")
+    flat = str(tmp_path / "flat.parquet")
+    assert ingest_directory(tree, lake, partition_by=("modality", "study_date"), batch_size=5, row_group_size=4) == 36
+    ingest_directory(tree, flat, to_parquet=True)
+    everything = pq.read_table(flat).to_pandas()
+
+    assert sorted(os.listdir(os.path.join(lake, "modality=CT"))) == [
+        "study_date=20250101",
+        "study_date=20250102",
+        "study_date=__HIVE_DEFAULT_PARTITION__",
+    ]
+    assert open_lake(lake).to_table().num_rows == 36
+
+    def same(found, expected):
+        assert list(found.columns) == list(everything.columns)
+        found = found.sort_values("file_path").reset_index(drop=True)
+        assert found.equals(expected.sort_values("file_path").reset_index(drop=True))
+
+    same(lookup(lake, patient_id="P001"), everything[everything.patient_id == "P001"])
+    same(lookup(lake, patient_id=("P001", None), modality="CT"), everything[(everything.patient_id >= "P001") & (everything.modality == "CT")])
+    same(lookup(lake, study_instance_uid=["1.2.0", "1.2.5"]), everything[everything.study_instance_uid.isin(["1.2.0", "1.2.5"])])
+    same(lookup(lake, study_date=""), everything[everything.study_date == ""])
+    assert lookup(lake, series_instance_uid="nope").empty
+
+    # a point lookup touches only the row groups listed for it
+    index = pq.read_table(os.path.join(lake, INDEX_NAME)).to_pandas()
+    hits = index[(index.key == "patient_id") & (index.value == "P001")]
+    groups = sum(pq.ParquetFile(os.path.join(lake, f)).num_row_groups for f in index.file.unique())
+    assert 0 < len(hits) < groups
+
+    entries = len(index)
+    assert rebuild_index(lake) == entries
+    pd = pytest.importorskip("pandas")
+    pd.testing.assert_frame_equal(pq.read_table(os.path.join(lake, INDEX_NAME)).to_pandas(), index)
+
+    # appending merges into the index; partitioning is fixed per lake
+    assert ingest_directory(tree, lake, partition_by=("modality", "study_date")) == 36
+    assert len(lookup(lake, patient_id="P002")) == 2 * (everything.patient_id == "P002").sum()
+    with pytest.raises(ValueError, match="partitioned by"):
+        ingest_directory(tree, lake, partition_by=("modality",))
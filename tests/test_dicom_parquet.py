@@ -36,8 +36,45 @@ def test_ingest_writes_parquet(tmp_path):
     out_parquet = tmp_path / "out.parquet"
     n = ingest_directory(str(tmp_path), str(out_parquet), to_parquet=True)
     assert n >= 1
-    # Accept either a parquet file or a CSV fallback when parquet engine is not installed
-    parquet_exists = os.path.exists(str(out_parquet))
-    csv_fallback = os.path.exists(str(out_parquet) + '.csv')
-    assert parquet_exists or csv_fallback
+    # parquet output is explicit: no CSV fallback file is ever written
+    assert os.path.exists(str(out_parquet))
+    assert not os.path.exists(str(out_parquet) + '.csv')
+
+
+def _write_series(directory, count):
+    from tests.test_dicom_ingest import make_minimal_dicom
+
+    directory.mkdir(parents=True, exist_ok=True)
+    for i in range(count):
+        make_minimal_dicom(str(directory / f"img{i:03d}.dcm"))
+
+
+def test_streaming_parquet_row_groups_and_schema(tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    from theranostics.dicom_ingest import METADATA_COLUMNS
+
+    _write_series(tmp_path / "tree", 25)
+    out = tmp_path / "out" / "meta.parquet"
+    n = ingest_directory(str(tmp_path / "tree"), str(out), to_parquet=True, batch_size=4, row_group_size=10, compression="zstd")
+    assert n == 25
+    meta = pq.ParquetFile(str(out)).metadata
+    assert [meta.row_group(i).num_rows for i in range(meta.num_row_groups)] == [10, 10, 5]
+    assert meta.row_group(0).column(0).compression == "ZSTD"
+    assert pq.read_table(str(out)).column_names == list(METADATA_COLUMNS)
+
+    empty = tmp_path / "empty.parquet"
+    (tmp_path / "nothing").mkdir()
+    assert ingest_directory(str(tmp_path / "nothing"), str(empty), to_parquet=True) == 0
+    assert pq.read_table(str(empty)).column_names == list(METADATA_COLUMNS)
+
+
+def test_parquet_errors_are_raised(tmp_path, monkeypatch):
+    _write_series(tmp_path / "tree", 2)
+    out = tmp_path / "meta.parquet"
+    with pytest.raises(Exception):
+        ingest_directory(str(tmp_path / "tree"), str(out), to_parquet=True, compression="no-such-codec")
+    monkeypatch.setitem(__import__("sys").modules, "pyarrow", None)
+    with pytest.raises(RuntimeError, match="pyarrow"):
+        ingest_directory(str(tmp_path / "tree"), str(out), to_parquet=True)
+    assert sorted(os.listdir(tmp_path)) == ["tree"]
 
@@ -0,0 +1,137 @@
+import math
+import os
+
+import numpy as np
+import pytest
+
+from theranostics.dicom_pixels import build_series_volumes, build_volume, load_volume, roi_stats, suv_factor, suv_volume
+
+DOSE_BQ = 370e6
+HALF_LIFE_S = 6586.2  # F-18
+WEIGHT_KG = 70.0
+
+
+def _write_pet_series(directory, n_slices=6, rows=8, cols=10):
+    """Slices saved in shuffled order with per-slice rescale slopes; returns the expected volume in Bq/ml."""
+    try:
+        from pydicom.dataset import Dataset, FileMetaDataset
+        from pydicom.uid import ExplicitVRLittleEndian, generate_uid
+    except Exception:
+        pytest.skip("pydicom not installed")
+    os.makedirs(directory, exist_ok=True)
+    rng = np.random.default_rng(0)
+    series_uid = generate_uid()
+    expected = np.zeros((n_slices, rows, cols), dtype=np.float32)
+    for i in rng.permutation(n_slices):
+        stored = rng.integers(0, 4000, size=(rows, cols), dtype=np.uint16)
+        slope = 0.5 + i / 10
+        expected[i] = stored * np.float32(slope) + np.float32(-2.0)
+        file_meta = FileMetaDataset()
+        file_meta.MediaStorageSOPClassUID = "1.2.840.10008.5.1.4.1.1.128"
+        file_meta.MediaStorageSOPInstanceUID = generate_uid()
+        file_meta.TransferSyntaxUID = ExplicitVRLittleEndian
+        ds = Dataset()
+        ds.file_meta = file_meta
+        ds.is_little_endian = True
+        ds.is_implicit_VR = False
+        ds.SOPInstanceUID = file_meta.MediaStorageSOPInstanceUID
+        ds.StudyInstanceUID = "1.2.3"
+        ds.SeriesInstanceUID = series_uid
+        ds.PatientID = "PET1"
+        ds.Modality = "PT"
+        ds.InstanceNumber = n_slices - i  # reversed, so sorting must use the geometry
+        ds.ImageOrientationPatient = [1, 0, 0, 0, 1, 0]
+        ds.ImagePositionPatient = [0.0, 0.0, -100.0 + 3.27 * i]
+        ds.PixelSpacing = [4.0, 4.0]
+        ds.SliceThickness = 3.27
+        ds.Rows, ds.Columns = rows, cols
+        ds.SamplesPerPixel = 1
+        ds.PhotometricInterpretation = "MONOCHROME2"
+        ds.BitsAllocated = ds.BitsStored = 16
+        ds.HighBit = 15
+        ds.PixelRepresentation = 0
+        ds.RescaleSlope = slope
+        ds.RescaleIntercept = -2.0
+        ds.Units = "BQML"
+        ds.DecayCorrection = "START"
+        ds.PatientWeight = WEIGHT_KG
+        ds.SeriesTime = "101500"
+        item = Dataset()
+        item.RadionuclideTotalDose = DOSE_BQ
+        item.RadionuclideHalfLife = HALF_LIFE_S
+        item.RadiopharmaceuticalStartTime = "091500.000000"
+        ds.RadiopharmaceuticalInformationSequence = [item]
+        ds.PixelData = stored.tobytes()
+        ds.save_as(os.path.join(directory, f"slice{i:03d}.dcm"), write_like_original=False)
+    return expected
+
+
+def test_build_volume_sorts_rescales_and_memory_maps(tmp_path):
+    expected = _write_pet_series(str(tmp_path / "series"))
+    paths = sorted(str(p) for p in (tmp_path / "series").iterdir())
+    meta = build_volume(paths, str(tmp_path / "vol.npy"), workers=2)
+    volume, stored_meta = load_volume(str(tmp_path / "vol.npy"))
+    assert isinstance(volume, np.memmap) and volume.dtype == np.float32
+    np.testing.assert_allclose(volume, expected, rtol=1e-6)
+    assert meta == stored_meta
+    assert meta["shape"] == [6, 8, 10]
+    assert meta["spacing_mm"] == pytest.approx([3.27, 4.0, 4.0])
+    assert [p[2] for p in meta["positions"]] == sorted(p[2] for p in meta["positions"])
+
+
+def test_suv_and_roi_stats_are_chunked_and_vectorized(tmp_path):
+    expected = _write_pet_series(str(tmp_path / "series"))
+    import pandas as pd
+
+    from theranostics.dicom_ingest import iter_metadata
+
+    metadata = pd.DataFrame(list(iter_metadata(str(tmp_path / "series"))))
+    volumes = build_series_volumes(metadata, str(tmp_path / "volumes"))
+    (path,) = volumes.values()
+    volume, meta = load_volume(path)
+
+    decayed = DOSE_BQ * math.exp(-math.log(2) * 3600 / HALF_LIFE_S)
+    factor = suv_factor(meta)
+    assert factor == pytest.approx(WEIGHT_KG * 1000 / decayed)
+    suv_path = suv_volume(path, str(tmp_path / "suv.npy"), chunk_slices=4)
+    suv, _ = load_volume(suv_path)
+    np.testing.assert_allclose(suv, expected * factor, rtol=1e-5)
+
+    mask = np.zeros(volume.shape, dtype=bool)
+    mask[1:5, 2:6, 3:8] = True
+    stats = roi_stats(volume, mask=mask, scale=factor, spacing_mm=meta["spacing_mm"], chunk_slices=2)
+    values = expected[mask].astype(np.float64) * factor
+    assert stats["voxels"] == mask.sum()
+    for name, value in (("mean", values.mean()), ("std", values.std()), ("min", values.min()), ("max", values.max())):
+        assert stats[name] == pytest.approx(value, rel=1e-5)
+    assert stats["volume_ml"] == pytest.approx(mask.sum() * 3.27 * 16 / 1000)
+
+    hot = roi_stats(volume, threshold=float(np.median(values)), scale=factor, chunk_slices=3)
+    assert hot["voxels"] == int((expected.astype(np.float64) * factor >= np.median(values)).sum())
+
+    with pytest.raises(ValueError, match="BQML"):
+        suv_factor(dict(meta, units="CNTS"))
+
+
+def test_build_volume_rejects_mixed_series_and_stacked_slices(tmp_path):
+    import shutil
+
+    _write_pet_series(str(tmp_path / "a"), n_slices=3)
+    _write_pet_series(str(tmp_path / "b"), n_slices=3)
+    a = sorted(str(p) for p in (tmp_path / "a").iterdir())
+    b = sorted(str(p) for p in (tmp_path / "b").iterdir())
+    with pytest.raises(ValueError, match="more than one series"):
+        build_volume(a + b[:1], str(tmp_path / "mixed.npy"))
+    shutil.copy(a[0], str(tmp_path / "a" / "copy.dcm"))
+    with pytest.raises(ValueError, match="same position"):
+        build_volume(a + [str(tmp_path / "a" / "copy.dcm")], str(tmp_path / "stacked.npy"))
+    assert not os.path.exists(str(tmp_path / "stacked.npy"))
+
+
+def test_roi_stats_std_is_stable_for_large_means():
+    rng = np.random.default_rng(1)
+    volume = 1e9 + rng.normal(size=(10, 4, 5))
+    stats = roi_stats(volume, chunk_slices=3)
+    assert stats["mean"] == pytest.approx(volume.mean(), rel=1e-12)
+    assert stats["std"] == pytest.approx(volume.std(), rel=1e-6)
+    assert stats["sum"] == pytest.approx(volume.sum(), rel=1e-12)
@@ -0,0 +1,51 @@
+import os
+import shutil
+
+import pandas as pd
+import pytest
+
+from theranostics.dicom_ingest import ingest_directory
+from theranostics.dicom_rollup import UidSet
+
+
+def test_uid_set_spills_to_disk(tmp_path):
+    with UidSet(max_memory_uids=3, spill_dir=str(tmp_path)) as seen:
+        assert [seen.add(u) for u in "abcab"] == [True, True, True, False, False]
+        assert not seen.spilled
+        assert [seen.add(u) for u in "dead"] == [True, True, False, False]
+        assert seen.spilled and len(seen) == 5
+        assert "c" in seen and "z" not in seen
+        assert len(os.listdir(tmp_path)) == 1
+    assert os.listdir(tmp_path) == []
+
+
+@pytest.mark.parametrize("max_memory_uids", [2_000_000, 2])
+def test_dedupe_and_rollups_in_one_pass(tmp_path, max_memory_uids):
+    from tests.test_dicom_ingest import make_minimal_dicom
+
+    tree = tmp_path / "tree"
+    for i in range(6):
+        (tree / f"s{i % 2}").mkdir(parents=True, exist_ok=True)
+        make_minimal_dicom(str(tree / f"s{i % 2}" / f"img{i}.dcm"))
+    # a re-sent export: the same instances again under another directory
+    shutil.copytree(tree / "s0", tree / "resent")
+
+    out, rollups = tmp_path / "meta.csv", tmp_path / "rollups"
+    n = ingest_directory(str(tree), str(out), dedupe=True, rollup_dir=str(rollups), max_memory_uids=max_memory_uids)
+    meta = pd.read_csv(out, dtype=str, keep_default_na=False)
+    assert n == len(meta) == meta["sop_instance_uid"].nunique() == 6
+
+    series = pd.read_csv(rollups / "dicom_series.csv", dtype={"study_date": str})
+    assert series["instances"].sum() == 6 and series["duplicate_files"].sum() == 3
+    expected = meta.groupby("series_instance_uid")["file_path"].agg(["count", "min", "max"])
+    got = series.set_index("series_instance_uid").loc[expected.index]
+    assert list(got["instances"]) == list(expected["count"])
+    assert list(got["first_file"]) == list(expected["min"]) and list(got["last_file"]) == list(expected["max"])
+
+    studies = pd.read_csv(rollups / "dicom_studies.csv")
+    assert len(studies) == meta["study_instance_uid"].nunique()
+    assert studies["instances"].sum() == 6 and set(studies["modalities"]) == {"CT"}
+
+    # without dedupe every file is written and the rollups count them all
+    assert ingest_directory(str(tree), str(tmp_path / "all.csv"), rollup_dir=str(rollups)) == 9
+    assert pd.read_csv(rollups / "dicom_series.csv")["instances"].sum() == 9
@@ -14,7 +14,7 @@ from theranostics.experiments import run_experiment
 def test_run_experiment_creates_artifacts(tmp_path):
     artifacts_dir = str(tmp_path / "artifacts")
     # run small experiment
-    res = run_experiment(params={"n": 5}, artifacts_dir=artifacts_dir)
+    res = run_experiment(params={"n": 5}, artifacts_dir=artifacts_dir, results_store=False)
 
     # Expect artifacts keys
     assert "artifacts" in res
@@ -33,3 +33,119 @@ def test_run_experiment_creates_artifacts(tmp_path):
     # Clean up (tmp_path will be removed by pytest automatically)
     if os.path.exists(artifacts_dir):
         shutil.rmtree(artifacts_dir)
+
+
+def test_run_experiment_uses_cache(tmp_path):
+    cache_dir = str(tmp_path / "cache")
+    first = run_experiment(params={"n": 30}, artifacts_dir=str(tmp_path / "a1"), cache=cache_dir, results_store=False)
+    second = run_experiment(params={"n": 30}, artifacts_dir=str(tmp_path / "a2"), cache=cache_dir, results_store=False)
+    assert first["cache"] == {"hits": 0, "misses": 2}
+    assert second["cache"] == {"hits": 2, "misses": 0}
+    assert first["metrics"] == second["metrics"]
+
+
+def test_run_sweep_isolated_runs(tmp_path):
+    from theranostics.experiments import run_sweep
+
+    grid = {"censor_rate": [0.0, 0.3], "biomarker_effect": [1.0]}
+    table = run_sweep(grid, replicates=2, workers=2, base_params={"n": 40}, artifacts_dir=str(tmp_path), results_store=False)
+    assert list(zip(table["grid_index"], table["replicate"])) == [(0, 0), (0, 1), (1, 0), (1, 1)]
+    assert list(table["seed"]) == [42, 43, 42, 43]
+    assert table["artifacts_dir"].nunique() == 4
+    assert {"coef", "p", "cox_concordance", "event_rate"} <= set(table.columns)
+    assert os.path.exists(os.path.join(str(tmp_path), "sweep_results.csv"))
+
+    single = run_experiment(
+        params={"n": 40, "censor_rate": 0.3, "biomarker_effect": 1.0}, artifacts_dir=str(tmp_path / "one"), results_store=False
+    )
+    assert abs(table.loc[2, "cox_concordance"] - single["metrics"]["cox_concordance"]) < 1e-12
+
+
+def test_run_experiment_artifact_formats_and_options(tmp_path):
+    from theranostics.experiments import read_table
+
+    res = run_experiment(
+        params={"n": 50},
+        artifacts_dir=str(tmp_path / "pq"),
+        artifact_format="parquet",
+        artifacts={"cox_input": 10, "cox_summary_json": False},
+        tracking=False,
+        results_store=False,
+    )
+    arts = res["artifacts"]
+    assert set(arts) == {"km_survival_table_parquet", "cox_summary_parquet", "cox_input_parquet"}
+    assert len(read_table(arts["cox_input_parquet"])) == 10
+    assert read_table(arts["cox_summary_parquet"]).index.name == "covariate"
+
+    res = run_experiment(
+        params={"n": 50},
+        artifacts_dir=str(tmp_path / "ipc"),
+        artifact_format="arrow",
+        artifacts=["cox_summary"],
+        tracking=False,
+        results_store=False,
+    )
+    assert list(res["artifacts"]) == ["cox_summary_arrow"]
+    assert os.listdir(str(tmp_path / "ipc")) == ["cox_summary.arrow"]
+
+
+def test_run_sweep_consolidated(tmp_path):
+    import pandas as pd
+    from theranostics.experiments import run_sweep
+
+    table = run_sweep(
+        [{"censor_rate": 0.0}, {"censor_rate": 0.3}],
+        replicates=2,
+        workers=1,
+        base_params={"n": 30},
+        artifacts_dir=str(tmp_path),
+        artifact_format="parquet",
+        consolidate=True,
+        results_store=False,
+    )
+    files = sorted(os.listdir(str(tmp_path)))
+    assert files == ["sweep_cox_summary.parquet", "sweep_km_survival_table.parquet", "sweep_results.parquet"]
+    summary = pd.read_parquet(os.path.join(str(tmp_path), "sweep_cox_summary.parquet"))
+    assert len(summary) == 4 * 5
+    biomarker = summary[summary["covariate"] == "biomarker"]
+    assert list(biomarker["coef"]) == list(table["coef"])
+
+
+def test_run_sweep_resumes_from_manifest(tmp_path):
+    import json
+    from theranostics.experiments import run_sweep
+
+    kwargs = dict(
+        replicates=1, workers=1, base_params={"n": 30}, artifacts_dir=str(tmp_path), manifest=True, results_store=False
+    )
+    first = run_sweep({"censor_rate": [0.0, 0.3]}, **kwargs)
+    assert list(first["status"]) == ["done", "done"]
+
+    # simulate a crash in the middle of the second run: record gone, lock left by a dead process
+    manifest_dir = os.path.join(str(tmp_path), "manifest")
+    key = first.loc[1, "run_key"]
+    os.remove(os.path.join(manifest_dir, f"{key}.json"))
+    with open(os.path.join(manifest_dir, f"{key}.lock"), "w") as f:
+        json.dump({"host": __import__("socket").gethostname(), "pid": 2 ** 22 + 1}, f)
+
+    second = run_sweep({"censor_rate": [0.0, 0.3, 0.5]}, **kwargs)
+    assert list(second["status"]) == ["skipped", "done", "done"]
+    assert second.loc[0, "cox_concordance"] == first.loc[0, "cox_concordance"]
+    assert abs(second.loc[1, "cox_concordance"] - first.loc[1, "cox_concordance"]) < 1e-12
+    assert not os.path.exists(os.path.join(manifest_dir, f"{key}.lock"))
+
+
+def test_run_sweep_records_in_results_store(tmp_path):
+    from theranostics.experiments import run_sweep
+    from theranostics.store import ResultsStore
+
+    db = str(tmp_path / "results.db")
+    grid = {"censor_rate": [0.0, 0.4], "biomarker_effect": [0.3, 1.5]}
+    table = run_sweep(grid, workers=2, base_params={"n": 40}, artifacts_dir=str(tmp_path / "sweep"), results_store=db)
+    runs = ResultsStore(db).runs(sweep_id=table.attrs["sweep_id"], where={"censor_rate": 0.4}, order_by="coef")
+    assert len(runs) == 2 and runs["coef"].is_monotonic_increasing
+    expected = table[table["censor_rate"] == 0.4].sort_values("coef")
+    assert list(runs["run_id"]) == list(expected["run_id"])
+    assert list(runs["cox_concordance"]) == list(expected["cox_concordance"])
+    stages = ResultsStore(db).timings(runs["run_id"].iloc[0])["stage"].tolist()
+    assert stages[:3] == ["cohort", "km_fit", "cox_fit"] and stages[-1] == "total"
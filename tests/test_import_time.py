@@ -0,0 +1,36 @@
+"""Import-time budget: lightweight entry points must not pull in heavy dependencies."""
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = str(Path(__file__).resolve().parents[1])
+HEAVY = ("pandas", "scipy", "lifelines", "prefect", "mlflow", "pydicom", "spacy")
+# cold-import budget for `import theranostics.dicom_ingest` (the DICOM CLI), in ms
+BUDGET_MS = float(os.environ.get("THERANOSTICS_IMPORT_BUDGET_MS", "150"))
+
+
+def _run(code, *flags):
+    env = dict(os.environ, PYTHONPATH=ROOT + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    out = subprocess.run([sys.executable, *flags, "-c", code], capture_output=True, text=True, env=env, cwd=ROOT, check=True)
+    return out
+
+
+def test_light_imports_skip_heavy_dependencies():
+    code = (
+        "import sys, theranostics, theranostics.dicom_ingest, theranostics.nlp\n"
+        f"print(','.join(m for m in {HEAVY!r} if m in sys.modules))"
+    )
+    assert _run(code).stdout.strip() == ""
+    code = "import sys, theranostics.experiments\nprint('mlflow' in sys.modules, 'prefect' in sys.modules)"
+    assert _run(code).stdout.strip() == "False False"
+
+
+def test_dicom_cli_cold_import_within_budget():
+    def cumulative_us():
+        stderr = _run("import theranostics.dicom_ingest", "-X", "importtime").stderr
+        line = [ln for ln in stderr.splitlines() if ln.rstrip().endswith("| theranostics.dicom_ingest")][-1]
+        return int(line.split("|")[1])
+
+    best_ms = min(cumulative_us() for _ in range(3)) / 1000.0
+    assert best_ms < BUDGET_MS, f"import theranostics.dicom_ingest took {best_ms:.1f} ms (budget {BUDGET_MS} ms)"
@@ -0,0 +1,58 @@
+import json
+import os
+import socket
+import threading
+
+from theranostics.manifest import RunManifest
+
+DEAD_PID = 2 ** 22 + 1
+
+
+def _stale_lock(root, key):
+    with open(os.path.join(root, f"{key}.lock"), "w") as f:
+        json.dump({"host": socket.gethostname(), "pid": DEAD_PID}, f)
+
+
+def test_one_claimer_wins_a_stale_lock_race(tmp_path):
+    root = str(tmp_path)
+    a, b = RunManifest(root), RunManifest(root)
+    _stale_lock(root, "k")
+
+    # b finds the lock stale, then a breaks it and claims the run before b acts
+    check = b._snapshot_is_stale
+    claimed = []
+
+    def stale_then_overtaken(snapshot):
+        stale = check(snapshot)
+        if not claimed:
+            claimed.append(a.claim("k"))
+        return stale
+
+    b._snapshot_is_stale = stale_then_overtaken
+    assert b.claim("k") is False
+    assert claimed == [True]
+    with open(os.path.join(root, "k.lock")) as f:
+        assert json.load(f)["pid"] == os.getpid()
+    assert sorted(os.listdir(root)) == ["k.lock"]
+
+
+def test_concurrent_claimers_of_a_stale_lock(tmp_path):
+    root = str(tmp_path)
+    for trial in range(10):
+        key = f"k{trial}"
+        _stale_lock(root, key)
+        barrier = threading.Barrier(6)
+        results = []
+
+        def claim():
+            manifest = RunManifest(root)
+            barrier.wait()
+            results.append(manifest.claim(key))
+
+        threads = [threading.Thread(target=claim) for _ in range(6)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert results.count(True) == 1
+    assert len(os.listdir(root)) == 10
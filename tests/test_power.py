@@ -0,0 +1,32 @@
+import pandas as pd
+
+from theranostics.power import power_analysis, required_sample_size
+
+
+def test_power_analysis_stops_early_and_ignores_worker_count():
+    kwargs = dict(
+        censor_rates=[0.4], biomarker_effects=[0.3, 3.0], mcse=0.05, min_replicates=40,
+        max_replicates=200, batch_size=20, reference_n=20_000,
+    )
+    serial = power_analysis([150], workers=1, **kwargs)
+    parallel = power_analysis([150], workers=2, **kwargs)
+    pd.testing.assert_frame_equal(serial, parallel)
+    bio = serial[serial["covariate"] == "biomarker"].set_index("biomarker_effect")
+    assert bio.loc[3.0, "power"] > bio.loc[0.3, "power"]
+    assert (serial["power_mcse"] <= 0.05).all() and serial["stopped_early"].all()
+    assert serial["replicates"].between(40, 200).all()
+    assert serial["coverage"].between(0.8, 1.0).all()
+
+
+def test_required_sample_size_interpolates():
+    results = pd.DataFrame(
+        {
+            "n": [100, 200, 400],
+            "censor_rate": 0.4,
+            "biomarker_effect": 0.3,
+            "covariate": "biomarker",
+            "power": [0.4, 0.7, 0.9],
+        }
+    )
+    row = required_sample_size(results, target_power=0.8).iloc[0]
+    assert row["n"] == 400 and abs(row["n_interpolated"] - 300) < 1e-9
@@ -0,0 +1,36 @@
+import json
+
+import pytest
+
+from theranostics.profiling import NULL_PROFILER, Profiler, get_profiler
+
+
+def test_stages_nest_and_accumulate(tmp_path):
+    prof = Profiler(memory=True)
+    with prof.stage("outer"):
+        for _ in range(2):
+            with prof.stage("inner"):
+                block = bytearray(2_000_000)
+                del block
+    record = prof.record()
+    assert list(record["stages"]) == ["inner", "outer"]
+    assert record["stages"]["inner"]["calls"] == 2
+    assert record["stages"]["outer"]["seconds"] >= record["stages"]["inner"]["seconds"]
+    assert record["stages"]["outer"]["peak_bytes"] >= record["stages"]["inner"]["peak_bytes"] >= 2_000_000
+    assert json.load(open(prof.to_json(str(tmp_path / "t.json"))))["stages"]["inner"]["calls"] == 2
+
+
+def test_get_profiler_modes(monkeypatch):
+    assert get_profiler(False) is NULL_PROFILER
+    with NULL_PROFILER.stage("x"):
+        pass
+    assert NULL_PROFILER.record()["stages"] == {}
+    monkeypatch.setenv("THERANOSTICS_PROFILE", "off")
+    assert not get_profiler().enabled
+    monkeypatch.setenv("THERANOSTICS_PROFILE", "cprofile")
+    prof = get_profiler()
+    with prof.stage("sum"):
+        sum(range(1000))
+    assert "function calls" in prof.stats()
+    with pytest.raises(ValueError):
+        get_profiler("nope")
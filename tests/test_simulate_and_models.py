@@ -18,3 +18,148 @@ def test_models_run():
     cph, df2 = fit_cox(df)
     # summary should be a DataFrame with rows for coefficients
     assert hasattr(cph, "summary")
+
+
+def test_iter_cohort_chunks_independent_of_chunk_size():
+    from theranostics.simulate import iter_cohort_chunks
+
+    small = pd.concat(iter_cohort_chunks(1000, chunk_size=64, seed=3, censor_rate=0.2), ignore_index=True)
+    large = pd.concat(iter_cohort_chunks(1000, chunk_size=5000, seed=3, censor_rate=0.2), ignore_index=True)
+    pd.testing.assert_frame_equal(small, large)
+    assert small.shape[0] == 1000
+    assert small["patient_id"].iloc[-1] == "P01000"
+
+
+def test_write_cohort_parquet(tmp_path):
+    from theranostics.simulate import write_cohort_parquet
+
+    paths = write_cohort_parquet(str(tmp_path / "cohort"), 250, chunk_size=100, seed=5)
+    assert len(paths) == 3
+    df = pd.read_parquet(str(tmp_path / "cohort"))
+    assert df.shape[0] == 250
+
+
+def test_generate_cohort_batch_matches_single_calls():
+    from theranostics.simulate import generate_cohort_batch
+
+    grid = [(0.0, 0.3), (0.4, 1.0)]
+    batch = generate_cohort_batch(40, seeds=[7, 8], grid=grid)
+    assert batch["time"].shape[0] == 2 * 2 * 40
+    mask = (batch["replicate"] == 1) & (batch["grid_index"] == 1)
+    single = generate_cohort(40, seed=8, censor_rate=0.4, biomarker_effect=1.0)
+    assert (batch["time"][mask] == single["time"].to_numpy()).all()
+    assert (batch["event"][mask] == single["event"].to_numpy()).all()
+    assert (batch["patient_id"][mask] == single["patient_id"].to_numpy()).all()
+
+
+def test_compact_cohort_fits_like_default():
+    from theranostics.simulate import compact_cohort, format_patient_ids
+
+    df = generate_cohort(300, seed=4, censor_rate=0.2)
+    small = generate_cohort(300, seed=4, censor_rate=0.2, compact=True)
+    pd.testing.assert_frame_equal(compact_cohort(df), small)
+    assert small["age"].dtype == "int8"
+    assert small["treatment_group"].dtype == "category"
+    assert list(format_patient_ids(small["patient_id"][:2])) == ["P00001", "P00002"]
+    assert small.memory_usage(deep=True).sum() * 4 < df.memory_usage(deep=True).sum()
+
+    cph, _ = fit_cox(df)
+    cph_small, _ = fit_cox(small)
+    pd.testing.assert_series_equal(cph.summary["coef"], cph_small.summary["coef"])
+    assert fit_km(small).median_survival_time_ == fit_km(df).median_survival_time_
+
+
+def test_fit_km_numpy_matches_lifelines():
+    df = generate_cohort(300, seed=6, censor_rate=0.3)
+    native = fit_km(df)
+    ref = fit_km(df, backend="lifelines")
+    assert native.median_survival_time_ == ref.median_survival_time_
+    diff = native.survival_function_["KM_estimate"].to_numpy() - ref.survival_function_["KM_estimate"].to_numpy()
+    assert abs(diff).max() < 1e-12
+
+
+def test_fit_km_grouped():
+    from theranostics.models import fit_km_grouped
+
+    df = generate_cohort(300, seed=6)
+    curves = fit_km_grouped(df, "tumor_stage")
+    assert sorted(curves) == [1, 2, 3, 4]
+    stage4 = df[df["tumor_stage"] == 4]
+    assert curves[4].median_survival_time_ == fit_km(stage4).median_survival_time_
+    assert (curves[4].variance_ >= 0).all()
+
+
+def test_fit_cox_native_matches_lifelines():
+    df = generate_cohort(400, seed=9, censor_rate=0.3, biomarker_effect=1.0)
+    ref, _ = fit_cox(df)
+    native, df2 = fit_cox(df, backend="native")
+    assert list(native.summary.columns) == list(ref.summary.columns)
+    assert list(native.summary.index) == list(ref.summary.index)
+    assert (native.summary["coef"] - ref.summary["coef"]).abs().max() < 1e-4
+    assert (native.summary["se(coef)"] - ref.summary["se(coef)"]).abs().max() < 1e-4
+    assert abs(native.concordance_index_ - ref.concordance_index_) < 1e-4
+    assert "treatment_group_B" in df2.columns
+
+
+def test_concordance_index_matches_lifelines():
+    import numpy as np
+    from lifelines.utils import concordance_index as lifelines_ci
+    from theranostics.cox import concordance_index
+
+    rng = np.random.default_rng(0)
+    # integer times and scores exercise tied times, tied predictions and censoring ties
+    t = rng.integers(0, 20, 500).astype(float)
+    s = rng.integers(0, 10, 500).astype(float)
+    e = rng.random(500) < 0.6
+    assert concordance_index(t, s, e) == lifelines_ci(t, s, e)
+
+
+def test_fit_cox_batch_matches_individual_fits():
+    from theranostics.simulate import generate_cohort_batch
+    from theranostics.models import fit_cox_batch
+
+    grid = [(0.0, 0.3), (0.4, 1.0), (0.2, 0.0)]
+    stacked = pd.DataFrame(generate_cohort_batch(120, seeds=[3, 4], grid=grid))
+    for warm_start in (False, True):
+        table = fit_cox_batch(stacked, by=["replicate", "grid_index"], warm_start=warm_start)
+        assert len(table) == 2 * 3 * 5
+        assert table["converged"].all()
+        for (r, g), sub in stacked.groupby(["replicate", "grid_index"]):
+            single, _ = fit_cox(sub.drop(columns=["replicate", "grid_index", "seed"]), backend="native")
+            rows = table[(table["replicate"] == r) & (table["grid_index"] == g)].set_index("covariate")
+            assert (rows["coef"] - single.params_).abs().max() < 1e-6
+            assert (rows["se(coef)"] - single.standard_errors_).abs().max() < 1e-6
+            assert (rows["p"] - single.summary["p"]).abs().max() < 1e-6
+            assert abs(rows["concordance"].iloc[0] - single.concordance_index_) < 1e-9
+
+
+def test_fit_cox_warns_when_falling_back_to_native(monkeypatch):
+    import pytest
+    from lifelines import CoxPHFitter
+
+    def broken(self, *args, **kwargs):
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(CoxPHFitter, "fit", broken)
+    df = generate_cohort(100, seed=2)
+    with pytest.warns(RuntimeWarning, match="boom.*native backend"):
+        cph, _ = fit_cox(df)
+    assert type(cph).__module__ == "theranostics.cox"
+
+
+def test_fit_cox_lifelines_fits_without_fallback():
+    import warnings
+
+    import pytest
+    from lifelines import CoxPHFitter
+
+    df = generate_cohort(300, seed=5, censor_rate=0.2)
+    with warnings.catch_warnings():
+        warnings.filterwarnings("error", message="lifelines Cox fit failed")
+        cph, _ = fit_cox(df, backend="lifelines")
+    assert isinstance(cph, CoxPHFitter)
+
+    # lifelines' post-failure diagnostics use DataFrame.iteritems; the
+    # fallback warning must carry the real error, not an AttributeError
+    with pytest.warns(RuntimeWarning, match="ConvergenceError"):
+        fit_cox(generate_cohort(5))
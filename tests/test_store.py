@@ -0,0 +1,32 @@
+import multiprocessing
+
+import pandas as pd
+
+from theranostics.store import ResultsStore
+
+
+def _record(args):
+    path, i = args
+    ResultsStore(path).record_run("exp", params={"censor_rate": [0.0, 0.4][i % 2], "seed": i}, metrics={"m": float(i)})
+
+
+def test_runs_query_filters_and_sorts(tmp_path):
+    store = ResultsStore(str(tmp_path / "results.db"))
+    for i, (rate, coef) in enumerate([(0.4, 0.5), (0.0, 0.1), (0.4, 0.2), (0.4, None)]):
+        summary = pd.DataFrame({"coef": [coef, 1.0], "p": [0.01, 0.5]}, index=["biomarker", "age"])
+        store.record_run("exp", params={"censor_rate": rate, "seed": i, "tag": "a"}, metrics={"event_rate": 0.9}, coefficients=summary)
+    runs = store.runs(where={"censor_rate": 0.4, "tag": "a"}, order_by="coef")
+    assert list(runs["seed"]) == [2, 0, 3]  # missing coef sorts last
+    assert runs["coef"].iloc[0] == 0.2 and runs["event_rate"].eq(0.9).all()
+    assert list(store.runs(order_by="seed", descending=True, limit=2)["seed"]) == [3, 2]
+    assert list(store.coefficients(runs["run_id"].iloc[0]).index) == ["biomarker", "age"]
+
+
+def test_concurrent_writers(tmp_path):
+    path = str(tmp_path / "results.db")
+    with multiprocessing.get_context("spawn").Pool(4) as pool:
+        pool.map(_record, [(path, i) for i in range(40)])
+    store = ResultsStore(path)
+    assert len(store.runs()) == 40
+    assert len(store.runs(where={"censor_rate": 0.4})) == 20
+    assert store.sql("PRAGMA journal_mode")["journal_mode"][0] == "wal"
@@ -0,0 +1,41 @@
+from theranostics.experiments import run_experiment
+from theranostics.tracking import RunLogger
+
+
+def test_run_logger_batches_to_file_store(tmp_path):
+    from mlflow.tracking import MlflowClient
+
+    uri = (tmp_path / "mlruns").as_uri()
+    logger = RunLogger(tracking_uri=uri)
+    artifact = tmp_path / "table.csv"
+    artifact.write_text("a,b\n1,2\n")
+
+    run_id = logger.start_run("buffered", {"n": 10, "censor_rate": 0.2})
+    logger.log_metrics(run_id, {"c_index": 0.61, "skipped": None})
+    logger.log_artifact(run_id, str(artifact), artifact_path="artifacts")
+    logger.end_run(run_id)
+    logger.flush()
+    assert logger.errors == []
+
+    run = MlflowClient(tracking_uri=uri).get_run(run_id)
+    assert run.data.params == {"n": "10", "censor_rate": "0.2"}
+    assert run.data.metrics == {"c_index": 0.61}
+    assert run.info.status == "FINISHED"
+    artifacts = [a.path for a in MlflowClient(tracking_uri=uri).list_artifacts(run_id, "artifacts")]
+    assert artifacts == ["artifacts/table.csv"]
+    logger.close()
+
+
+def test_run_experiment_with_tracker_and_noop(tmp_path):
+    uri = (tmp_path / "mlruns").as_uri()
+    logger = RunLogger(tracking_uri=uri)
+    res = run_experiment(params={"n": 20}, artifacts_dir=str(tmp_path / "a"), tracking=logger, results_store=False)
+    logger.close()
+    run_dir = tmp_path / "mlruns" / logger.experiment_id("theranostics_local") / res["mlflow_run_id"]
+    assert (run_dir / "metrics" / "cox_concordance").exists()
+    assert (run_dir / "artifacts" / "artifacts" / "cox_summary.csv").exists()
+
+    noop = RunLogger(enabled=False)
+    res = run_experiment(params={"n": 20}, artifacts_dir=str(tmp_path / "b"), tracking=noop, results_store=False)
+    assert "mlflow_run_id" not in res
+    assert noop.start_run("x") is None
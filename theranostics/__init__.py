@@ -1,5 +1,45 @@
-"""Theranostics prototype package."""
-# Apply local runtime compatibility shims early on import.
-from . import _compat  # noqa: F401
+"""Theranostics prototype package.
+
+Submodules are imported on first attribute access (``theranostics.models``), so
+``import theranostics`` stays cheap and heavy dependencies (pandas, SciPy,
+lifelines, Prefect, MLflow, pydicom, spaCy) load only with the code that uses
+them. Runtime compatibility shims (`_compat`) are applied by the lifelines code
+paths that need them.
+"""
+import importlib
 
 __all__ = ["simulate", "models", "flow"]
+
+_SUBMODULES = {
+    "bootstrap",
+    "cache",
+    "cox",
+    "dicom_incremental",
+    "dicom_ingest",
+    "dicom_lake",
+    "dicom_pixels",
+    "dicom_rollup",
+    "evaluation",
+    "experiments",
+    "fhir_ingest",
+    "flow",
+    "km",
+    "manifest",
+    "models",
+    "nlp",
+    "power",
+    "profiling",
+    "simulate",
+    "store",
+    "tracking",
+}
+
+
+def __getattr__(name):
+    if name in _SUBMODULES:
+        return importlib.import_module(f".{name}", __name__)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | _SUBMODULES)
@@ -4,25 +4,40 @@ This module applies minimal, well-documented shims so third-party libraries
 that expect older/newer pandas/scipy APIs work in our local env. Prefer
 pinning proper versions in `requirements.txt` for production; this shim
 is a low-risk developer convenience.
+
+Importing this module is free; the shims are installed by `apply()`, which the
+lifelines code paths call before importing lifelines. It is idempotent.
 """
-import numpy as np
-import scipy.integrate as integrate
-import pandas as pd
+_applied = False
+
+
+def apply() -> None:
+    global _applied
+    if _applied:
+        return
+    import numpy as np
+    import pandas as pd
+
+    try:
+        import scipy.integrate as integrate
 
-# Ensure trapz exists (some SciPy builds expose it differently)
-integrate.trapz = getattr(integrate, "trapz", np.trapz)
+        # Ensure trapz exists (some SciPy builds expose it differently)
+        integrate.trapz = getattr(integrate, "trapz", np.trapz)
+    except Exception:
+        # scipy may be partially broken; models._ensure_trapz installs a shim module
+        pass
 
-# Accept and drop unexpected datetime kwarg in describe
-from pandas import DataFrame
-_orig_describe = DataFrame.describe
+    # Accept and drop unexpected datetime kwarg in describe
+    _orig_describe = pd.DataFrame.describe
 
-def _describe_compat(self, *args, **kwargs):
-    kwargs.pop("datetime_is_numeric", None)
-    return _orig_describe(self, *args, **kwargs)
+    def _describe_compat(self, *args, **kwargs):
+        kwargs.pop("datetime_is_numeric", None)
+        return _orig_describe(self, *args, **kwargs)
 
-DataFrame.describe = _describe_compat
+    pd.DataFrame.describe = _describe_compat
 
-# Provide Series.iteritems for compatibility with older code
-from pandas import Series
-if not hasattr(Series, "iteritems"):
-    Series.iteritems = Series.items
+    # Provide Series/DataFrame.iteritems (removed in pandas 2) for older lifelines
+    for cls in (pd.Series, pd.DataFrame):
+        if not hasattr(cls, "iteritems"):
+            cls.iteritems = cls.items
+    _applied = True
@@ -0,0 +1,177 @@
+"""Parallel bootstrap confidence intervals for KM median survival and Cox estimates.
+
+The cohort is encoded once into a float64 matrix ``[X | duration | event]``
+that workers attach to through `multiprocessing.shared_memory`; a task is just
+a range of resample numbers. Resample ``b`` draws its row indices from
+``np.random.default_rng([seed, b])``, so results do not depend on the number of
+workers or on how resamples are chunked.
+
+Each task fits its whole chunk of resamples at once: KM curves with
+`km.kaplan_meier_grouped` and Cox models with the batched native fitter
+(`cox.fit_cox_batch_arrays`), one group per resample.
+"""
+from __future__ import annotations
+
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+# bound on stacked rows per task (resamples x cohort size) to cap worker memory
+MAX_ROWS_PER_TASK = 2_000_000
+
+_worker_state: Dict[str, object] = {}
+
+
+class BootstrapResult:
+    """Bootstrap replicates and percentile intervals.
+
+    ``replicates`` has one row per resample and one column per statistic
+    (``km_median_survival``, ``cox_concordance`` and ``coef:<covariate>``);
+    ``estimates`` holds the full-cohort point estimates; ``summary`` has columns
+    ``estimate``, ``lower``, ``upper`` per statistic.
+    """
+
+    def __init__(self, estimates: pd.Series, replicates: pd.DataFrame, alpha: float, seed: int):
+        self.estimates = estimates
+        self.replicates = replicates
+        self.alpha = alpha
+        self.seed = seed
+        values = replicates.to_numpy()
+        with np.errstate(invalid="ignore"):
+            # order statistics rather than interpolation, so infinite medians
+            # (curve never reaches 0.5) give well-defined bounds
+            lower = np.nanquantile(values, alpha / 2, axis=0, method="lower") if len(values) else np.nan
+            upper = np.nanquantile(values, 1 - alpha / 2, axis=0, method="higher") if len(values) else np.nan
+        self.summary = pd.DataFrame(
+            {"estimate": estimates, "lower": lower, "upper": upper},
+            index=pd.Index(replicates.columns, name="statistic"),
+        )
+
+    @property
+    def n_resamples(self) -> int:
+        return len(self.replicates)
+
+    def __repr__(self) -> str:
+        return f"<BootstrapResult {self.n_resamples} resamples, {len(self.summary)} statistics>"
+
+
+def _statistics(X, durations, events, groups, n_groups):
+    """KM median, Cox concordance and coefficients for each of `n_groups` stacked datasets."""
+    from .cox import fit_cox_batch_arrays
+    from .km import kaplan_meier_grouped
+
+    curves = kaplan_meier_grouped(durations, events, groups)
+    medians = np.full(n_groups, np.nan)
+    for g, curve in curves.items():
+        medians[g] = curve.median_survival_time_
+    fit = fit_cox_batch_arrays(X, durations, events, groups)
+    return np.column_stack([medians, fit["concordance"], fit["coef"]])
+
+
+def _resample_chunk(data: np.ndarray, seed: int, start: int, stop: int) -> np.ndarray:
+    n = data.shape[0]
+    idx = np.concatenate([np.random.default_rng([seed, b]).integers(0, n, n) for b in range(start, stop)])
+    rows = data[idx]
+    groups = np.repeat(np.arange(stop - start), n)
+    return _statistics(rows[:, :-2], rows[:, -2], rows[:, -1] > 0, groups, stop - start)
+
+
+def _init_worker(name: str, shape, dtype: str) -> None:
+    shm = shared_memory.SharedMemory(name=name)
+    _worker_state["shm"] = shm  # keep the mapping alive for the worker's lifetime
+    _worker_state["data"] = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+
+
+def _worker_chunk(seed: int, start: int, stop: int) -> np.ndarray:
+    return _resample_chunk(_worker_state["data"], seed, start, stop)
+
+
+def bootstrap_arrays(
+    X,
+    durations,
+    events,
+    names: Optional[Sequence[str]] = None,
+    n_resamples: int = 1000,
+    seed: int = 0,
+    workers: Optional[int] = None,
+    alpha: float = 0.05,
+    chunk_size: Optional[int] = None,
+) -> BootstrapResult:
+    """Bootstrap a covariate matrix and (duration, event) arrays; see `bootstrap`."""
+    X = np.asarray(X, dtype=float)
+    if X.ndim == 1:
+        X = X[:, None]
+    n, p = X.shape
+    if n == 0:
+        raise ValueError("cannot bootstrap an empty cohort")
+    names = list(names) if names is not None else [f"x{i}" for i in range(p)]
+    columns = ["km_median_survival", "cox_concordance"] + [f"coef:{c}" for c in names]
+    workers = os.cpu_count() or 1 if workers is None else max(int(workers), 1)
+    if chunk_size is None:
+        chunk_size = math.ceil(n_resamples / (4 * workers)) if n_resamples else 1
+        chunk_size = max(1, min(chunk_size, MAX_ROWS_PER_TASK // n))
+    bounds = [(s, min(s + chunk_size, n_resamples)) for s in range(0, n_resamples, chunk_size)]
+
+    data = np.column_stack([X, np.asarray(durations, dtype=float), np.asarray(events, dtype=float)])
+    point = _statistics(data[:, :-2], data[:, -2], data[:, -1] > 0, np.zeros(n, dtype=np.int64), 1)[0]
+
+    if workers == 1 or len(bounds) <= 1:
+        chunks = [_resample_chunk(data, seed, s, e) for s, e in bounds]
+    else:
+        shm = shared_memory.SharedMemory(create=True, size=data.nbytes)
+        try:
+            shared = np.ndarray(data.shape, dtype=data.dtype, buffer=shm.buf)
+            shared[:] = data
+            with ProcessPoolExecutor(
+                max_workers=min(workers, len(bounds)),
+                initializer=_init_worker,
+                initargs=(shm.name, data.shape, data.dtype.str),
+            ) as pool:
+                chunks = list(pool.map(_worker_chunk, *zip(*[(seed, s, e) for s, e in bounds])))
+            del shared
+        finally:
+            shm.close()
+            shm.unlink()
+
+    values = np.vstack(chunks) if chunks else np.empty((0, len(columns)))
+    replicates = pd.DataFrame(values, columns=columns, index=pd.RangeIndex(n_resamples, name="resample"))
+    return BootstrapResult(pd.Series(point, index=columns), replicates, alpha=alpha, seed=seed)
+
+
+def bootstrap(
+    df: pd.DataFrame,
+    n_resamples: int = 1000,
+    seed: int = 0,
+    workers: Optional[int] = None,
+    alpha: float = 0.05,
+    duration_col: str = "time",
+    event_col: str = "event",
+    chunk_size: Optional[int] = None,
+) -> BootstrapResult:
+    """Percentile bootstrap CIs for KM median survival, Cox concordance and coefficients.
+
+    Resamples `df` (rows with replacement) `n_resamples` times and refits with
+    the native KM and Cox fitters across `workers` processes (default: all
+    CPUs; ``workers=1`` runs in-process). Covariates are those `models.fit_cox`
+    uses.
+    """
+    from .models import prepare_cox_frame
+
+    df2 = prepare_cox_frame(df)
+    covariates = [c for c in df2.columns if c not in [duration_col, event_col, "patient_id"]]
+    return bootstrap_arrays(
+        df2[covariates].to_numpy(dtype=float),
+        df2[duration_col].to_numpy(dtype=float),
+        df2[event_col].to_numpy(),
+        names=covariates,
+        n_resamples=n_resamples,
+        seed=seed,
+        workers=workers,
+        alpha=alpha,
+        chunk_size=chunk_size,
+    )
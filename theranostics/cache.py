@@ -0,0 +1,215 @@
+"""Content-addressed on-disk cache for cohorts and fitted model summaries.
+
+`generate_cohort` is a pure function of its parameters and the model fits are
+pure functions of their input frame, so results are stored under a SHA-256 key
+of those inputs and reused across runs:
+
+- cohorts are keyed by their generation parameters and stored as Parquet;
+- model fits are keyed by a fingerprint of the frame contents
+  (``pd.util.hash_pandas_object``) and stored as the KM survival table and Cox
+  summary (Parquet) plus a few scalars (JSON), never as pickled fitters.
+
+Each entry is a directory ``<root>/<key[:2]>/<key>/``. A hit refreshes the
+entry's mtime; when the cache grows past `max_bytes` the least recently used
+entries are removed. Writes go to a temporary directory that is renamed into
+place, so concurrent runs never read a half-written entry.
+"""
+from __future__ import annotations
+
+import hashlib
+import inspect
+import json
+import os
+import shutil
+import tempfile
+from typing import Any, Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+# bump when the cached layout or the generator/fit semantics change
+CACHE_VERSION = 1
+DEFAULT_CACHE_DIR = os.path.join(".cache", "theranostics")
+DEFAULT_MAX_BYTES = 1 << 30
+
+
+def stable_hash(*parts: Any) -> str:
+    """SHA-256 hex digest of JSON-serializable `parts` (dict keys sorted)."""
+    payload = json.dumps([CACHE_VERSION, *parts], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def frame_fingerprint(df: pd.DataFrame) -> str:
+    """SHA-256 of a frame's columns, dtypes and cell values (index included)."""
+    h = hashlib.sha256()
+    h.update(json.dumps([[str(c), str(t)] for c, t in df.dtypes.items()]).encode())
+    h.update(np.ascontiguousarray(pd.util.hash_pandas_object(df, index=True).to_numpy()).tobytes())
+    return h.hexdigest()
+
+
+class ResultCache:
+    """Size-bounded LRU cache of DataFrames and JSON scalars on local disk."""
+
+    def __init__(self, root: Optional[str] = None, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.root = root or os.environ.get("THERANOSTICS_CACHE_DIR", DEFAULT_CACHE_DIR)
+        self.max_bytes = int(max_bytes)
+        self.hits = 0
+        self.misses = 0
+
+    def _entry_dir(self, key: str) -> str:
+        return os.path.join(self.root, key[:2], key)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return ``{name: DataFrame, "meta": dict}`` for `key`, or None on a miss."""
+        path = self._entry_dir(key)
+        meta_path = os.path.join(path, "meta.json")
+        try:
+            with open(meta_path) as f:
+                meta = json.load(f)
+            entry = {name: pd.read_parquet(os.path.join(path, f"{name}.parquet")) for name in meta["frames"]}
+        except (OSError, ValueError, KeyError):
+            # missing, evicted under us, or damaged: treat as a miss
+            self.misses += 1
+            return None
+        entry["meta"] = meta.get("values", {})
+        try:
+            os.utime(meta_path)
+        except OSError:
+            pass
+        self.hits += 1
+        return entry
+
+    def put(self, key: str, frames: Optional[Dict[str, pd.DataFrame]] = None, values: Optional[Dict[str, Any]] = None) -> None:
+        """Store DataFrames (as Parquet) and JSON-serializable `values` under `key`."""
+        frames = frames or {}
+        path = self._entry_dir(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = tempfile.mkdtemp(prefix=f".{key[:8]}-", dir=os.path.dirname(path))
+        try:
+            for name, frame in frames.items():
+                frame.to_parquet(os.path.join(tmp, f"{name}.parquet"))
+            with open(os.path.join(tmp, "meta.json"), "w") as f:
+                json.dump({"frames": list(frames), "values": values or {}}, f, default=str)
+            try:
+                os.replace(tmp, path)
+            except OSError:
+                # another process stored the same key first; contents are identical
+                pass
+        finally:
+            shutil.rmtree(tmp, ignore_errors=True)
+        self.evict()
+
+    def _entries(self):
+        entries = []
+        if not os.path.isdir(self.root):
+            return entries
+        for shard in os.scandir(self.root):
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                if entry.name.startswith(".") or not entry.is_dir():
+                    continue
+                try:
+                    files = list(os.scandir(entry.path))
+                    size = sum(f.stat().st_size for f in files)
+                    used = os.stat(os.path.join(entry.path, "meta.json")).st_mtime
+                except OSError:
+                    continue
+                entries.append((used, size, entry.path))
+        return entries
+
+    def evict(self) -> int:
+        """Remove least recently used entries until the cache fits `max_bytes`; returns the count removed."""
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+            removed += 1
+        return removed
+
+    def clear(self) -> None:
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def stats(self) -> Dict[str, Any]:
+        entries = self._entries()
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": len(entries),
+            "bytes": sum(size for _, size, _ in entries),
+            "max_bytes": self.max_bytes,
+        }
+
+
+def resolve_cache(cache) -> Optional[ResultCache]:
+    """Accept ``None``/``False`` (no caching), ``True`` (default location), a directory path or a `ResultCache`."""
+    if cache is None or cache is False:
+        return None
+    if cache is True:
+        return ResultCache()
+    if isinstance(cache, ResultCache):
+        return cache
+    return ResultCache(str(cache))
+
+
+class CachedFit:
+    """Model results restored from the cache.
+
+    Mirrors the attributes the pipelines read from fitted KM / Cox models:
+    ``survival_function_``, ``median_survival_time_``, ``summary`` and
+    ``concordance_index_``.
+    """
+
+    def __init__(self, survival_function: pd.DataFrame, summary: pd.DataFrame, median: float, concordance: float):
+        self.survival_function_ = survival_function
+        self.summary = summary
+        self.median_survival_time_ = median
+        self.concordance_index_ = concordance
+
+
+def cached_cohort(cache=None, **params) -> pd.DataFrame:
+    """`simulate.generate_cohort(**params)`, served from `cache` when possible."""
+    from .simulate import generate_cohort
+
+    store = resolve_cache(cache)
+    if store is None:
+        return generate_cohort(**params)
+    # key on the full argument set, so spelling out a default hits the same entry
+    bound = inspect.signature(generate_cohort).bind(**params)
+    bound.apply_defaults()
+    key = stable_hash("cohort", dict(bound.arguments))
+    entry = store.get(key)
+    if entry is not None:
+        return entry["cohort"]
+    df = generate_cohort(**params)
+    store.put(key, {"cohort": df})
+    return df
+
+
+def cached_fit(df: pd.DataFrame, cache=None, km_backend: str = "numpy", cox_backend: str = "lifelines"):
+    """Fit KM and Cox models to `df`; returns ``(km, cph)``.
+
+    Without a cache these are the fitted models from `models.fit_km` and
+    `models.fit_cox`. With a cache both are `CachedFit` views of the stored
+    summaries, so a hit skips fitting entirely.
+    """
+    from .models import fit_cox, fit_km
+
+    store = resolve_cache(cache)
+    if store is None:
+        return fit_km(df, backend=km_backend), fit_cox(df, backend=cox_backend)[0]
+    key = stable_hash("fit", frame_fingerprint(df), km_backend, cox_backend)
+    entry = store.get(key)
+    if entry is None:
+        km = fit_km(df, backend=km_backend)
+        cph, _ = fit_cox(df, backend=cox_backend)
+        frames = {"survival_function": km.survival_function_, "summary": cph.summary}
+        values = {"median": float(km.median_survival_time_), "concordance": float(cph.concordance_index_)}
+        store.put(key, frames, values)
+        entry = dict(frames, meta=values)
+    fit = CachedFit(entry["survival_function"], entry["summary"], entry["meta"]["median"], entry["meta"]["concordance"])
+    return fit, fit
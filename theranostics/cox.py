@@ -0,0 +1,450 @@
+"""Native Cox proportional hazards fitter (NumPy backend for `models.fit_cox`).
+
+Newton-Raphson on the Efron (default) or Breslow partial likelihood. Data are
+sorted by time once; risk-set sums for every iteration are reverse cumulative
+sums over the sorted rows, so each iteration is O(n p^2) after the O(n log n)
+sort. `CoxResult.summary` has the same layout as lifelines'
+``CoxPHFitter.summary``. `fit_cox_batch_arrays` fits many stacked datasets in
+the same iterations, with batched solves over per-dataset information matrices.
+"""
+from __future__ import annotations
+
+from math import erfc, sqrt
+from statistics import NormalDist
+from typing import Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from .evaluation import concordance_index
+
+
+class CoxResult:
+    """Fitted Cox model with a lifelines-compatible ``summary``."""
+
+    def __init__(
+        self,
+        names: Sequence[str],
+        params: np.ndarray,
+        variance: np.ndarray,
+        log_likelihood: float,
+        concordance: float,
+        means: np.ndarray,
+        n_iter: int,
+        converged: bool,
+        alpha: float = 0.05,
+        baseline=None,
+    ):
+        self.alpha = alpha
+        index = pd.Index(list(names), name="covariate")
+        self.params_ = pd.Series(params, index=index, name="coef")
+        self.variance_matrix_ = pd.DataFrame(variance, index=index, columns=index)
+        with np.errstate(invalid="ignore"):
+            # a singular information matrix (e.g. a constant column) gives nan errors
+            self.standard_errors_ = pd.Series(np.sqrt(np.diag(variance)), index=index, name="se")
+        self.log_likelihood_ = float(log_likelihood)
+        self.concordance_index_ = float(concordance)
+        self.n_iter_ = n_iter
+        self.converged_ = converged
+        self._means = means
+        self.summary = _summary_frame(self.params_, self.standard_errors_, alpha)
+        # Breslow estimate at the death times, for covariates at their means
+        times, cumhaz = baseline if baseline is not None else (np.zeros(0), np.zeros(0))
+        self.baseline_cumulative_hazard_ = pd.DataFrame(
+            {"baseline cumulative hazard": cumhaz}, index=pd.Index(times, name="timeline")
+        )
+
+    def predict_log_partial_hazard(self, X) -> np.ndarray:
+        """Return ``(X - mean) @ coef`` for a frame or array with the fitted covariates."""
+        if isinstance(X, pd.DataFrame):
+            X = X[list(self.params_.index)]
+        X = np.asarray(X, dtype=float)
+        return (X - self._means) @ self.params_.to_numpy()
+
+    def predict_partial_hazard(self, X) -> np.ndarray:
+        return np.exp(self.predict_log_partial_hazard(X))
+
+    def predict_survival_function(self, X, times=None) -> pd.DataFrame:
+        """Survival curves, one column per row of `X`, indexed by `times` (default: death times)."""
+        base = self.baseline_cumulative_hazard_
+        if times is None:
+            times = base.index.to_numpy()
+        times = np.atleast_1d(np.asarray(times, dtype=float))
+        # step function: cumulative hazard at the last death time <= t
+        pos = np.searchsorted(base.index.to_numpy(), times, side="right")
+        cumhaz = np.r_[0.0, base.iloc[:, 0].to_numpy()][pos]
+        with np.errstate(over="ignore"):
+            survival = np.exp(-np.outer(cumhaz, self.predict_partial_hazard(X)))
+        return pd.DataFrame(survival, index=pd.Index(times, name="timeline"))
+
+    def __repr__(self) -> str:
+        return f"<CoxResult: {len(self.params_)} covariates, concordance={self.concordance_index_:.4f}>"
+
+
+def _summary_frame(params: pd.Series, se: pd.Series, alpha: float) -> pd.DataFrame:
+    z_crit = NormalDist().inv_cdf(1 - alpha / 2)
+    ci = f"{round(100 * (1 - alpha))}%"
+    with np.errstate(divide="ignore", invalid="ignore"):
+        z = params / se
+    p = np.array([erfc(abs(v) / sqrt(2)) if np.isfinite(v) else np.nan for v in z])
+    with np.errstate(divide="ignore"):
+        neg_log2_p = -np.log2(p)
+    lower, upper = params - z_crit * se, params + z_crit * se
+    with np.errstate(over="ignore"):
+        return pd.DataFrame(
+            {
+                "coef": params,
+                "exp(coef)": np.exp(params),
+                "se(coef)": se,
+                f"coef lower {ci}": lower,
+                f"coef upper {ci}": upper,
+                f"exp(coef) lower {ci}": np.exp(lower),
+                f"exp(coef) upper {ci}": np.exp(upper),
+                "z": z,
+                "p": p,
+                "-log2(p)": neg_log2_p,
+            },
+            index=params.index,
+        )
+
+
+def _segment_sum(a: np.ndarray, offsets: np.ndarray, counts: np.ndarray) -> np.ndarray:
+    """Sum consecutive runs of rows of `a` (run g starts at offsets[g], has counts[g] rows)."""
+    out = np.zeros((len(offsets),) + a.shape[1:])
+    if len(a):
+        out[:] = np.add.reduceat(a, np.minimum(offsets, len(a) - 1), axis=0)
+        out[counts == 0] = 0.0
+    return out
+
+
+def _segment_gram(X: np.ndarray, weights: np.ndarray, offsets: np.ndarray, counts: np.ndarray) -> np.ndarray:
+    """Per-run weighted Gram matrices ``X_g' diag(w_g) X_g``, shape ``(G, p, p)``."""
+    if len(offsets) == 1:
+        return ((X * weights[:, None]).T @ X)[None]
+    # rows are sorted by group, so each block is a contiguous slice: one small
+    # BLAS product per group beats materializing an (n, p, p) array
+    wX = X * weights[:, None]
+    out = np.empty((len(offsets), X.shape[1], X.shape[1]))
+    for g, (start, count) in enumerate(zip(offsets.tolist(), counts.tolist())):
+        out[g] = wX[start : start + count].T @ X[start : start + count]
+    return out
+
+
+class _PartialLikelihood:
+    """Efron/Breslow partial log-likelihood, gradient and information on time-sorted data.
+
+    Several independent datasets can be stacked (``groups``); each gets its own
+    coefficient vector and all are evaluated together. Risk-set sums S0(t), S1(t)
+    are reverse cumulative sums over the rows sorted by (group, time), restarted
+    at every group boundary. The second-moment term of the information matrix is
+    never formed per death: sum_k S2(t_k) c_k == X' diag(w * C) X, where C is the
+    running sum of c_k over death times, so it costs one weighted Gram product.
+    """
+
+    def __init__(self, X: np.ndarray, durations: np.ndarray, events: np.ndarray, ties: str = "efron", groups=None):
+        if ties not in ("efron", "breslow"):
+            raise ValueError(f"unknown ties method: {ties!r}")
+        n = len(durations)
+        groups = np.zeros(n, dtype=np.int64) if groups is None else np.asarray(groups, dtype=np.int64)
+        self.n_groups = int(groups.max()) + 1 if n else 1
+        order = np.lexsort((durations, groups)) if self.n_groups > 1 else np.argsort(durations, kind="stable")
+        self.X = X[order]
+        self.t = t = durations[order]
+        g = groups[order]
+        events = events[order]
+        self.row_group = g
+        self.group_counts = np.bincount(g, minlength=self.n_groups)
+        self.group_offsets = np.cumsum(self.group_counts) - self.group_counts
+
+        # first row of every run of tied times within a group; risk sets start there
+        new_run = np.r_[True, (t[1:] != t[:-1]) | (g[1:] != g[:-1])] if n else np.zeros(0, dtype=bool)
+        starts = np.flatnonzero(new_run)
+        deaths = np.add.reduceat(events.astype(np.int64), starts) if n else np.zeros(0, dtype=np.int64)
+        self.death_starts = starts[deaths > 0]
+        d = deaths[deaths > 0]
+        # death rows are sorted, so each tie group is a contiguous run of them
+        self.death_rows = np.flatnonzero(events)
+        self.death_group = g[self.death_rows]
+        self.deaths_per_group = np.bincount(self.death_group, minlength=self.n_groups)
+        self.death_offsets = np.cumsum(self.deaths_per_group) - self.deaths_per_group
+        self.X_deaths = self.X[self.death_rows]
+        self.sum_x_events = _segment_sum(self.X_deaths, self.death_offsets, self.deaths_per_group)
+        # one row per death: the tie group it belongs to
+        self.rep = np.repeat(np.arange(len(d)), d)
+
+        # Efron fractions l/d, only needed for groups with tied deaths
+        tied = d > 1
+        self.efron = ties == "efron" and bool(tied.any())
+        if self.efron:
+            offsets = np.cumsum(d) - d
+            self.frac = (np.arange(d.sum()) - np.repeat(offsets, d)) / np.repeat(d, d)
+            self.tied_groups = np.flatnonzero(tied)
+            self.tied_deaths = np.flatnonzero(np.repeat(tied, d))
+            d_tied = d[tied]
+            self.tied_offsets = np.cumsum(d_tied) - d_tied
+
+    @property
+    def n_events(self) -> np.ndarray:
+        return self.deaths_per_group
+
+    def breslow(self, beta: np.ndarray):
+        """Breslow baseline cumulative hazard at the death times (single dataset)."""
+        w = np.exp(self.X @ beta)
+        at_risk = self._reverse_cumsum(w)[self.death_starts]
+        deaths = np.bincount(self.rep, minlength=len(self.death_starts))
+        return self.t[self.death_starts], np.cumsum(deaths / at_risk)
+
+    def _reverse_cumsum(self, a: np.ndarray) -> np.ndarray:
+        rc = np.cumsum(a[::-1], axis=0)[::-1]
+        if self.n_groups > 1:
+            # restart the sum at every group boundary
+            ends = self.group_offsets + self.group_counts
+            tail = np.concatenate([rc, np.zeros((1,) + a.shape[1:])])[ends]
+            rc = rc - tail[self.row_group]
+        return rc
+
+    def __call__(self, beta: np.ndarray):
+        """Evaluate at ``beta`` of shape ``(G, p)``; returns ``(loglik[G], grad[G, p], info[G, p, p])``."""
+        X, rep, g = self.X, self.rep, self.row_group
+        eta = np.einsum("ij,ij->i", X, beta[g]) if self.n_groups > 1 else X @ beta[0]
+        shift = np.full(self.n_groups, -np.inf)
+        np.maximum.at(shift, g, eta)
+        shift[~np.isfinite(shift)] = 0.0
+        w = np.exp(eta - shift[g])
+        wX = w[:, None] * X
+
+        # risk-set sums at each death time, one row per death
+        phi0 = self._reverse_cumsum(w)[self.death_starts][rep]
+        phi1 = self._reverse_cumsum(wX)[self.death_starts][rep]
+        if self.efron:
+            # remove the fraction l/d of the tied deaths' own weight
+            rows = self.death_rows[self.tied_deaths]
+            A0 = np.zeros(len(self.death_starts))
+            A1 = np.zeros((len(self.death_starts), X.shape[1]))
+            A0[self.tied_groups] = np.add.reduceat(w[rows], self.tied_offsets)
+            A1[self.tied_groups] = np.add.reduceat(wX[rows], self.tied_offsets)
+            phi0 = phi0 - self.frac * A0[rep]
+            phi1 = phi1 - self.frac[:, None] * A1[rep]
+        inv0 = 1.0 / phi0
+        r1 = phi1 * inv0[:, None]
+
+        dg, dcounts, doffsets = self.death_group, self.deaths_per_group, self.death_offsets
+        loglik = (
+            np.bincount(dg, weights=eta[self.death_rows] + np.log(inv0), minlength=self.n_groups)
+            - shift * dcounts
+        )
+        grad = self.sum_x_events - _segment_sum(r1, doffsets, dcounts)
+
+        # sum over deaths of S2 / phi0, via the running sum of 1/phi0 per row
+        c = np.cumsum(np.bincount(self.death_starts[rep], weights=inv0, minlength=len(w)))
+        if self.n_groups > 1:
+            c -= np.r_[0.0, c][self.group_offsets][g]
+        info = _segment_gram(X, w * c, self.group_offsets, self.group_counts)
+        info -= _segment_gram(r1, np.ones(len(r1)), doffsets, dcounts)
+        if self.efron:
+            frac_w = np.bincount(rep, weights=self.frac * inv0, minlength=len(self.death_starts))[rep]
+            info -= _segment_gram(self.X_deaths, w[self.death_rows] * frac_w, doffsets, dcounts)
+        return loglik, grad, info
+
+
+def _solve(info: np.ndarray, grad: np.ndarray) -> np.ndarray:
+    try:
+        return np.linalg.solve(info, grad[..., None])[..., 0]
+    except np.linalg.LinAlgError:
+        # a singular block (e.g. a constant covariate): least-squares step instead
+        return (np.linalg.pinv(info) @ grad[..., None])[..., 0]
+
+
+def _newton(lik: _PartialLikelihood, init: np.ndarray, penalizer: float, max_iter: int, tol: float):
+    """Newton-Raphson with step-halving on every stacked dataset at once."""
+    beta = np.array(init, dtype=float)
+    n_groups, p = beta.shape
+
+    def evaluate(b):
+        ll, g, info = lik(b)
+        if penalizer:
+            ll = ll - 0.5 * penalizer * (b * b).sum(axis=1)
+            g = g - penalizer * b
+            info = info + penalizer * np.eye(p)
+        return ll, g, info
+
+    ll, grad, info = evaluate(beta)
+    converged = np.zeros(n_groups, dtype=bool)
+    n_iter = np.zeros(n_groups, dtype=np.int64)
+    for _ in range(max_iter):
+        active = ~converged
+        if not active.any():
+            break
+        delta = np.zeros_like(beta)
+        delta[active] = _solve(info[active], grad[active])
+        step = np.ones(n_groups)
+        while True:
+            candidate = beta + step[:, None] * delta
+            new_ll, new_grad, new_info = evaluate(candidate)
+            # step-halving keeps every iteration an ascent step
+            bad = active & ~(np.isfinite(new_ll) & (new_ll >= ll - 1e-12 * np.abs(ll))) & (step >= 1e-8)
+            if not bad.any():
+                break
+            step[bad] /= 2
+        change = np.abs(new_ll - ll)
+        small_step = np.abs(step[:, None] * delta).max(axis=1, initial=0.0) < tol
+        beta, ll, grad, info = candidate, new_ll, new_grad, new_info
+        n_iter += active
+        converged |= active & (small_step | (change < tol * (np.abs(ll) + tol)))
+    return beta, ll, info, n_iter, converged
+
+
+def _variance(info: np.ndarray) -> np.ndarray:
+    try:
+        return np.linalg.inv(info)
+    except np.linalg.LinAlgError:
+        return np.linalg.pinv(info)
+
+
+def fit_cox_arrays(
+    X,
+    durations,
+    events,
+    names: Optional[Sequence[str]] = None,
+    ties: str = "efron",
+    penalizer: float = 0.0,
+    alpha: float = 0.05,
+    max_iter: int = 50,
+    tol: float = 1e-9,
+    init: Optional[np.ndarray] = None,
+) -> CoxResult:
+    """Fit a Cox model to a covariate matrix and (duration, event) arrays."""
+    X = np.asarray(X, dtype=float)
+    if X.ndim == 1:
+        X = X[:, None]
+    durations = np.asarray(durations, dtype=float)
+    events = np.asarray(events).astype(bool)
+    n, p = X.shape
+    names = list(names) if names is not None else [f"x{i}" for i in range(p)]
+
+    # centering leaves coefficients unchanged and keeps exp(X @ beta) well scaled
+    means = X.mean(axis=0) if n else np.zeros(p)
+    Xc = X - means
+    lik = _PartialLikelihood(Xc, durations, events, ties=ties)
+    if lik.n_events[0] == 0:
+        # nothing to estimate; report a flat model instead of failing
+        variance = np.full((p, p), np.nan)
+        return CoxResult(names, np.zeros(p), variance, 0.0, 0.5, means, 0, False, alpha=alpha)
+
+    start = np.zeros((1, p)) if init is None else np.asarray(init, dtype=float).reshape(1, p)
+    beta, ll, info, n_iter, converged = _newton(lik, start, penalizer, max_iter, tol)
+    beta = beta[0]
+    concordance = concordance_index(durations, -(Xc @ beta), events)
+    with np.errstate(over="ignore"):
+        baseline = lik.breslow(beta)
+    return CoxResult(
+        names,
+        beta,
+        _variance(info)[0],
+        ll[0],
+        concordance,
+        means,
+        int(n_iter[0]),
+        bool(converged[0]),
+        alpha=alpha,
+        baseline=baseline,
+    )
+
+
+def fit_cox_batch_arrays(
+    X,
+    durations,
+    events,
+    groups,
+    ties: str = "efron",
+    penalizer: float = 0.0,
+    max_iter: int = 50,
+    tol: float = 1e-9,
+    init: Optional[np.ndarray] = None,
+    warm_start: bool = False,
+):
+    """Fit one Cox model per dataset of a stacked design, all in the same Newton iterations.
+
+    `groups` holds dataset codes ``0..G-1``. Returns a dict of arrays: ``coef`` and
+    ``se`` ``(G, p)``, ``concordance``, ``log_likelihood``, ``n_iter`` and
+    ``converged`` ``(G,)``.
+
+    With `warm_start`, even-numbered datasets are fitted first (from `init`, or
+    zero) and every odd-numbered dataset then starts from the coefficients of its
+    preceding neighbour -- useful when datasets are adjacent grid points.
+    """
+    X = np.asarray(X, dtype=float)
+    if X.ndim == 1:
+        X = X[:, None]
+    durations = np.asarray(durations, dtype=float)
+    events = np.asarray(events).astype(bool)
+    groups = np.asarray(groups, dtype=np.int64)
+    n_groups = int(groups.max()) + 1 if len(groups) else 0
+    p = X.shape[1]
+
+    # per-dataset centering, as in the single fit
+    counts = np.maximum(np.bincount(groups, minlength=n_groups), 1)
+    means = np.stack([np.bincount(groups, weights=X[:, j], minlength=n_groups) for j in range(p)], axis=1)
+    means /= counts[:, None]
+    Xc = X - means[groups]
+
+    start = np.zeros((n_groups, p)) if init is None else np.broadcast_to(np.asarray(init, dtype=float), (n_groups, p)).copy()
+    coef = np.zeros((n_groups, p))
+    info = np.full((n_groups, p, p), np.nan)
+    ll = np.zeros(n_groups)
+    n_iter = np.zeros(n_groups, dtype=np.int64)
+    converged = np.zeros(n_groups, dtype=bool)
+
+    phases = [np.arange(0, n_groups, 2), np.arange(1, n_groups, 2)] if warm_start else [np.arange(n_groups)]
+    for phase, members in enumerate(phases):
+        if not len(members):
+            continue
+        if phase == 1:
+            start[members] = coef[members - 1]
+        # refit only the datasets of this phase, renumbered 0..len(members)-1
+        remap = np.full(n_groups, -1)
+        remap[members] = np.arange(len(members))
+        rows = remap[groups] >= 0
+        lik = _PartialLikelihood(Xc[rows], durations[rows], events[rows], ties=ties, groups=remap[groups[rows]])
+        has_events = lik.n_events > 0
+        b, l, i, it, conv = _newton(lik, start[members], penalizer, max_iter, tol)
+        coef[members] = np.where(has_events[:, None], b, 0.0)
+        ll[members], info[members], n_iter[members], converged[members] = l, i, it, conv & has_events
+
+    variance = np.full_like(info, np.nan)
+    ok = np.isfinite(info).all(axis=(1, 2))
+    if ok.any():
+        variance[ok] = _variance(info[ok])
+    with np.errstate(invalid="ignore"):
+        se = np.sqrt(np.diagonal(variance, axis1=1, axis2=2))
+    # one stable sort by dataset, then contiguous slices (rows keep their order)
+    order = np.argsort(groups, kind="stable")
+    bounds = np.searchsorted(groups[order], np.arange(n_groups + 1))
+    concordance = np.array(
+        [
+            concordance_index(durations[rows], -(Xc[rows] @ coef[k]), events[rows])
+            for k, rows in ((k, order[bounds[k] : bounds[k + 1]]) for k in range(n_groups))
+        ]
+    )
+    return {
+        "coef": coef,
+        "se": se,
+        "concordance": concordance,
+        "log_likelihood": ll,
+        "n_iter": n_iter,
+        "converged": converged,
+    }
+
+
+def fit_cox_frame(
+    df: pd.DataFrame,
+    duration_col: str = "time",
+    event_col: str = "event",
+    covariates: Optional[Sequence[str]] = None,
+    **kwargs,
+) -> CoxResult:
+    """Fit a Cox model to the numeric `covariates` of `df` (default: every other column)."""
+    if covariates is None:
+        covariates = [c for c in df.columns if c not in (duration_col, event_col)]
+    X = df[list(covariates)].to_numpy(dtype=float)
+    return fit_cox_arrays(X, df[duration_col].to_numpy(), df[event_col].to_numpy(), names=covariates, **kwargs)
@@ -0,0 +1,410 @@
+"""Incremental DICOM ingest into a partitioned Parquet dataset.
+
+`ingest_incremental` keeps a manifest of every file it has seen -- path, size,
+mtime and, with ``hash_files=True``, a SHA-256 of the content -- in a SQLite
+database next to the dataset. Each run walks the tree and stats every file,
+but parses only files that are new or changed since the last run, and writes
+their metadata as one new Parquet partition::
+
+    dataset_dir/
+        _manifest.db                        # files + runs tables (SQLite, WAL)
+        part-20250101T020000-1a2b3c4d.parquet
+        part-20250102T020000-5e6f7a8b.parquet
+
+Files that disappeared are marked ``deleted`` in the manifest (with the run
+that noticed). The manifest also records which partition holds the current
+row of each file, so `read_dataset` returns exactly one row per live file:
+rows of changed or deleted files left behind in older partitions are skipped.
+`compact` (or ``merge=True``) rewrites the live rows into a single partition
+and removes the old ones.
+
+A run holds the manifest's write lock from start to finish and commits only
+after its partition is in place; a crashed run leaves at most an orphan
+partition that no manifest row points to (the next run re-parses its files,
+and `compact` deletes it).
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import sqlite3
+import tempfile
+import time
+import uuid
+from typing import Dict, Iterator, List, Optional
+
+import pandas as pd
+
+from .dicom_ingest import METADATA_COLUMNS, _walk_files, extract_all, write_metadata
+
+MANIFEST_NAME = "_manifest.db"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    sha256 TEXT,
+    status TEXT NOT NULL,        -- present | unreadable | deleted
+    skip_reason TEXT,            -- why an unreadable file was skipped (dicom_ingest.SKIP_*)
+    partition TEXT,              -- partition holding the current row (present files)
+    first_run TEXT NOT NULL,
+    last_run TEXT NOT NULL,      -- run that last parsed the file or marked it deleted
+    seen_run TEXT NOT NULL       -- last run that found the file on disk
+);
+CREATE INDEX IF NOT EXISTS files_status ON files (status, seen_run);
+CREATE INDEX IF NOT EXISTS files_partition ON files (partition);
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    started REAL NOT NULL,
+    finished REAL,
+    partition TEXT,
+    new INTEGER,
+    changed INTEGER,
+    unchanged INTEGER,
+    deleted INTEGER,
+    unreadable INTEGER,
+    rows INTEGER
+);
+"""
+
+_UPSERT = """
+INSERT INTO files (path, size, mtime_ns, sha256, status, skip_reason, partition, first_run, last_run, seen_run)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (path) DO UPDATE SET
+    size = excluded.size, mtime_ns = excluded.mtime_ns, sha256 = excluded.sha256,
+    status = excluded.status, skip_reason = excluded.skip_reason, partition = excluded.partition,
+    last_run = excluded.last_run, seen_run = excluded.seen_run
+"""
+
+_LOOKUP_CHUNK = 500  # paths per manifest lookup (below SQLite's bound-parameter limit)
+
+
+def file_digest(path: str, block_size: int = 1 << 20) -> str:
+    """SHA-256 of the file content, read `block_size` bytes at a time."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _new_run_id() -> str:
+    # sorts chronologically, so partition names do too
+    return f"{time.strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:8]}"
+
+
+def _connect(path: str, timeout: float) -> sqlite3.Connection:
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    conn = sqlite3.connect(path, timeout=timeout, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(_SCHEMA)
+    return conn
+
+
+def _manifest_path(dataset_dir: str, manifest_path: Optional[str]) -> str:
+    return manifest_path or os.path.join(dataset_dir, MANIFEST_NAME)
+
+
+def _check_root(conn: sqlite3.Connection, directory: str) -> None:
+    """Tie a manifest to one source directory; a different tree would look like mass deletions."""
+    root = os.path.abspath(directory)
+    row = conn.execute("SELECT value FROM meta WHERE key = 'directory'").fetchone()
+    if row is None:
+        conn.execute("INSERT INTO meta VALUES ('directory', ?)", (root,))
+    elif row[0] != root:
+        raise ValueError(f"manifest belongs to {row[0]!r}, not {root!r}; use a separate dataset directory")
+
+
+def _scan(conn, directory: str, run_id: str, hash_files: bool, spool, counts: Dict[str, int]) -> None:
+    """Stat every file under `directory` against the manifest.
+
+    Unchanged files only get ``seen_run`` bumped; new and changed files are
+    written to `spool` (one JSON record per line) for parsing.
+    """
+    def flush(paths: List[str]) -> None:
+        stats = []
+        for path in paths:
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:  # removed while walking
+                continue
+            stats.append((path, st.st_size, st.st_mtime_ns))
+        if not stats:
+            return
+        marks = ",".join("?" * len(stats))
+        known = {
+            row[0]: row
+            for row in conn.execute(
+                f"SELECT path, size, mtime_ns, sha256, status FROM files WHERE path IN ({marks})",
+                [s[0] for s in stats],
+            )
+        }
+        seen, rehashed = [], []
+        for path, size, mtime_ns in stats:
+            prev = known.get(path)
+            if prev is not None and prev[4] != "deleted":
+                if prev[1] == size and prev[2] == mtime_ns:
+                    seen.append((run_id, path))
+                    counts["unchanged"] += 1
+                    continue
+                digest = file_digest(path) if hash_files else None
+                if digest is not None and digest == prev[3]:
+                    # touched (copied, restored) but not modified: no need to re-parse
+                    rehashed.append((size, mtime_ns, run_id, path))
+                    counts["unchanged"] += 1
+                    continue
+                seen.append((run_id, path))  # keep it out of the deletion sweep until it is re-parsed
+                kind = "changed"
+            else:
+                digest = file_digest(path) if hash_files else None
+                kind = "new"
+            counts[kind] += 1
+            spool.write(json.dumps([path, size, mtime_ns, digest, kind]) + "\n")
+        conn.executemany("UPDATE files SET seen_run = ? WHERE path = ?", seen)
+        conn.executemany("UPDATE files SET size = ?, mtime_ns = ?, seen_run = ? WHERE path = ?", rehashed)
+
+    chunk: List[str] = []
+    for path in _walk_files(directory):
+        chunk.append(path)
+        if len(chunk) >= _LOOKUP_CHUNK:
+            flush(chunk)
+            chunk = []
+    flush(chunk)
+
+
+def _spooled(spool) -> Iterator[list]:
+    spool.seek(0)
+    for line in spool:
+        yield json.loads(line)
+
+
+def ingest_incremental(
+    directory: str,
+    dataset_dir: str,
+    manifest_path: Optional[str] = None,
+    hash_files: bool = False,
+    merge: bool = False,
+    workers: int = 1,
+    executor: str = "thread",
+    batch_size: int = 10_000,
+    row_group_size: Optional[int] = None,
+    compression: Optional[str] = "snappy",
+    timeout: float = 60.0,
+    profile=None,
+) -> Dict[str, object]:
+    """Ingest only the files under `directory` that are new or changed since the last run.
+
+    Metadata of the parsed files is written to a new partition
+    ``part-<run_id>.parquet`` in `dataset_dir` (no partition when nothing
+    changed); the manifest lives at `manifest_path` (default
+    ``<dataset_dir>/_manifest.db``). A file counts as changed when its size or
+    mtime differs from the manifest; with `hash_files` its content hash is
+    also recorded and compared, so files whose mtime moved but whose bytes did
+    not are not re-parsed. Files that vanished are marked deleted. ``merge``
+    compacts the dataset into one partition afterwards (see `compact`).
+
+    `workers`, `executor`, `batch_size`, `row_group_size` and `compression`
+    are as for `dicom_ingest.ingest_directory`. A second run on the same
+    manifest waits up to `timeout` seconds for the first to finish.
+
+    Returns a summary: ``run_id``, ``partition`` (path or None), the file
+    counts ``new``, ``changed``, ``unchanged``, ``deleted`` and ``unreadable``,
+    and ``rows`` written.
+    """
+    from .profiling import get_profiler
+
+    prof = get_profiler(profile)
+    os.makedirs(dataset_dir, exist_ok=True)
+    run_id = _new_run_id()
+    partition = f"part-{run_id}.parquet"
+    partition_path = os.path.join(dataset_dir, partition)
+    counts = {"new": 0, "changed": 0, "unchanged": 0, "deleted": 0, "unreadable": 0}
+    rows = 0
+
+    conn = _connect(_manifest_path(dataset_dir, manifest_path), timeout)
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            _check_root(conn, directory)
+            started = time.time()
+            with tempfile.TemporaryFile("w+", encoding="utf-8") as spool:
+                with prof.stage("scan"):
+                    _scan(conn, directory, run_id, hash_files, spool, counts)
+                    counts["deleted"] = conn.execute(
+                        "UPDATE files SET status = 'deleted', partition = NULL, last_run = ? "
+                        "WHERE status != 'deleted' AND seen_run != ?",
+                        (run_id, run_id),
+                    ).rowcount
+                if counts["new"] + counts["changed"]:
+                    updates: list = []
+
+                    def parsed() -> Iterator[dict]:
+                        results = extract_all(_spooled(spool), workers, executor, key=lambda record: record[0])
+                        try:
+                            for (path, size, mtime_ns, digest, kind), meta, reason in results:
+                                if meta is None:
+                                    counts["unreadable"] += 1
+                                    record = (path, size, mtime_ns, digest, "unreadable", reason, None)
+                                else:
+                                    record = (path, size, mtime_ns, digest, "present", None, partition)
+                                updates.append(record + (run_id, run_id, run_id))
+                                if len(updates) >= 1000:
+                                    conn.executemany(_UPSERT, updates)
+                                    updates.clear()
+                                if meta is not None:
+                                    yield meta
+                        finally:
+                            results.close()
+
+                    rows = write_metadata(
+                        parsed(),
+                        partition_path,
+                        to_parquet=True,
+                        batch_size=batch_size,
+                        row_group_size=row_group_size,
+                        compression=compression,
+                        profile=prof,
+                    )
+                    conn.executemany(_UPSERT, updates)
+                    if not rows:
+                        os.remove(partition_path)
+            conn.execute(
+                "INSERT INTO runs VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    run_id,
+                    started,
+                    time.time(),
+                    partition if rows else None,
+                    counts["new"],
+                    counts["changed"],
+                    counts["unchanged"],
+                    counts["deleted"],
+                    counts["unreadable"],
+                    rows,
+                ),
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+    finally:
+        conn.close()
+
+    summary: Dict[str, object] = {"run_id": run_id, "partition": partition_path if rows else None, **counts, "rows": rows}
+    if merge:
+        with prof.stage("compact"):
+            summary["partition"] = compact(dataset_dir, manifest_path, timeout=timeout)
+    return summary
+
+
+def _live_files(conn) -> pd.DataFrame:
+    return pd.read_sql_query(
+        "SELECT path AS file_path, partition FROM files WHERE status = 'present' ORDER BY partition", conn
+    )
+
+
+def read_dataset(dataset_dir: str, manifest_path: Optional[str] = None, columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """Current metadata: one row per file the manifest lists as present, oldest partition first."""
+    import pyarrow.parquet as pq
+
+    conn = _connect(_manifest_path(dataset_dir, manifest_path), 60.0)
+    try:
+        live = _live_files(conn)
+    finally:
+        conn.close()
+    wanted = list(columns or METADATA_COLUMNS)
+    read_columns = wanted if "file_path" in wanted else wanted + ["file_path"]
+    frames = []
+    for partition, files in live.groupby("partition", sort=True):
+        frame = pq.read_table(os.path.join(dataset_dir, partition), columns=read_columns).to_pandas()
+        frames.append(frame[frame["file_path"].isin(files["file_path"])][wanted])
+    if not frames:
+        return pd.DataFrame({c: pd.Series(dtype=object) for c in wanted})
+    return pd.concat(frames, ignore_index=True)
+
+
+def compact(dataset_dir: str, manifest_path: Optional[str] = None, timeout: float = 60.0, batch_size: int = 10_000) -> Optional[str]:
+    """Merge the live rows of every partition into one new partition and delete the rest.
+
+    Partition files no manifest row points to (superseded, or left by a
+    crashed run) are removed too. Returns the new partition's path, or None
+    when the dataset is empty.
+    """
+    import pyarrow.parquet as pq
+
+    conn = _connect(_manifest_path(dataset_dir, manifest_path), timeout)
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            live = _live_files(conn)
+            partition = None
+            if len(live):
+                partition = f"part-{_new_run_id()}.parquet"
+
+                def rows() -> Iterator[dict]:
+                    for source, files in live.groupby("partition", sort=True):
+                        keep = set(files["file_path"])
+                        for batch in pq.ParquetFile(os.path.join(dataset_dir, source)).iter_batches(batch_size=batch_size):
+                            for row in batch.to_pylist():
+                                if row["file_path"] in keep:
+                                    yield row
+
+                write_metadata(rows(), os.path.join(dataset_dir, partition), to_parquet=True, batch_size=batch_size)
+                conn.execute("UPDATE files SET partition = ? WHERE status = 'present'", (partition,))
+            # listed under the lock: partitions of runs that start after the commit are not touched
+            stale = [
+                name
+                for name in os.listdir(dataset_dir)
+                if name.startswith("part-") and name.endswith(".parquet") and name != partition
+            ]
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+    finally:
+        conn.close()
+    for name in stale:
+        os.remove(os.path.join(dataset_dir, name))
+    return os.path.join(dataset_dir, partition) if partition else None
+
+
+def deleted_files(dataset_dir: str, manifest_path: Optional[str] = None, run_id: Optional[str] = None) -> pd.DataFrame:
+    """Files marked deleted (by run `run_id`, or by any run), with the run that noticed."""
+    conn = _connect(_manifest_path(dataset_dir, manifest_path), 60.0)
+    try:
+        query = "SELECT path AS file_path, last_run AS deleted_run FROM files WHERE status = 'deleted'"
+        params: tuple = ()
+        if run_id is not None:
+            query += " AND last_run = ?"
+            params = (run_id,)
+        return pd.read_sql_query(query + " ORDER BY path", conn, params=params)
+    finally:
+        conn.close()
+
+
+def skipped_files(dataset_dir: str, manifest_path: Optional[str] = None) -> pd.DataFrame:
+    """Files that were found but not ingested, with the reason (see `dicom_ingest.read_metadata`)."""
+    conn = _connect(_manifest_path(dataset_dir, manifest_path), 60.0)
+    try:
+        return pd.read_sql_query(
+            "SELECT path AS file_path, skip_reason, last_run FROM files WHERE status = 'unreadable' ORDER BY path", conn
+        )
+    finally:
+        conn.close()
+
+
+def runs(dataset_dir: str, manifest_path: Optional[str] = None) -> pd.DataFrame:
+    """One row per incremental run: counts, rows written and partition."""
+    conn = _connect(_manifest_path(dataset_dir, manifest_path), 60.0)
+    try:
+        return pd.read_sql_query("SELECT * FROM runs ORDER BY started", conn)
+    finally:
+        conn.close()
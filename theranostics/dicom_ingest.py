@@ -1,88 +1,477 @@
 """Minimal DICOM ingestion utilities."""
 from __future__ import annotations
 
-from typing import List
+from typing import Callable, Iterable, Iterator, List, Optional, Sequence, Tuple
+import importlib
 import os
 import csv
-import pandas as pd
+import queue
+import threading
+from collections import deque
+from functools import lru_cache
 
-try:
-    import pydicom
-    from pydicom.dataset import Dataset
-except Exception:  # pragma: no cover - optional dependency
-    pydicom = None
+# pydicom and pandas are imported on first use so CLIs importing this module
+# start quickly.
+pydicom = None
 
 
-def extract_metadata(dicom_path: str) -> dict:
-    """Extract a small set of metadata from a DICOM file.
+def _pydicom():
+    global pydicom
+    if pydicom is None:
+        try:
+            pydicom = importlib.import_module("pydicom")
+            importlib.import_module("pydicom.errors")
+        except Exception:  # pragma: no cover - optional dependency
+            pydicom = None
+    return pydicom
+
+
+# DICOM keyword of each metadata column
+METADATA_TAGS = {
+    "study_instance_uid": "StudyInstanceUID",
+    "series_instance_uid": "SeriesInstanceUID",
+    "sop_instance_uid": "SOPInstanceUID",
+    "patient_id": "PatientID",
+    "modality": "Modality",
+    "study_date": "StudyDate",
+    "manufacturer": "Manufacturer",
+}
+
+# columns of the ingest output, in order (the keys `extract_metadata` returns)
+METADATA_COLUMNS = tuple(METADATA_TAGS) + ("file_path",)
+
+# reasons `read_metadata` gives for skipping a file
+SKIP_MISSING = "missing"  # vanished or could not be opened
+SKIP_TOO_SHORT = "too_short"  # shorter than a preamble and a tag
+SKIP_NOT_DICOM = "not_dicom"  # no "DICM" magic and does not start like a bare dataset
+SKIP_BAD_HEADER = "bad_header"  # looked like DICOM but the header did not parse
 
-    Returns a dict with keys: StudyInstanceUID, SeriesInstanceUID, SOPInstanceUID,
-    PatientID, Modality, StudyDate, Manufacturer.
+_PREAMBLE = 128
+_MAGIC = b"DICM"
+# group 0002 or 0008 (little or big endian): a dataset written without preamble, read with force=True
+_BARE_DATASET_GROUPS = (b"\x02\x00", b"\x08\x00", b"\x00\x02", b"\x00\x08")
+
+
+def sniff_dicom(head: bytes) -> Tuple[Optional[str], bool]:
+    """Classify a file from its first 132 bytes: ``(skip_reason or None, needs_force)``.
+
+    Standard files carry a 128-byte preamble and the ``DICM`` magic. Files
+    without one are accepted only when they start with a group 0002/0008 tag
+    (a bare dataset, which pydicom reads with ``force=True``); everything else
+    is rejected without parsing.
     """
-    if pydicom is None:
+    if head[_PREAMBLE : _PREAMBLE + 4] == _MAGIC:
+        return None, False
+    if len(head) < 8:
+        return SKIP_TOO_SHORT, False
+    if head[:2] in _BARE_DATASET_GROUPS:
+        return None, True
+    return SKIP_NOT_DICOM, False
+
+
+@lru_cache(maxsize=None)
+def _tag_plan(keywords: Tuple[str, ...]):
+    """(tags to parse, stop condition) for `keywords`; elements are sorted, so reading stops past the last one."""
+    from pydicom.datadict import tag_for_keyword
+    from pydicom.tag import Tag
+
+    tags = [Tag(tag_for_keyword(k)) for k in keywords]
+    last = max(tags)
+    return tags, lambda tag, vr, length: tag > last
+
+
+def read_metadata(dicom_path: str, tags: Optional[dict] = None) -> Tuple[Optional[dict], Optional[str]]:
+    """``(metadata, None)`` for a DICOM file, ``(None, skip_reason)`` for anything else.
+
+    The file is opened once: `sniff_dicom` rejects non-DICOM files from the
+    first 132 bytes, and the header is parsed only up to the last element in
+    `tags` (column -> DICOM keyword, default `METADATA_TAGS`), decoding just
+    those elements. Bad input files never raise: any parse failure, or a
+    header holding none of the requested elements, is ``SKIP_BAD_HEADER``;
+    the other reasons are the remaining ``SKIP_*`` constants.
+    """
+    if _pydicom() is None:
         raise RuntimeError("pydicom is required for DICOM ingestion")
+    from pydicom.filereader import read_partial
+
+    tags = METADATA_TAGS if tags is None else tags
+    specific_tags, stop_when = _tag_plan(tuple(tags.values()))
     try:
-        ds = pydicom.dcmread(dicom_path, stop_before_pixels=True)
-    except pydicom.errors.InvalidDicomError:
-        # Try to read non-conformant files
-        ds = pydicom.dcmread(dicom_path, stop_before_pixels=True, force=True)
-    return {
-        "study_instance_uid": getattr(ds, "StudyInstanceUID", ""),
-        "series_instance_uid": getattr(ds, "SeriesInstanceUID", ""),
-        "sop_instance_uid": getattr(ds, "SOPInstanceUID", ""),
-        "patient_id": getattr(ds, "PatientID", ""),
-        "modality": getattr(ds, "Modality", ""),
-        "study_date": getattr(ds, "StudyDate", ""),
-        "manufacturer": getattr(ds, "Manufacturer", ""),
-        "file_path": dicom_path,
-    }
-
-
-def ingest_directory(directory: str, out_path: str, to_parquet: bool = False) -> int:
-    """Walk `directory`, extract DICOM metadata, and write to CSV or Parquet file `out_path`.
-    If `to_parquet` is True, writes a parquet file (requires pyarrow or fastparquet).
-    Returns number of files processed.
+        f = open(dicom_path, "rb")
+    except OSError:
+        return None, SKIP_MISSING
+    with f:
+        head = f.read(_PREAMBLE + 4)
+        reason, force = sniff_dicom(head)
+        if reason is not None:
+            return None, reason
+        f.seek(0)
+        try:
+            ds = read_partial(f, stop_when=stop_when, force=force, specific_tags=specific_tags)
+            if not any(tag in ds for tag in specific_tags):
+                return None, SKIP_BAD_HEADER
+            # values are decoded lazily, so a bad VR or length only fails here
+            meta = {column: getattr(ds, keyword, "") for column, keyword in tags.items()}
+        except Exception:
+            # pydicom has no common base class for corrupt input; one
+            # unreadable file must not abort the ingest
+            return None, SKIP_BAD_HEADER
+    meta["file_path"] = dicom_path
+    return meta, None
+
+
+def extract_metadata(dicom_path: str, tags: Optional[dict] = None) -> dict:
+    """Extract a small set of metadata from a DICOM file.
+
+    Returns a dict with keys `METADATA_COLUMNS` (or those of `tags`, plus
+    ``file_path``); raises ``pydicom.errors.InvalidDicomError`` for files
+    `read_metadata` skips.
     """
-    rows: List[dict] = []
+    meta, reason = read_metadata(dicom_path, tags)
+    if meta is None:
+        raise pydicom.errors.InvalidDicomError(f"{dicom_path}: skipped ({reason})")
+    return meta
+
+
+def _walk_files(directory: str) -> Iterator[str]:
+    """Every file under `directory`, in `os.walk` order (the order of the ingest output)."""
     for root, _, files in os.walk(directory):
         for fn in files:
-            path = os.path.join(root, fn)
+            yield os.path.join(root, fn)
+
+
+def _extract_chunk(paths: List[str]) -> List[Tuple[Optional[dict], Optional[str]]]:
+    return [read_metadata(path) for path in paths]
+
+
+_WALK_DONE = object()
+
+
+def _identity(item):
+    return item
+
+
+def _iter_extracted(
+    items: Iterable, workers: int, executor: str, chunk_size: int, key: Callable = _identity
+) -> Iterator[Tuple[object, Optional[dict], Optional[str]]]:
+    """``(item, *read_metadata(key(item)))`` for each of `items`, in order, parsed on a pool.
+
+    A producer thread pulls `items` (typically a directory walk) into a bounded
+    queue of chunks while the pool parses headers, so directory listing (slow
+    on network storage) overlaps with parsing. At most ``2 * workers`` chunks
+    are in flight and results are consumed in submission order, so memory
+    stays bounded and the output order matches the input.
+    """
+    from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+    chunks: "queue.Queue" = queue.Queue(maxsize=4 * workers)
+    stop = threading.Event()
+    failure: List[BaseException] = []
+
+    def put(item) -> bool:
+        while not stop.is_set():
             try:
-                meta = extract_metadata(path)
-                rows.append(meta)
-            except Exception:
-                # skip files that are not DICOM or can't be read
+                chunks.put(item, timeout=0.1)
+                return True
+            except queue.Full:
                 continue
+        return False
 
-    if not rows:
-        # write an empty file of the chosen format for downstream tooling
-        df = pd.DataFrame()
-        out_dir = os.path.dirname(out_path)
-        if out_dir:
-            os.makedirs(out_dir, exist_ok=True)
-        if to_parquet:
-            df.to_parquet(out_path)
+    def produce():
+        try:
+            chunk: list = []
+            for item in items:
+                chunk.append(item)
+                if len(chunk) >= chunk_size:
+                    if not put(chunk):
+                        return
+                    chunk = []
+            if chunk:
+                put(chunk)
+        except BaseException as exc:  # surfaced in the consumer
+            failure.append(exc)
+        finally:
+            put(_WALK_DONE)
+
+    lister = threading.Thread(target=produce, name="dicom-walk", daemon=True)
+    lister.start()
+    pool_cls = ProcessPoolExecutor if executor == "process" else ThreadPoolExecutor
+    in_flight: deque = deque()  # (chunk, future)
+    try:
+        with pool_cls(max_workers=workers) as pool:
+            while True:
+                chunk = chunks.get()
+                if chunk is _WALK_DONE:
+                    break
+                in_flight.append((chunk, pool.submit(_extract_chunk, [key(item) for item in chunk])))
+                while len(in_flight) >= 2 * workers:
+                    chunk, future = in_flight.popleft()
+                    for item, (meta, reason) in zip(chunk, future.result()):
+                        yield item, meta, reason
+            while in_flight:
+                chunk, future = in_flight.popleft()
+                for item, (meta, reason) in zip(chunk, future.result()):
+                    yield item, meta, reason
+    finally:
+        stop.set()
+        for _, future in in_flight:
+            future.cancel()
+        lister.join()
+    if failure:
+        raise failure[0]
+
+
+def extract_all(
+    items: Iterable,
+    workers: int = 1,
+    executor: str = "thread",
+    chunk_size: Optional[int] = None,
+    key: Callable = _identity,
+) -> Iterator[Tuple[object, Optional[dict], Optional[str]]]:
+    """``(item, metadata, skip_reason)`` for each of `items` (paths, or records whose path is ``key(item)``), in order.
+
+    Exactly one of metadata and skip_reason is None (see `read_metadata`). ``workers > 1``
+    parses on a pool of `executor` (``"thread"`` -- best when storage latency
+    dominates -- or ``"process"``, for CPU-bound parsing on local disks) while
+    `items` is consumed in the background; see `_iter_extracted`.
+    """
+    if executor not in ("thread", "process"):
+        raise ValueError(f"unknown executor {executor!r}; expected 'thread' or 'process'")
+    workers = max(int(workers or 1), 1)
+    if workers == 1:
+        return ((item, *read_metadata(key(item))) for item in items)
+    if chunk_size is None:
+        # processes pay IPC per task, threads only a queue hop
+        chunk_size = 64 if executor == "process" else 8
+    return _iter_extracted(items, workers, executor, max(int(chunk_size), 1), key)
+
+
+def iter_metadata(directory: str, workers: int = 1, executor: str = "thread", chunk_size: Optional[int] = None) -> Iterator[dict]:
+    """Metadata of every readable DICOM file under `directory`, in walk order.
+
+    With ``workers > 1`` headers are parsed in parallel while the tree is
+    listed in the background (see `extract_all`); the output is the same as
+    the serial walk.
+    """
+    return _readable(extract_all(_walk_files(directory), workers, executor, chunk_size))
+
+
+def _readable(results) -> Iterator[dict]:
+    try:
+        for _, meta, _ in results:
+            if meta is not None:
+                yield meta
+    finally:
+        # stop the walker and pool promptly when the consumer stops early
+        results.close()
+
+
+class _CsvSink:
+    """Streams metadata rows to a CSV file (same layout as ``DataFrame.to_csv(index=False)``)."""
+
+    def __init__(self, path: str):
+        self._file = open(path, "w", encoding="utf-8", newline="")
+        self._writer = csv.writer(self._file, lineterminator="\n")
+        self._writer.writerow(METADATA_COLUMNS)
+
+    def write(self, rows: List[dict]) -> None:
+        self._writer.writerows([[_text(row.get(c)) for c in METADATA_COLUMNS] for row in rows])
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class _ParquetSink:
+    """Streams metadata rows to Parquet through ``pyarrow.parquet.ParquetWriter``.
+
+    Rows arrive in record batches; batches are buffered until `row_group_size`
+    rows and then written as one row group, so memory is bounded by the row
+    group, not the number of files.
+    """
+
+    def __init__(self, path: str, row_group_size: int, compression: Optional[str]):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as exc:
+            raise RuntimeError("pyarrow is required for Parquet output (pip install pyarrow)") from exc
+        self._pa = pa
+        self.schema = metadata_schema()
+        self.row_group_size = row_group_size
+        self._pending: list = []
+        self._pending_rows = 0
+        self._writer = pq.ParquetWriter(path, self.schema, compression=compression)
+
+    def write(self, rows: List[dict]) -> None:
+        columns = [self._pa.array([_text(row.get(c)) for row in rows], type=self._pa.string()) for c in METADATA_COLUMNS]
+        self._pending.append(self._pa.RecordBatch.from_arrays(columns, schema=self.schema))
+        self._pending_rows += len(rows)
+        if self._pending_rows >= self.row_group_size:
+            self._flush(final=False)
+
+    def _flush(self, final: bool) -> None:
+        if not self._pending:
+            return
+        table = self._pa.Table.from_batches(self._pending, schema=self.schema)
+        # write whole row groups; the remainder waits for more rows unless this is the end
+        full = len(table) if final else len(table) - len(table) % self.row_group_size
+        if full:
+            self._writer.write_table(table.slice(0, full), row_group_size=self.row_group_size)
+        rest = table.slice(full)
+        self._pending, self._pending_rows = rest.to_batches(), len(rest)
+
+    def close(self) -> None:
+        self._flush(final=True)
+        self._writer.close()
+
+
+def _text(value) -> str:
+    return "" if value is None else str(value)
+
+
+def metadata_schema():
+    """Arrow schema of the ingest output: one non-null string column per `METADATA_COLUMNS` entry."""
+    import pyarrow as pa
+
+    return pa.schema([pa.field(c, pa.string(), nullable=False) for c in METADATA_COLUMNS])
+
+
+def ingest_directory(
+    directory: str,
+    out_path: str,
+    to_parquet: bool = False,
+    profile=None,
+    workers: int = 1,
+    executor: str = "thread",
+    batch_size: int = 10_000,
+    row_group_size: Optional[int] = None,
+    compression: Optional[str] = "snappy",
+    partition_by: Optional[Sequence[str]] = None,
+    dedupe: bool = False,
+    rollup_dir: Optional[str] = None,
+    max_memory_uids: int = 2_000_000,
+) -> int:
+    """Walk `directory`, extract DICOM metadata, and write to CSV or Parquet file `out_path`.
+    If `to_parquet` is True, writes a parquet file (requires pyarrow).
+    Returns number of rows written.
+
+    Output is streamed: metadata is collected `batch_size` rows at a time and
+    written as it arrives, so memory stays flat however many files the tree
+    holds. Parquet output uses the fixed `metadata_schema` (also for an empty
+    tree), `compression` (any ``ParquetWriter`` codec, or None) and row groups
+    of `row_group_size` rows (default: `batch_size`). The file is written under
+    a temporary name and renamed into place on success; errors (including a
+    missing pyarrow) are raised, never replaced by a different output file.
+
+    ``workers > 1`` parses headers in parallel on a thread (default) or process
+    pool, overlapped with the directory walk; the output is identical to the
+    serial ingest (see `iter_metadata`).
+
+    With `partition_by` (e.g. ``dicom_lake.PARTITION_COLUMNS``) `out_path` is
+    a directory: rows are appended to a Hive-partitioned Parquet lake with a
+    lookup index (see `dicom_lake`) and `to_parquet` is implied.
+
+    ``dedupe=True`` keeps only the first file of each ``sop_instance_uid``
+    (seen UIDs move to disk past `max_memory_uids`); `rollup_dir` also writes
+    ``dicom_series`` and ``dicom_studies`` tables (CSV, or Parquet with
+    `to_parquet` / `partition_by`) built in the same pass. See `dicom_rollup`.
+
+    Pass a `profiling.Profiler` as `profile` to time the ``dicom_parse`` and
+    ``parquet_write`` / ``csv_write`` stages.
+    """
+    from .profiling import get_profiler
+
+    if batch_size < 1:
+        raise ValueError("batch_size must be at least 1")
+    rows = iter_metadata(directory, workers=workers, executor=executor)
+    if dedupe or rollup_dir:
+        from .dicom_rollup import RollupStream
+
+        rows = RollupStream(rows, dedupe=dedupe, max_memory_uids=max_memory_uids)
+    try:
+        if partition_by:
+            from .dicom_lake import write_lake
+
+            count = write_lake(
+                rows,
+                out_path,
+                partition_by=partition_by,
+                batch_size=batch_size,
+                row_group_size=row_group_size,
+                compression=compression,
+                profile=get_profiler(profile),
+            )
         else:
-            df.to_csv(out_path, index=False)
-        return 0
+            count = write_metadata(
+                rows,
+                out_path,
+                to_parquet=to_parquet,
+                batch_size=batch_size,
+                row_group_size=row_group_size,
+                compression=compression,
+                profile=get_profiler(profile),
+            )
+        if rollup_dir:
+            rows.write_tables(rollup_dir, to_parquet=to_parquet or bool(partition_by))
+        return count
+    finally:
+        rows.close()
 
-    df = pd.DataFrame(rows)
+
+def write_metadata(
+    rows: Iterable[dict],
+    out_path: str,
+    to_parquet: bool = False,
+    batch_size: int = 10_000,
+    row_group_size: Optional[int] = None,
+    compression: Optional[str] = "snappy",
+    profile=None,
+) -> int:
+    """Stream metadata `rows` to CSV or Parquet file `out_path`; returns the row count.
+
+    The writing half of `ingest_directory` (see there for the options): rows
+    are pulled `batch_size` at a time under the ``dicom_parse`` stage, written
+    to a temporary file and renamed into place on success.
+    """
+    from itertools import islice
+
+    from .profiling import get_profiler
+
+    if batch_size < 1:
+        raise ValueError("batch_size must be at least 1")
+    prof = get_profiler(profile)
     out_dir = os.path.dirname(out_path)
     if out_dir:
         os.makedirs(out_dir, exist_ok=True)
+    tmp_path = os.path.join(out_dir, f".{os.path.basename(out_path)}.{os.getpid()}.tmp")
+    write_stage = "parquet_write" if to_parquet else "csv_write"
 
-    if to_parquet:
-        # prefer parquet; index=False keeps file tidy
-        try:
-            df.to_parquet(out_path, index=False)
-        except Exception as exc:
-            # parquet engine not available or failed; fallback to CSV
-            # write alongside with .csv suffix for portability
-            csv_path = out_path + '.csv'
-            df.to_csv(csv_path, index=False)
-    else:
-        # fallback to csv
-        df.to_csv(out_path, index=False)
-
-    return len(rows)
-
+    rows = iter(rows)
+    count = 0
+    sink = None
+    try:
+        if to_parquet:
+            sink = _ParquetSink(tmp_path, row_group_size or batch_size, compression)
+        else:
+            sink = _CsvSink(tmp_path)
+        while True:
+            with prof.stage("dicom_parse"):
+                batch = list(islice(rows, batch_size))
+            if not batch:
+                break
+            with prof.stage(write_stage):
+                sink.write(batch)
+            count += len(batch)
+        with prof.stage(write_stage):
+            sink.close()
+        os.replace(tmp_path, out_path)
+    except BaseException:
+        if sink is not None:
+            try:
+                sink.close()
+            except Exception:
+                pass
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return count
@@ -0,0 +1,396 @@
+"""Hive-partitioned DICOM metadata lake with a sidecar lookup index.
+
+`write_lake` (``ingest_directory(..., partition_by=...)``) writes the ingest
+rows as a Parquet dataset partitioned by `PARTITION_COLUMNS`::
+
+    lake/
+        _index.parquet
+        modality=CT/study_date=20250101/part-<run>-0000.parquet
+        modality=PT/study_date=20250101/part-<run>-0001.parquet
+
+Partition columns live in the directory names only (Hive style, values
+URI-encoded, empty values as ``__HIVE_DEFAULT_PARTITION__``). Rows are
+buffered per partition and written in row groups of at most `row_group_size`
+rows; within each row group they are sorted by patient, study and series (a
+file with several row groups is not sorted as a whole).
+
+``_index.parquet`` maps each value of `INDEX_KEYS` (patient, study and series
+ids) to the ``(file, row_group)`` pairs that contain it, sorted by key and
+value so that Parquet statistics prune the index itself. `lookup` resolves
+point, range and set criteria on those keys through the index and reads only
+the matching row groups; criteria on the partition columns prune by
+directory. Finding one patient's studies reads one small slice of the index
+and a handful of row groups, however large the archive.
+
+Later ingests add new files and merge their entries into the index (one
+writer at a time). A failed run removes its files; if the process dies
+mid-run, files it finished are visible to `open_lake` but not to `lookup`
+until `rebuild_index` is run.
+"""
+from __future__ import annotations
+
+import json
+import os
+import time
+import uuid
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+from urllib.parse import quote, unquote
+
+import pandas as pd
+
+from .dicom_ingest import METADATA_COLUMNS, _text
+
+PARTITION_COLUMNS = ("modality", "study_date")
+INDEX_KEYS = ("patient_id", "study_instance_uid", "series_instance_uid")
+INDEX_NAME = "_index.parquet"
+DEFAULT_PARTITION = "__HIVE_DEFAULT_PARTITION__"
+
+_INDEX_ROW_GROUP = 65_536
+
+
+def _pyarrow():
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as exc:
+        raise RuntimeError("pyarrow is required for the DICOM lake (pip install pyarrow)") from exc
+    return pa, pq
+
+
+def file_schema(partition_by: Sequence[str] = PARTITION_COLUMNS):
+    """Schema of the lake's data files: `METADATA_COLUMNS` minus the partition columns."""
+    pa, _ = _pyarrow()
+    return pa.schema([pa.field(c, pa.string(), nullable=False) for c in METADATA_COLUMNS if c not in partition_by])
+
+
+def index_schema():
+    pa, _ = _pyarrow()
+    return pa.schema(
+        [
+            pa.field("key", pa.string(), nullable=False),
+            pa.field("value", pa.string(), nullable=False),
+            pa.field("file", pa.string(), nullable=False),  # relative to the lake root, '/'-separated
+            pa.field("row_group", pa.int32(), nullable=False),
+        ]
+    )
+
+
+def partition_dir(values: Sequence[str], partition_by: Sequence[str] = PARTITION_COLUMNS) -> str:
+    """Relative Hive directory (``modality=CT/study_date=20250101``) for partition `values`."""
+    return "/".join(f"{c}={quote(v, safe='') if v else DEFAULT_PARTITION}" for c, v in zip(partition_by, values))
+
+
+def _partition_values(path: str) -> Dict[str, str]:
+    values = {}
+    for segment in path.split("/")[:-1]:
+        column, _, value = segment.partition("=")
+        values[column] = "" if value == DEFAULT_PARTITION else unquote(value)
+    return values
+
+
+class _LakeWriter:
+    """Routes rows to one Parquet writer per partition and collects index entries.
+
+    Rows are buffered per partition and written as a row group once a buffer
+    reaches `row_group_size`; when all buffers together exceed
+    `max_buffered_rows` the largest one is written early. At most
+    `max_open_files` writers stay open; a partition whose writer was closed
+    continues in a new file.
+    """
+
+    def __init__(self, lake_dir, partition_by, row_group_size, compression, max_buffered_rows, max_open_files):
+        self.pa, self.pq = _pyarrow()
+        self.lake_dir = lake_dir
+        self.partition_by = tuple(partition_by)
+        self.row_group_size = row_group_size
+        self.compression = compression
+        self.max_buffered_rows = max(max_buffered_rows, row_group_size)
+        self.max_open_files = max(int(max_open_files), 1)
+        self.schema = file_schema(self.partition_by)
+        self.columns = self.schema.names
+        self.run = f"{time.strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:8]}"
+        self._buffers: Dict[Tuple[str, ...], List[dict]] = {}
+        self._buffered = 0
+        self._open: "OrderedDict[Tuple[str, ...], list]" = OrderedDict()  # key -> [writer, rel, tmp, row_groups]
+        self._files = 0
+        self.written: List[str] = []
+        self.index: Dict[str, set] = {k: set() for k in INDEX_KEYS if k not in self.partition_by}
+
+    def write(self, rows: Iterable[dict]) -> None:
+        for row in rows:
+            key = tuple(_text(row.get(c)) for c in self.partition_by)
+            buffer = self._buffers.setdefault(key, [])
+            buffer.append(row)
+            self._buffered += 1
+            if len(buffer) >= self.row_group_size:
+                self._flush(key)
+        while self._buffered > self.max_buffered_rows:
+            self._flush(max(self._buffers, key=lambda k: len(self._buffers[k])))
+
+    def _writer(self, key):
+        entry = self._open.get(key)
+        if entry is not None:
+            self._open.move_to_end(key)
+            return entry
+        if len(self._open) >= self.max_open_files:
+            self._close(*self._open.popitem(last=False))
+        rel = f"{partition_dir(key, self.partition_by)}/part-{self.run}-{self._files:04d}.parquet"
+        self._files += 1
+        path = os.path.join(self.lake_dir, *rel.split("/"))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = os.path.join(os.path.dirname(path), f".{os.path.basename(path)}.tmp")
+        entry = [self.pq.ParquetWriter(tmp, self.schema, compression=self.compression), rel, tmp, 0]
+        self._open[key] = entry
+        return entry
+
+    def _flush(self, key) -> None:
+        rows = self._buffers.pop(key, None)
+        if not rows:
+            return
+        self._buffered -= len(rows)
+        rows.sort(key=lambda r: tuple(_text(r.get(k)) for k in INDEX_KEYS))
+        entry = self._writer(key)
+        writer, rel, _, row_group = entry
+        arrays = [self.pa.array([_text(r.get(c)) for r in rows], type=self.pa.string()) for c in self.columns]
+        writer.write_table(self.pa.Table.from_arrays(arrays, schema=self.schema), row_group_size=len(rows))
+        for k, found in self.index.items():
+            found.update((_text(r.get(k)), rel, row_group) for r in rows)
+        entry[3] += 1
+
+    def _close(self, key, entry) -> None:
+        writer, rel, tmp, _ = entry
+        writer.close()
+        os.replace(tmp, os.path.join(self.lake_dir, *rel.split("/")))
+        self.written.append(rel)
+
+    def close(self) -> None:
+        for key in list(self._buffers):
+            self._flush(key)
+        while self._open:
+            self._close(*self._open.popitem(last=False))
+
+    def abort(self) -> None:
+        for _, (writer, _, tmp, _) in self._open.items():
+            try:
+                writer.close()
+            except Exception:
+                pass
+            if os.path.exists(tmp):
+                os.remove(tmp)
+        self._open.clear()
+        # files already finished by this run are not indexed yet either
+        for rel in self.written:
+            os.remove(os.path.join(self.lake_dir, *rel.split("/")))
+        self.written.clear()
+
+
+def _index_table(entries: Dict[str, set]):
+    """Index table from ``{key: {(value, file, row_group), ...}}``."""
+    pa, _ = _pyarrow()
+    keys, values, files, groups = [], [], [], []
+    for k, found in entries.items():
+        for value, rel, group in found:
+            keys.append(k)
+            values.append(value)
+            files.append(rel)
+            groups.append(group)
+    return pa.Table.from_arrays(
+        [pa.array(keys, pa.string()), pa.array(values, pa.string()), pa.array(files, pa.string()), pa.array(groups, pa.int32())],
+        schema=index_schema(),
+    )
+
+
+def _write_index(lake_dir: str, table, partition_by: Sequence[str]) -> None:
+    pa, pq = _pyarrow()
+    table = table.sort_by([("key", "ascending"), ("value", "ascending"), ("file", "ascending"), ("row_group", "ascending")])
+    table = table.replace_schema_metadata({"partition_by": json.dumps(list(partition_by))})
+    path = os.path.join(lake_dir, INDEX_NAME)
+    tmp = os.path.join(lake_dir, f".{INDEX_NAME}.{os.getpid()}.tmp")
+    pq.write_table(table, tmp, row_group_size=_INDEX_ROW_GROUP)
+    os.replace(tmp, path)
+
+
+def lake_partitioning(lake_dir: str) -> Tuple[str, ...]:
+    """Partition columns of an existing lake (from its index), or `PARTITION_COLUMNS` for a new one."""
+    _, pq = _pyarrow()
+    path = os.path.join(lake_dir, INDEX_NAME)
+    if not os.path.exists(path):
+        return PARTITION_COLUMNS
+    metadata = pq.read_schema(path).metadata or {}
+    return tuple(json.loads(metadata.get(b"partition_by", b"null")) or PARTITION_COLUMNS)
+
+
+def write_lake(
+    rows: Iterable[dict],
+    lake_dir: str,
+    partition_by: Sequence[str] = PARTITION_COLUMNS,
+    batch_size: int = 10_000,
+    row_group_size: Optional[int] = None,
+    compression: Optional[str] = "snappy",
+    max_open_files: int = 64,
+    profile=None,
+) -> int:
+    """Append metadata `rows` to the lake at `lake_dir` and merge their entries into its index.
+
+    Returns the number of rows written. At most about ``4 * row_group_size``
+    rows (default `batch_size`) are buffered; see `_LakeWriter`. Partition
+    columns must match those of an existing lake.
+    """
+    from itertools import islice
+
+    from .profiling import get_profiler
+
+    if batch_size < 1:
+        raise ValueError("batch_size must be at least 1")
+    unknown = [c for c in partition_by if c not in METADATA_COLUMNS]
+    if unknown:
+        raise ValueError(f"unknown partition columns {unknown}; expected some of {list(METADATA_COLUMNS)}")
+    existing = lake_partitioning(lake_dir) if os.path.exists(os.path.join(lake_dir, INDEX_NAME)) else None
+    if existing is not None and tuple(partition_by) != existing:
+        raise ValueError(f"lake {lake_dir!r} is partitioned by {list(existing)}, not {list(partition_by)}")
+    prof = get_profiler(profile)
+    os.makedirs(lake_dir, exist_ok=True)
+    row_group_size = row_group_size or batch_size
+    writer = _LakeWriter(lake_dir, partition_by, row_group_size, compression, 4 * row_group_size, max_open_files)
+    rows = iter(rows)
+    count = 0
+    try:
+        while True:
+            with prof.stage("dicom_parse"):
+                batch = list(islice(rows, batch_size))
+            if not batch:
+                break
+            with prof.stage("parquet_write"):
+                writer.write(batch)
+            count += len(batch)
+        with prof.stage("parquet_write"):
+            writer.close()
+    except BaseException:
+        writer.abort()
+        raise
+    with prof.stage("index_write"):
+        pa, pq = _pyarrow()
+        new = _index_table(writer.index)
+        index_path = os.path.join(lake_dir, INDEX_NAME)
+        if existing is not None:
+            new = pa.concat_tables([pq.read_table(index_path).replace_schema_metadata(None), new])
+        _write_index(lake_dir, new, partition_by)
+    return count
+
+
+def _data_files(lake_dir: str) -> List[str]:
+    files = []
+    for root, dirs, names in os.walk(lake_dir):
+        dirs[:] = sorted(d for d in dirs if not d.startswith((".", "_")))
+        for name in sorted(names):
+            if name.endswith(".parquet") and not name.startswith((".", "_")):
+                files.append(os.path.relpath(os.path.join(root, name), lake_dir).replace(os.sep, "/"))
+    return files
+
+
+def rebuild_index(lake_dir: str, partition_by: Optional[Sequence[str]] = None) -> int:
+    """Rebuild ``_index.parquet`` from the data files; returns the number of index entries."""
+    _, pq = _pyarrow()
+    partition_by = tuple(partition_by or lake_partitioning(lake_dir))
+    entries: Dict[str, set] = {k: set() for k in INDEX_KEYS if k not in partition_by}
+    for rel in _data_files(lake_dir):
+        parquet = pq.ParquetFile(os.path.join(lake_dir, *rel.split("/")))
+        for group in range(parquet.num_row_groups):
+            table = parquet.read_row_group(group, columns=list(entries))
+            for k in entries:
+                entries[k].update((v, rel, group) for v in table.column(k).to_pylist())
+    table = _index_table(entries)
+    _write_index(lake_dir, table, partition_by)
+    return len(table)
+
+
+def open_lake(lake_dir: str):
+    """The lake as a ``pyarrow.dataset.Dataset`` with string partition columns (empty values read as null)."""
+    pa, _ = _pyarrow()
+    import pyarrow.dataset as ds
+
+    partition_by = lake_partitioning(lake_dir)
+    partitioning = ds.partitioning(pa.schema([(c, pa.string()) for c in partition_by]), flavor="hive")
+    return ds.dataset(lake_dir, format="parquet", partitioning=partitioning)
+
+
+def _matches(values: pd.Series, criterion) -> pd.Series:
+    if isinstance(criterion, tuple):
+        lo, hi = criterion
+        mask = pd.Series(True, index=values.index)
+        if lo is not None:
+            mask &= values >= lo
+        if hi is not None:
+            mask &= values <= hi
+        return mask
+    if isinstance(criterion, (list, set, frozenset)):
+        return values.isin(list(criterion))
+    return values == criterion
+
+
+def _index_filters(key: str, criterion) -> List[list]:
+    """DNF filters on the index table for one key's criterion."""
+    base = [("key", "=", key)]
+    if isinstance(criterion, tuple):
+        lo, hi = criterion
+        conj = list(base)
+        if lo is not None:
+            conj.append(("value", ">=", lo))
+        if hi is not None:
+            conj.append(("value", "<=", hi))
+        return [conj]
+    if isinstance(criterion, (list, set, frozenset)):
+        return [base + [("value", "in", sorted(criterion))]]
+    return [base + [("value", "=", criterion)]]
+
+
+def lookup(lake_dir: str, columns: Optional[Sequence[str]] = None, **criteria) -> pd.DataFrame:
+    """Rows matching every criterion, read through the index.
+
+    Criteria are keyword arguments named after `METADATA_COLUMNS`; each is a
+    value (point lookup), a ``(low, high)`` tuple (inclusive range, either end
+    may be None) or a list/set of values. Criteria on `INDEX_KEYS` select row
+    groups through ``_index.parquet``; criteria on the partition columns prune
+    directories; any other column is filtered after reading. Without an
+    index-key criterion every file of the matching partitions is read.
+    """
+    _, pq = _pyarrow()
+    unknown = [c for c in criteria if c not in METADATA_COLUMNS]
+    if unknown:
+        raise ValueError(f"unknown lookup columns {unknown}; expected some of {list(METADATA_COLUMNS)}")
+    partition_by = lake_partitioning(lake_dir)
+    wanted = list(columns or METADATA_COLUMNS)
+
+    keyed = {k: v for k, v in criteria.items() if k in INDEX_KEYS and k not in partition_by}
+    if keyed:
+        candidates = None
+        index_path = os.path.join(lake_dir, INDEX_NAME)
+        for key, criterion in keyed.items():
+            hits = pq.read_table(index_path, columns=["file", "row_group"], filters=_index_filters(key, criterion))
+            found = set(zip(hits.column("file").to_pylist(), hits.column("row_group").to_pylist()))
+            candidates = found if candidates is None else candidates & found
+        groups: Dict[str, List[int]] = {}
+        for rel, group in sorted(candidates):
+            groups.setdefault(rel, []).append(group)
+    else:
+        groups = {rel: None for rel in _data_files(lake_dir)}
+
+    frames = []
+    for rel, row_groups in groups.items():
+        values = _partition_values(rel)
+        if not all(_matches(pd.Series([values.get(c, "")]), criteria[c]).iloc[0] for c in partition_by if c in criteria):
+            continue
+        parquet = pq.ParquetFile(os.path.join(lake_dir, *rel.split("/")))
+        table = parquet.read_row_groups(row_groups) if row_groups is not None else parquet.read()
+        frame = table.to_pandas()
+        for c in partition_by:
+            frame[c] = values.get(c, "")
+        mask = pd.Series(True, index=frame.index)
+        for column, criterion in criteria.items():
+            if column not in partition_by:
+                mask &= _matches(frame[column], criterion)
+        frames.append(frame.loc[mask, wanted])
+    if not frames:
+        return pd.DataFrame({c: pd.Series(dtype=object) for c in wanted})
+    return pd.concat(frames, ignore_index=True)
@@ -0,0 +1,325 @@
+"""Memory-mapped pixel volumes and vectorized SUV / ROI statistics for PET and SPECT series.
+
+`build_volume` assembles one series into a 3D ``float32`` volume on disk:
+
+1. a header pass reads only the geometry and rescale tags of each file
+   (``specific_tags``, no pixel data) and sorts the slices along the slice
+   normal (``ImageOrientationPatient`` x ``ImagePositionPatient``, falling
+   back to ``InstanceNumber``);
+2. a pixel pass decodes one slice at a time (on a small thread pool, in
+   order), applies that slice's ``RescaleSlope`` / ``RescaleIntercept`` and
+   writes it into a ``.npy`` file opened with
+   ``numpy.lib.format.open_memmap``.
+
+Volumes are stored slice-major, so every z slice is one contiguous block of
+the file, and at most ``2 * workers`` slices are held in memory. Geometry,
+rescale and the PET dose tags go to a ``.json`` sidecar. `load_volume` maps the
+file read-only. `suv_volume` and `roi_stats` then work through ``chunk_slices``
+slices at a time with NumPy, so memory stays bounded by the chunk size rather
+than the series size.
+
+SUV is body-weight SUV: activity concentration (Bq/ml, ``Units`` = ``BQML``)
+times patient weight in grams, divided by the injected dose decayed to the
+series start time (see `suv_factor`).
+"""
+from __future__ import annotations
+
+import json
+import math
+import os
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+# header tags for sorting and rescaling; read without the pixel data
+_GEOMETRY_TAGS = (
+    "ImagePositionPatient",
+    "ImageOrientationPatient",
+    "InstanceNumber",
+    "Rows",
+    "Columns",
+    "PixelSpacing",
+    "SliceThickness",
+    "RescaleSlope",
+    "RescaleIntercept",
+    "SeriesInstanceUID",
+)
+
+
+def _pydicom():
+    try:
+        import pydicom
+    except ImportError as exc:  # pragma: no cover - optional dependency
+        raise RuntimeError("pydicom is required for DICOM pixel data") from exc
+    return pydicom
+
+
+def _floats(value, default=None) -> Optional[List[float]]:
+    if value is None or value == "":
+        return default
+    try:
+        return [float(v) for v in value]
+    except TypeError:
+        return [float(value)]
+
+
+def _slice_header(path: str) -> dict:
+    ds = _pydicom().dcmread(path, stop_before_pixels=True, specific_tags=list(_GEOMETRY_TAGS))
+    return {
+        "path": path,
+        "position": _floats(getattr(ds, "ImagePositionPatient", None)),
+        "orientation": _floats(getattr(ds, "ImageOrientationPatient", None)),
+        "instance": int(getattr(ds, "InstanceNumber", 0) or 0),
+        "rows": int(ds.Rows),
+        "columns": int(ds.Columns),
+        "pixel_spacing": _floats(getattr(ds, "PixelSpacing", None), [1.0, 1.0]),
+        "slice_thickness": float(getattr(ds, "SliceThickness", 0) or 0),
+        "slope": float(getattr(ds, "RescaleSlope", 1) or 1),
+        "intercept": float(getattr(ds, "RescaleIntercept", 0) or 0),
+        "series_instance_uid": str(getattr(ds, "SeriesInstanceUID", "")),
+    }
+
+
+def sort_slices(headers: List[dict]) -> List[dict]:
+    """Slices ordered by position along the slice normal (by ``InstanceNumber`` without geometry)."""
+    orientation = headers[0]["orientation"] if headers else None
+    if orientation and len(orientation) == 6 and all(h["position"] for h in headers):
+        normal = np.cross(orientation[:3], orientation[3:])
+        for h in headers:
+            h["z"] = float(np.dot(normal, h["position"]))
+        return sorted(headers, key=lambda h: (h["z"], h["instance"]))
+    return sorted(headers, key=lambda h: (h["instance"], h["path"]))
+
+
+def _parse_time(value) -> Optional[float]:
+    """Seconds since midnight for a DICOM TM (``HHMMSS.FFFFFF``) or DT value."""
+    text = str(value or "").strip().replace(":", "")
+    if not text:
+        return None
+    for sign in "+-":
+        text = text.split(sign)[0]  # DT: drop a UTC offset
+    if len(text.split(".")[0]) >= 12:
+        text = text[8:]  # DT: drop the date
+    hours, minutes = int(text[0:2]), int(text[2:4] or 0)
+    seconds = float(text[4:] or 0)
+    return hours * 3600 + minutes * 60 + seconds
+
+
+def _pet_info(path: str) -> Dict[str, object]:
+    """PET tags needed for SUV, from one slice's header."""
+    ds = _pydicom().dcmread(path, stop_before_pixels=True)
+    info: Dict[str, object] = {
+        "modality": str(getattr(ds, "Modality", "")),
+        "units": str(getattr(ds, "Units", "")),
+        "decay_correction": str(getattr(ds, "DecayCorrection", "")),
+        "patient_weight_kg": float(getattr(ds, "PatientWeight", 0) or 0) or None,
+        "series_time": _parse_time(getattr(ds, "SeriesTime", None) or getattr(ds, "AcquisitionTime", None)),
+    }
+    sequence = getattr(ds, "RadiopharmaceuticalInformationSequence", None)
+    if sequence:
+        item = sequence[0]
+        info["injected_dose_bq"] = float(getattr(item, "RadionuclideTotalDose", 0) or 0) or None
+        info["half_life_s"] = float(getattr(item, "RadionuclideHalfLife", 0) or 0) or None
+        start = getattr(item, "RadiopharmaceuticalStartDateTime", None) or getattr(item, "RadiopharmaceuticalStartTime", None)
+        info["injection_time"] = _parse_time(start)
+    return info
+
+
+def suv_factor(meta: Dict[str, object]) -> float:
+    """Multiplier from stored values (Bq/ml) to body-weight SUV, from a volume's sidecar metadata.
+
+    Raises ValueError when the series lacks what SUV needs (``Units`` BQML,
+    patient weight, injected dose, half-life, injection and series times).
+    """
+    if str(meta.get("units", "")).upper() != "BQML":
+        raise ValueError(f"SUV needs activity concentration in BQML, series has units {meta.get('units')!r}")
+    missing = [k for k in ("patient_weight_kg", "injected_dose_bq", "half_life_s") if not meta.get(k)]
+    if missing:
+        raise ValueError(f"SUV needs {missing}, missing from the series header")
+    dose = float(meta["injected_dose_bq"])
+    if str(meta.get("decay_correction", "START")).upper() in ("START", ""):
+        if meta.get("series_time") is None or meta.get("injection_time") is None:
+            raise ValueError("SUV needs the injection and series times to decay-correct the dose")
+        elapsed = float(meta["series_time"]) - float(meta["injection_time"])
+        if elapsed < 0:  # scan started after midnight
+            elapsed += 24 * 3600
+        dose *= math.exp(-math.log(2) * elapsed / float(meta["half_life_s"]))
+    return float(meta["patient_weight_kg"]) * 1000.0 / dose
+
+
+def _decode(header: dict) -> np.ndarray:
+    ds = _pydicom().dcmread(header["path"])
+    pixels = ds.pixel_array.astype(np.float32)
+    if header["slope"] != 1.0:
+        pixels *= np.float32(header["slope"])
+    if header["intercept"] != 0.0:
+        pixels += np.float32(header["intercept"])
+    return pixels
+
+
+def build_volume(paths: Iterable[str], out_path: str, workers: int = 4) -> Dict[str, object]:
+    """Assemble the slices in `paths` (one series) into a ``float32`` ``.npy`` volume at `out_path`.
+
+    Returns the sidecar metadata, also written to ``<out_path>.json``: shape,
+    voxel spacing (z, y, x in mm), sorted slice positions and paths, and the
+    PET tags `suv_factor` uses. The volume is written under a temporary name
+    and renamed into place when complete. Raises ``ValueError`` for slices of
+    more than one series, of different sizes, or at the same position.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    paths = list(paths)
+    if not paths:
+        raise ValueError("no slices to assemble")
+    headers = sort_slices([_slice_header(p) for p in paths])
+    series = sorted({h["series_instance_uid"] for h in headers})
+    if len(series) > 1:
+        raise ValueError(f"slices from more than one series: {series[:3]}")
+    rows, columns = headers[0]["rows"], headers[0]["columns"]
+    odd = [h["path"] for h in headers if (h["rows"], h["columns"]) != (rows, columns)]
+    if odd:
+        raise ValueError(f"slices of different size than {rows}x{columns}: {odd[:3]}")
+    if "z" in headers[0] and len(headers) > 1:
+        steps = np.diff([h["z"] for h in headers])
+        stacked = [(headers[i]["path"], headers[i + 1]["path"]) for i in np.flatnonzero(np.abs(steps) < 1e-4)]
+        if stacked:
+            raise ValueError(f"slices at the same position: {stacked[:3]}")
+        z_spacing = float(np.median(steps))
+    else:
+        z_spacing = headers[0]["slice_thickness"] or 1.0
+
+    out_dir = os.path.dirname(out_path)
+    if out_dir:
+        os.makedirs(out_dir, exist_ok=True)
+    tmp = os.path.join(out_dir, f".{os.path.basename(out_path)}.{os.getpid()}.tmp")
+    try:
+        volume = np.lib.format.open_memmap(tmp, mode="w+", dtype=np.float32, shape=(len(headers), rows, columns))
+        workers = max(int(workers or 1), 1)
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            # decode ahead by a bounded window, write in slice order
+            for start in range(0, len(headers), 2 * workers):
+                window = headers[start : start + 2 * workers]
+                for offset, pixels in enumerate(pool.map(_decode, window)):
+                    volume[start + offset] = pixels
+                volume.flush()
+        del volume  # unmap before the rename
+        os.replace(tmp, out_path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+    meta: Dict[str, object] = {
+        "series_instance_uid": headers[0]["series_instance_uid"],
+        "shape": [len(headers), rows, columns],
+        "spacing_mm": [abs(z_spacing), *map(float, headers[0]["pixel_spacing"][:2])],
+        "orientation": headers[0]["orientation"],
+        "positions": [h["position"] for h in headers],
+        "files": [h["path"] for h in headers],
+    }
+    meta.update(_pet_info(headers[0]["path"]))
+    with open(out_path + ".json", "w") as f:
+        json.dump(meta, f, indent=2)
+    return meta
+
+
+def build_series_volumes(metadata, out_dir: str, modalities: Sequence[str] = ("PT", "NM"), workers: int = 4) -> Dict[str, str]:
+    """One volume per series of `modalities` in an ingest metadata table; returns series UID -> volume path.
+
+    `metadata` is a DataFrame (or CSV/Parquet path) with the `dicom_ingest`
+    columns; volumes are written as ``<out_dir>/<series_instance_uid>.npy``.
+    """
+    import pandas as pd
+
+    if isinstance(metadata, str):
+        metadata = pd.read_parquet(metadata) if metadata.endswith(".parquet") else pd.read_csv(metadata, dtype=str)
+    table = metadata[metadata["modality"].isin(list(modalities))]
+    volumes = {}
+    for series_uid, group in table.groupby("series_instance_uid", sort=True):
+        path = os.path.join(out_dir, f"{series_uid}.npy")
+        build_volume(group["file_path"], path, workers=workers)
+        volumes[series_uid] = path
+    return volumes
+
+
+def load_volume(path: str):
+    """``(volume, meta)``: the ``.npy`` volume memory-mapped read-only and its sidecar metadata."""
+    volume = np.load(path, mmap_mode="r")
+    with open(path + ".json") as f:
+        meta = json.load(f)
+    return volume, meta
+
+
+def suv_volume(path: str, out_path: str, chunk_slices: int = 32) -> str:
+    """Write the SUV volume of the volume at `path` to `out_path` (``float32``, with a copied sidecar)."""
+    volume, meta = load_volume(path)
+    factor = suv_factor(meta)
+    tmp = os.path.join(os.path.dirname(out_path), f".{os.path.basename(out_path)}.{os.getpid()}.tmp")
+    try:
+        out = np.lib.format.open_memmap(tmp, mode="w+", dtype=np.float32, shape=volume.shape)
+        for start in range(0, volume.shape[0], chunk_slices):
+            np.multiply(volume[start : start + chunk_slices], factor, out=out[start : start + chunk_slices], casting="unsafe")
+        out.flush()
+        del out
+        os.replace(tmp, out_path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+    with open(out_path + ".json", "w") as f:
+        json.dump(dict(meta, units="SUVbw", suv_factor=float(factor)), f, indent=2)
+    return out_path
+
+
+def roi_stats(
+    volume,
+    mask=None,
+    threshold: Optional[float] = None,
+    scale: float = 1.0,
+    spacing_mm: Optional[Sequence[float]] = None,
+    chunk_slices: int = 32,
+) -> Dict[str, float]:
+    """Statistics of ``scale * volume`` over an ROI, computed `chunk_slices` slices at a time.
+
+    The ROI is the voxels where `mask` (a boolean array of the volume's
+    shape, e.g. memory-mapped) is set and, with `threshold`, the scaled value
+    is at least `threshold` (both optional; neither means the whole volume).
+    Pass ``scale=suv_factor(meta)`` for SUV statistics. Returns ``voxels``,
+    ``mean``, ``std``, ``min``, ``max`` and ``sum``; with `spacing_mm` also
+    ``volume_ml`` and ``total`` (``mean * volume_ml``, e.g. total lesion
+    glycolysis for SUV).
+    """
+    if mask is not None and tuple(mask.shape) != tuple(volume.shape):
+        raise ValueError(f"mask shape {tuple(mask.shape)} does not match volume shape {tuple(volume.shape)}")
+    # per-chunk mean and sum of squared deviations, merged pairwise (Chan et
+    # al.) so the variance does not cancel catastrophically for large means
+    count = 0
+    total = 0.0
+    mean = 0.0
+    m2 = 0.0
+    lo, hi = math.inf, -math.inf
+    for start in range(0, volume.shape[0], chunk_slices):
+        chunk = np.asarray(volume[start : start + chunk_slices], dtype=np.float64) * scale
+        selected = np.ones(chunk.shape, dtype=bool) if mask is None else np.asarray(mask[start : start + chunk_slices], dtype=bool)
+        if threshold is not None:
+            selected &= chunk >= threshold
+        values = chunk[selected]
+        if not values.size:
+            continue
+        n = values.size
+        chunk_sum = float(values.sum())
+        chunk_mean = chunk_sum / n
+        deviations = values - chunk_mean
+        delta = chunk_mean - mean
+        merged = count + n
+        mean += delta * n / merged
+        m2 += float(np.dot(deviations, deviations)) + delta * delta * count * n / merged
+        count = merged
+        total += chunk_sum
+        lo = min(lo, float(values.min()))
+        hi = max(hi, float(values.max()))
+    stats: Dict[str, float] = {"voxels": count, "mean": math.nan, "std": math.nan, "min": math.nan, "max": math.nan, "sum": total}
+    if count:
+        stats.update(mean=mean, std=math.sqrt(m2 / count), min=lo, max=hi)
+    if spacing_mm is not None:
+        stats["volume_ml"] = count * float(np.prod(spacing_mm)) / 1000.0
+        stats["total"] = stats["mean"] * stats["volume_ml"] if count else 0.0
+    return stats
@@ -0,0 +1,252 @@
+"""SOP instance deduplication and series / study rollups for DICOM ingest.
+
+`RollupStream` wraps the metadata rows of an ingest. It drops files whose
+``sop_instance_uid`` was already seen (re-sent PACS exports) and accumulates
+one row per series and per study as the rows go by, so the rollups come out
+of the same single pass as the file-level output::
+
+    stream = RollupStream(iter_metadata(directory), dedupe=True)
+    write_metadata(stream, "data/bronze/dicom_metadata.parquet", to_parquet=True)
+    stream.series_table()   # series_instance_uid, study_instance_uid, instances, duplicate_files, ...
+
+Seen UIDs are kept in a `UidSet`: a Python set up to `max_memory_uids`
+entries, then a SQLite table on disk, so deduplication works for archives
+whose UIDs do not fit in memory. The first file of a SOP instance in walk
+order is kept; files without a SOP instance UID are never treated as
+duplicates. Rollups are small (one entry per series) and stay in memory.
+"""
+from __future__ import annotations
+
+import os
+import sqlite3
+import tempfile
+from typing import Dict, Iterable, Iterator, Optional
+
+import pandas as pd
+
+SERIES_COLUMNS = (
+    "series_instance_uid",
+    "study_instance_uid",
+    "patient_id",
+    "modality",
+    "manufacturer",
+    "study_date",
+    "instances",
+    "duplicate_files",
+    "first_file",
+    "last_file",
+)
+STUDY_COLUMNS = (
+    "study_instance_uid",
+    "patient_id",
+    "study_date",
+    "modalities",
+    "manufacturers",
+    "series",
+    "instances",
+    "duplicate_files",
+    "first_file",
+    "last_file",
+)
+
+
+class UidSet:
+    """Set of UID strings that moves to a SQLite table once it outgrows `max_memory_uids`."""
+
+    def __init__(self, max_memory_uids: int = 2_000_000, spill_dir: Optional[str] = None):
+        self.max_memory_uids = max(int(max_memory_uids), 0)
+        self.spill_dir = spill_dir
+        self._memory: Optional[set] = set()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._path: Optional[str] = None
+        self._size = 0
+
+    @property
+    def spilled(self) -> bool:
+        return self._conn is not None
+
+    def add(self, uid: str) -> bool:
+        """Add `uid`; True if it was not in the set yet."""
+        if self._conn is None:
+            if uid in self._memory:
+                return False
+            self._memory.add(uid)
+            self._size += 1
+            if self._size > self.max_memory_uids:
+                self._spill()
+            return True
+        cur = self._conn.execute("INSERT OR IGNORE INTO uids VALUES (?)", (uid,))
+        if cur.rowcount:
+            self._size += 1
+            return True
+        return False
+
+    def _spill(self) -> None:
+        fd, self._path = tempfile.mkstemp(prefix="theranostics-uids-", suffix=".db", dir=self.spill_dir)
+        os.close(fd)
+        conn = sqlite3.connect(self._path, isolation_level=None)
+        # scratch data: no journal, no fsync
+        conn.execute("PRAGMA journal_mode=OFF")
+        conn.execute("PRAGMA synchronous=OFF")
+        conn.execute("CREATE TABLE uids (uid TEXT PRIMARY KEY) WITHOUT ROWID")
+        conn.execute("BEGIN")
+        conn.executemany("INSERT INTO uids VALUES (?)", ((uid,) for uid in sorted(self._memory)))
+        self._conn, self._memory = conn, None
+
+    def __contains__(self, uid: str) -> bool:
+        if self._conn is None:
+            return uid in self._memory
+        return self._conn.execute("SELECT 1 FROM uids WHERE uid = ?", (uid,)).fetchone() is not None
+
+    def __len__(self) -> int:
+        return self._size
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+        if self._path is not None and os.path.exists(self._path):
+            os.remove(self._path)
+        self._path = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+def _widen(entry: dict, path: str) -> None:
+    if not entry["first_file"] or path < entry["first_file"]:
+        entry["first_file"] = path
+    if path > entry["last_file"]:
+        entry["last_file"] = path
+
+
+class RollupStream:
+    """Iterator over `rows` minus duplicate SOP instances, accumulating series and study rollups.
+
+    With ``dedupe=False`` every row passes through and only the rollups are
+    built (``duplicate_files`` is then 0). ``first_file`` / ``last_file`` are
+    the smallest and largest file path, so they do not depend on walk order.
+    """
+
+    def __init__(
+        self,
+        rows: Iterable[dict],
+        dedupe: bool = True,
+        max_memory_uids: int = 2_000_000,
+        spill_dir: Optional[str] = None,
+    ):
+        self._rows = iter(rows)
+        self.seen = UidSet(max_memory_uids, spill_dir) if dedupe else None
+        self.files = 0
+        self.duplicates = 0
+        self._series: Dict[str, dict] = {}
+        self._studies: Dict[str, dict] = {}
+
+    def __iter__(self) -> Iterator[dict]:
+        return self
+
+    def __next__(self) -> dict:
+        while True:
+            row = next(self._rows)
+            self.files += 1
+            uid = str(row.get("sop_instance_uid") or "")
+            duplicate = self.seen is not None and bool(uid) and not self.seen.add(uid)
+            self._add(row, duplicate)
+            if duplicate:
+                self.duplicates += 1
+                continue
+            return row
+
+    def _add(self, row: dict, duplicate: bool) -> None:
+        path = str(row.get("file_path") or "")
+        series_uid = str(row.get("series_instance_uid") or "")
+        study_uid = str(row.get("study_instance_uid") or "")
+        series = self._series.get(series_uid)
+        if series is None:
+            series = self._series[series_uid] = {
+                "series_instance_uid": series_uid,
+                "study_instance_uid": study_uid,
+                "patient_id": str(row.get("patient_id") or ""),
+                "modality": str(row.get("modality") or ""),
+                "manufacturer": str(row.get("manufacturer") or ""),
+                "study_date": str(row.get("study_date") or ""),
+                "instances": 0,
+                "duplicate_files": 0,
+                "first_file": "",
+                "last_file": "",
+            }
+        study = self._studies.get(study_uid)
+        if study is None:
+            study = self._studies[study_uid] = {
+                "study_instance_uid": study_uid,
+                "patient_id": str(row.get("patient_id") or ""),
+                "study_date": str(row.get("study_date") or ""),
+                "modalities": set(),
+                "manufacturers": set(),
+                "series": set(),
+                "instances": 0,
+                "duplicate_files": 0,
+                "first_file": "",
+                "last_file": "",
+            }
+        key = "duplicate_files" if duplicate else "instances"
+        series[key] += 1
+        study[key] += 1
+        if duplicate:
+            return
+        study["series"].add(series_uid)
+        for column, values in (("modality", "modalities"), ("manufacturer", "manufacturers")):
+            if row.get(column):
+                study[values].add(str(row[column]))
+        _widen(series, path)
+        _widen(study, path)
+
+    def close(self) -> None:
+        close = getattr(self._rows, "close", None)
+        if close is not None:
+            close()
+        if self.seen is not None:
+            self.seen.close()
+
+    def series_table(self) -> pd.DataFrame:
+        """One row per series (`SERIES_COLUMNS`), sorted by study and series UID."""
+        table = pd.DataFrame(list(self._series.values()), columns=list(SERIES_COLUMNS))
+        return table.sort_values(["study_instance_uid", "series_instance_uid"], ignore_index=True)
+
+    def study_table(self) -> pd.DataFrame:
+        """One row per study (`STUDY_COLUMNS`); ``modalities`` / ``manufacturers`` are sorted and ``/``-joined."""
+        rows = [
+            dict(
+                study,
+                modalities="/".join(sorted(study["modalities"])),
+                manufacturers="/".join(sorted(study["manufacturers"])),
+                series=len(study["series"]),
+            )
+            for study in self._studies.values()
+        ]
+        table = pd.DataFrame(rows, columns=list(STUDY_COLUMNS))
+        return table.sort_values(["patient_id", "study_instance_uid"], ignore_index=True)
+
+    def write_tables(self, out_dir: str, to_parquet: bool = False) -> Dict[str, str]:
+        """Write ``dicom_series`` and ``dicom_studies`` tables to `out_dir`; returns their paths."""
+        os.makedirs(out_dir, exist_ok=True)
+        ext = "parquet" if to_parquet else "csv"
+        paths = {}
+        for name, table in (("dicom_series", self.series_table()), ("dicom_studies", self.study_table())):
+            path = os.path.join(out_dir, f"{name}.{ext}")
+            tmp = os.path.join(out_dir, f".{name}.{ext}.{os.getpid()}.tmp")
+            try:
+                if to_parquet:
+                    table.to_parquet(tmp, index=False)
+                else:
+                    table.to_csv(tmp, index=False)
+                os.replace(tmp, path)
+            finally:
+                if os.path.exists(tmp):
+                    os.remove(tmp)
+            paths[name] = path
+        return paths
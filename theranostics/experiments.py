@@ -12,19 +12,17 @@ from __future__ import annotations
 import os
 import json
 import tempfile
-from typing import Optional, Dict, Any
+import time
+import uuid
+from typing import Optional, Dict, Any, List
 
 import pandas as pd
 
-try:
-    import mlflow
-    MLFLOW_AVAILABLE = True
-except Exception:
-    mlflow = None
-    MLFLOW_AVAILABLE = False
-
-from .simulate import generate_cohort
-from .models import fit_km, fit_cox
+from .models import fit_km, fit_cox, prepare_cox_frame
+from .cache import cached_cohort, cached_fit, resolve_cache
+from .profiling import get_profiler
+from .store import resolve_store
+from .tracking import RunLogger, get_logger
 
 
 def _ensure_dir(path: str) -> None:
@@ -40,28 +38,152 @@ def _save_artifact(obj: Any, path: str) -> None:
             json.dump(obj, f, default=str)
 
 
+# artifact name -> written by default
+ARTIFACTS = {
+    "km_survival_table": True,
+    "cox_summary": True,
+    "cox_summary_json": True,
+    "cox_input": True,
+    "bootstrap_ci": True,
+}
+_EXTENSIONS = {"csv": ".csv", "parquet": ".parquet", "arrow": ".arrow"}
+
+
+def _artifact_options(artifacts, have_bootstrap: bool) -> Dict[str, Any]:
+    options = dict(ARTIFACTS)
+    if artifacts is not None:
+        if not isinstance(artifacts, dict):
+            # an iterable of names: write exactly those
+            artifacts = {name: (name in set(artifacts)) for name in ARTIFACTS}
+        unknown = set(artifacts) - set(ARTIFACTS)
+        if unknown:
+            raise ValueError(f"unknown artifacts: {sorted(unknown)}; expected some of {sorted(ARTIFACTS)}")
+        options.update(artifacts)
+    options["bootstrap_ci"] = options["bootstrap_ci"] and have_bootstrap
+    return options
+
+
+def _sample_rows(df: pd.DataFrame, spec) -> pd.DataFrame:
+    """`spec` True keeps every row; an int keeps that many rows, a float in (0, 1) that fraction."""
+    if spec is True or spec is None:
+        return df
+    if isinstance(spec, float) and 0 < spec < 1:
+        return df.sample(frac=spec, random_state=0).sort_index()
+    n = int(spec)
+    return df if n >= len(df) else df.sample(n=n, random_state=0).sort_index()
+
+
+def _write_table(df: pd.DataFrame, path: str, fmt: str, index: bool = True) -> None:
+    if fmt == "csv":
+        df.to_csv(path, index=index)
+    elif fmt == "parquet":
+        df.to_parquet(path, index=index)
+    elif fmt == "arrow":
+        import pyarrow as pa
+
+        table = pa.Table.from_pandas(df, preserve_index=index)
+        with pa.OSFile(path, "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    else:
+        raise ValueError(f"unknown artifact format: {fmt!r}; expected one of {sorted(_EXTENSIONS)}")
+
+
+def read_table(path: str) -> pd.DataFrame:
+    """Read an artifact table written by `run_experiment` (CSV, Parquet or Arrow IPC).
+
+    Parquet and Arrow restore the index; CSV returns it as an ordinary column.
+    """
+    if path.endswith(".parquet"):
+        return pd.read_parquet(path)
+    if path.endswith(".arrow"):
+        import pyarrow as pa
+
+        with pa.memory_map(path) as source:
+            return pa.ipc.open_file(source).read_pandas()
+    return pd.read_csv(path)
+
+
 def run_experiment(
     df: Optional[pd.DataFrame] = None,
     params: Optional[Dict[str, Any]] = None,
-    artifacts_dir: str = "artifacts/experiments",
+    artifacts_dir: Optional[str] = "artifacts/experiments",
     mlflow_experiment_name: str = "theranostics_local",
+    cache=None,
+    tracking=None,
+    artifact_format: str = "csv",
+    artifacts=None,
+    return_tables: bool = False,
+    results_store=None,
+    sweep_id: Optional[str] = None,
+    profile=None,
 ) -> Dict[str, Any]:
     """Run a minimal experiment: fit KM and Cox, log metrics and artifacts.
 
-    Returns a dictionary with keys: metrics, artifacts, params.
+    Artifacts are written as `artifact_format` ``"csv"`` (default), ``"parquet"``
+    or ``"arrow"`` (Arrow IPC file); `read_table` reads any of them back.
+    `artifacts` selects what is written: a dict such as ``{"cox_input": False}``
+    or ``{"cox_input": 1000}`` (a seeded sample of 1000 rows; a float in (0, 1)
+    is a fraction), or a list of names to write exactly those (see
+    `ARTIFACTS`). With `return_tables` the tables are also returned in
+    memory under ``results["tables"]``; ``artifacts_dir=None`` writes no files.
+
+    MLflow logging goes through `tracking` (a `tracking.RunLogger`; default: the
+    process-wide buffered logger, ``False`` to skip MLflow). Artifact uploads may
+    finish after this returns; call ``tracking.get_logger().flush()`` to wait.
+
+    `cache` (``True``, a directory or a `cache.ResultCache`) reuses generated
+    cohorts and model summaries from the on-disk cache; see `theranostics.cache`.
+
+    Set ``params["bootstrap_resamples"]`` (and optionally ``bootstrap_seed``,
+    ``bootstrap_workers``) to add percentile CIs for median survival and
+    concordance (``*_ci_lower`` / ``*_ci_upper`` metrics) and a
+    ``bootstrap_ci.csv`` artifact; see `theranostics.bootstrap`.
+
+    Every run is recorded in `results_store` (default: the local SQLite store
+    from `theranostics.store`, ``False`` to skip; a path or `store.ResultsStore`
+    otherwise) with its params, metrics, Cox coefficients, artifact paths and
+    timings, tagged with `sweep_id` when part of a sweep.
+
+    Stages (cohort, km_fit, cox_fit -- or fit when cached --, bootstrap,
+    artifact_io, mlflow) are timed through `profile` (see
+    `profiling.get_profiler`: a `profiling.Profiler`, ``True``, ``False``, or a
+    mode such as ``"cprofile"``/``"memory"``; default ``THERANOSTICS_PROFILE``)
+    and returned under ``results["timings"]``.
+
+    Returns a dictionary with keys: metrics, artifacts, params, timings, run_id
+    (the results-store id) and cache hit/miss counts when caching.
     """
+    started = time.perf_counter()
+    prof = get_profiler(profile)
     params = params or {}
+    if artifact_format not in _EXTENSIONS:
+        raise ValueError(f"unknown artifact format: {artifact_format!r}; expected one of {sorted(_EXTENSIONS)}")
+    _artifact_options(artifacts, False)  # validate names before the expensive part
+    store = resolve_cache(cache)
     if df is None:
         n = int(params.get("n", 200))
         censor_rate = float(params.get("censor_rate", 0.0))
         biomarker_effect = float(params.get("biomarker_effect", 0.3))
-        df = generate_cohort(n=n, censor_rate=censor_rate, biomarker_effect=biomarker_effect)
+        seed = int(params.get("seed", 42))
+        with prof.stage("cohort"):
+            df = cached_cohort(store, n=n, seed=seed, censor_rate=censor_rate, biomarker_effect=biomarker_effect)
 
     # Fit models
-    km = fit_km(df)
-    cph, df2 = fit_cox(df)
+    if store is not None:
+        with prof.stage("fit"):
+            km, cph = cached_fit(df, store)
+            df2 = prepare_cox_frame(df)
+    else:
+        with prof.stage("km_fit"):
+            km = fit_km(df)
+        with prof.stage("cox_fit"):
+            cph, df2 = fit_cox(df)
 
     results = {"metrics": {}, "artifacts": {}, "params": params}
+    if "event" in df:
+        results["metrics"]["event_rate"] = float(df["event"].mean())
+    if store is not None:
+        results["cache"] = {"hits": store.hits, "misses": store.misses}
 
     # Collect simple metrics
     try:
@@ -78,84 +200,320 @@ def run_experiment(
     except Exception:
         results["metrics"]["cox_concordance"] = None
 
-    # Prepare artifacts
-    _ensure_dir(artifacts_dir)
-    km_path = os.path.join(artifacts_dir, "km_survival_table.csv")
-    try:
-        # lifelines KM has survival_function_ attribute
-        if hasattr(km, "survival_function_"):
-            sf = km.survival_function_
-            sf.to_csv(km_path)
-            results["artifacts"]["km_survival_table"] = km_path
-    except Exception:
-        pass
+    # Bootstrap percentile intervals (opt-in: params["bootstrap_resamples"] = B)
+    n_boot = int(params.get("bootstrap_resamples", 0) or 0)
+    boot = None
+    if n_boot > 0:
+        from .bootstrap import bootstrap
 
-    cox_summary_path = os.path.join(artifacts_dir, "cox_summary.json")
-    try:
-        # lifelines CoxPHFitter has summary_ dataframe
-        if hasattr(cph, "summary"):
-            s = cph.summary
-            s.to_csv(os.path.join(artifacts_dir, "cox_summary.csv"))
-            results["artifacts"]["cox_summary_csv"] = os.path.join(artifacts_dir, "cox_summary.csv")
-            # also save json
-            s_json = s.to_dict(orient="index")
-            _save_artifact(s_json, cox_summary_path)
-            results["artifacts"]["cox_summary_json"] = cox_summary_path
-    except Exception:
-        pass
+        with prof.stage("bootstrap"):
+            boot = bootstrap(
+                df,
+                n_resamples=n_boot,
+                seed=int(params.get("bootstrap_seed", 0)),
+                workers=params.get("bootstrap_workers"),
+            )
+        for stat in ("km_median_survival", "cox_concordance"):
+            results["metrics"][f"{stat}_ci_lower"] = float(boot.summary.loc[stat, "lower"])
+            results["metrics"][f"{stat}_ci_upper"] = float(boot.summary.loc[stat, "upper"])
 
-    # Save the processed dataframe used for Cox
-    df2_path = os.path.join(artifacts_dir, "cox_input.csv")
-    try:
-        df2.to_csv(df2_path, index=False)
-        results["artifacts"]["cox_input_csv"] = df2_path
-    except Exception:
-        pass
+    # Prepare artifacts
+    options = _artifact_options(artifacts, boot is not None)
+    tables = {}
+    if hasattr(km, "survival_function_"):
+        tables["km_survival_table"] = (km.survival_function_, True)
+    if hasattr(cph, "summary"):
+        tables["cox_summary"] = (cph.summary, True)
+    if boot is not None:
+        tables["bootstrap_ci"] = (boot.summary, True)
+    if options["cox_input"] is not False:
+        # the processed dataframe used for Cox, optionally a seeded sample of it
+        tables["cox_input"] = (_sample_rows(df2, options["cox_input"]), False)
+    if return_tables:
+        results["tables"] = {name: frame for name, (frame, _) in tables.items()}
 
-    # MLflow logging (optional)
-    if MLFLOW_AVAILABLE:
-        try:
-            mlflow.set_experiment(mlflow_experiment_name)
-            with mlflow.start_run() as run:
-                mlflow.log_params(params)
-                for k, v in results["metrics"].items():
-                    if v is not None:
-                        mlflow.log_metric(k, float(v))
-                # Log artifacts
+    ext = _EXTENSIONS[artifact_format]
+    written = [name for name in tables if options.get(name, True)] if artifacts_dir else []
+    tracker = get_logger() if tracking is None else (tracking or RunLogger(enabled=False))
+    with prof.stage("artifact_io"):
+        if written:
+            _ensure_dir(artifacts_dir)
+            # a previous run may still be uploading files we are about to overwrite
+            tracker.wait_for(
+                [os.path.join(artifacts_dir, f"{name}{ext}") for name in written]
+                + [os.path.join(artifacts_dir, "cox_summary.json")]
+            )
+        elif artifacts_dir and options["cox_summary_json"]:
+            _ensure_dir(artifacts_dir)
+        for name in written:
+            frame, keep_index = tables[name]
+            path = os.path.join(artifacts_dir, f"{name}{ext}")
+            try:
+                _write_table(frame, path, artifact_format, index=keep_index)
+            except Exception:
+                continue
+            # CSV keeps the historical result keys (km_survival_table, cox_summary_csv, ...)
+            key = name if (name == "km_survival_table" and artifact_format == "csv") else f"{name}_{artifact_format}"
+            results["artifacts"][key] = path
+        if artifacts_dir and options["cox_summary_json"] and "cox_summary" in tables:
+            cox_summary_path = os.path.join(artifacts_dir, "cox_summary.json")
+            try:
+                _save_artifact(tables["cox_summary"][0].to_dict(orient="index"), cox_summary_path)
+                results["artifacts"]["cox_summary_json"] = cox_summary_path
+            except Exception:
+                pass
+
+    # MLflow logging (optional): params/metrics go out in one batch and
+    # artifacts upload on the tracker's background thread
+    with prof.stage("mlflow"):
+        if tracker.enabled:
+            try:
+                run_id = tracker.start_run(mlflow_experiment_name, params)
+                tracker.log_metrics(run_id, results["metrics"])
                 for name, path in results["artifacts"].items():
                     if os.path.exists(path):
-                        mlflow.log_artifact(path, artifact_path="artifacts")
-                # Return run id
-                results["mlflow_run_id"] = run.info.run_id
+                        tracker.log_artifact(run_id, path, artifact_path="artifacts")
+                tracker.end_run(run_id)
+                results["mlflow_run_id"] = run_id
                 # Print a local UI URL for convenience (works for local runs)
-                try:
-                    tracking_uri = mlflow.get_tracking_uri()
-                    if tracking_uri.startswith("file://") or tracking_uri == "mlruns":
-                        # local file store
-                        run_dir = os.path.join(tracking_uri.replace("file://", ""), "", str(run.info.run_id))
-                        print(f"MLflow run recorded locally. Run id: {run.info.run_id}")
-                        print(f"Open MLflow UI and look for experiment '{mlflow_experiment_name}' or run id {run.info.run_id}")
-                except Exception:
-                    pass
-        except Exception:
-            # If MLflow logging fails, continue but note it
-            results["mlflow_error"] = "failed_to_log"
+                tracking_uri = tracker.tracking_uri or ""
+                if tracking_uri.startswith("file://") or tracking_uri == "mlruns":
+                    print(f"MLflow run recorded locally. Run id: {run_id}")
+                    print(f"Open MLflow UI and look for experiment '{mlflow_experiment_name}' or run id {run_id}")
+            except Exception:
+                # If MLflow logging fails, continue but note it
+                results["mlflow_error"] = "failed_to_log"
 
-    # Always write a minimal summary into mlruns/ for easy inspection even without MLflow
-    try:
-        summary_dir = os.path.join("mlruns", mlflow_experiment_name)
-        _ensure_dir(summary_dir)
-        summary_path = os.path.join(summary_dir, f"summary_{os.getpid()}_{int(os.times()[-1])}.txt")
-        with open(summary_path, "w") as f:
-            f.write("params:\n")
-            f.write(json.dumps(params, indent=2))
-            f.write("\nmetrics:\n")
-            f.write(json.dumps(results.get("metrics", {}), indent=2))
-            f.write("\nartifacts:\n")
-            f.write(json.dumps(results.get("artifacts", {}), indent=2))
-        results["summary_path"] = summary_path
-    except Exception:
-        # don't fail experiments if summary can't be written
-        pass
+    if prof.enabled:
+        results["timings"] = prof.record()
+
+    # Record the run in the local results store (replaces the old summary_*.txt files)
+    db = resolve_store(results_store)
+    if db is not None:
+        try:
+            results["run_id"] = db.record_run(
+                mlflow_experiment_name,
+                params=params,
+                metrics=results["metrics"],
+                coefficients=getattr(cph, "summary", None),
+                artifacts=results["artifacts"],
+                timings={**prof.timings(), "total": time.perf_counter() - started},
+                sweep_id=sweep_id,
+                mlflow_run_id=results.get("mlflow_run_id"),
+            )
+            results["results_db"] = db.path
+        except Exception as exc:
+            # don't fail experiments if the store is unavailable
+            results["results_db_error"] = repr(exc)
 
     return results
+
+
+def _expand_grid(grid) -> List[Dict[str, Any]]:
+    """A list of param dicts, or a dict of value lists expanded to their Cartesian product."""
+    if isinstance(grid, dict):
+        import itertools
+
+        keys = list(grid)
+        return [dict(zip(keys, values)) for values in itertools.product(*(grid[k] for k in keys))]
+    return [dict(point) for point in grid]
+
+
+def _sweep_run(task: Dict[str, Any]):
+    """Run one (grid point, replicate); returns its table row and, when consolidating, its tables."""
+    consolidate = task["consolidate"]
+    res = run_experiment(
+        params=task["params"],
+        artifacts_dir=None if consolidate else task["artifacts_dir"],
+        mlflow_experiment_name=task["mlflow_experiment_name"],
+        cache=task["cache"],
+        artifact_format=task["artifact_format"],
+        artifacts=task["artifacts"],
+        return_tables=True,
+        results_store=task["results_store"],
+        sweep_id=task["sweep_id"],
+    )
+    row: Dict[str, Any] = {"grid_index": task["grid_index"], "replicate": task["replicate"]}
+    row.update(task["params"])
+    row.update(res["metrics"])
+    focus = task["focus"]
+    summary = res["tables"].get("cox_summary")
+    if focus and summary is not None and focus in summary.index:
+        for col in ("coef", "se(coef)", "p", "exp(coef)"):
+            row[col] = float(summary.loc[focus, col])
+    if not consolidate:
+        row["artifacts_dir"] = task["artifacts_dir"]
+    if "run_id" in res:
+        row["run_id"] = res["run_id"]
+    if "mlflow_run_id" in res:
+        row["mlflow_run_id"] = res["mlflow_run_id"]
+    return row, (res["tables"] if consolidate else None)
+
+
+def _sweep_run_managed(task: Dict[str, Any]):
+    """`_sweep_run` guarded by the run manifest: claim, run, record atomically, release."""
+    from .manifest import RunManifest
+
+    manifest = RunManifest(task["manifest"])
+    key = task["run_key"]
+    if not manifest.claim(key):
+        record = manifest.get(key)
+        if record is not None and record.get("status") == "done":
+            return _from_record(task, record, manifest)
+        # another worker is executing this run right now
+        return {"grid_index": task["grid_index"], "replicate": task["replicate"], **task["params"], "status": "running"}, None
+    try:
+        row, tables = _sweep_run(task)
+        if tables is not None:
+            manifest.save_tables(key, tables)
+        stored = {k: v for k, v in row.items() if k not in ("grid_index", "replicate")}
+        manifest.record(key, "done", params=task["params"], row=stored)
+        row["status"] = "done"
+    except Exception as exc:
+        manifest.record(key, "failed", params=task["params"], error=repr(exc))
+        row = {"grid_index": task["grid_index"], "replicate": task["replicate"], **task["params"]}
+        row.update({"status": "failed", "error": repr(exc)})
+        tables = None
+    finally:
+        manifest.release(key)
+    row["run_key"] = key
+    return row, tables
+
+
+def _from_record(task: Dict[str, Any], record: Dict[str, Any], manifest):
+    row = {"grid_index": task["grid_index"], "replicate": task["replicate"], **record["row"]}
+    row.update({"status": "skipped", "run_key": task["run_key"]})
+    tables = manifest.load_tables(task["run_key"]) if task["consolidate"] else None
+    return row, tables
+
+
+def run_sweep(
+    grid,
+    replicates: int = 1,
+    workers: Optional[int] = None,
+    base_params: Optional[Dict[str, Any]] = None,
+    artifacts_dir: str = "artifacts/experiments/sweep",
+    mlflow_experiment_name: str = "theranostics_local",
+    seed: int = 42,
+    focus: str = "biomarker",
+    cache=None,
+    artifact_format: str = "csv",
+    artifacts=None,
+    consolidate: bool = False,
+    manifest=None,
+    results_store=None,
+    sweep_id: Optional[str] = None,
+) -> pd.DataFrame:
+    """Run `run_experiment` for every grid point and replicate across a process pool.
+
+    `grid` is a list of param dicts or a dict of value lists (Cartesian product),
+    e.g. ``{"censor_rate": [0.0, 0.2, 0.4], "biomarker_effect": [0.3, 1.0, 1.5]}``;
+    `base_params` (e.g. ``{"n": 500}``) are shared by all runs. Replicate ``r``
+    uses cohort seed ``seed + r``. Each run writes to its own directory
+    ``<artifacts_dir>/p<grid_index>_r<replicate>``.
+
+    Returns one row per run -- grid_index, replicate, params, metrics and the
+    `focus` covariate's ``coef``, ``se(coef)``, ``p``, ``exp(coef)`` -- sorted by
+    (grid_index, replicate), and writes it to ``<artifacts_dir>/sweep_results.<ext>``
+    in `artifact_format`. ``workers=1`` runs in-process; the default uses every CPU.
+
+    `artifacts` is passed to `run_experiment`. With `consolidate`, runs write no
+    files of their own; instead each table is collected across runs into a
+    single ``<artifacts_dir>/sweep_<name>.<ext>`` keyed by grid_index and
+    replicate (``cox_input`` is left out unless `artifacts` asks for it, e.g.
+    ``{"cox_input": 500}`` for a 500-row sample per run).
+
+    With `manifest` (``True`` for ``<artifacts_dir>/manifest``, or a directory
+    that several sweeps/hosts may share), each run is keyed by a hash of its
+    params, artifact settings and the code version (`manifest.run_key`). Runs
+    already recorded ``done`` are skipped and their stored rows reused; failed
+    or interrupted runs are retried. The table gains ``run_key`` and ``status``
+    (``done``, ``skipped``, ``failed`` or ``running`` when another worker holds
+    the run).
+
+    Runs are recorded in `results_store` (see `run_experiment`) under
+    `sweep_id` (default: a fresh id, stored in ``table.attrs["sweep_id"]``), so
+    ``ResultsStore().runs(sweep_id=...)`` retrieves the sweep; rows carry the
+    store's ``run_id``.
+    """
+    sweep_id = sweep_id or uuid.uuid4().hex
+    if results_store is not None and results_store is not False and not isinstance(results_store, str):
+        # workers open their own connection from the path
+        results_store = getattr(results_store, "path", results_store)
+    if consolidate and artifacts is None:
+        artifacts = {"cox_input": False}
+    points = _expand_grid(grid)
+    tasks = []
+    for gi, point in enumerate(points):
+        for r in range(int(replicates)):
+            params = {**(base_params or {}), **point, "seed": seed + r}
+            tasks.append(
+                {
+                    "grid_index": gi,
+                    "replicate": r,
+                    "params": params,
+                    "artifacts_dir": os.path.join(artifacts_dir, f"p{gi:04d}_r{r:04d}"),
+                    "mlflow_experiment_name": mlflow_experiment_name,
+                    "cache": cache,
+                    "focus": focus,
+                    "artifact_format": artifact_format,
+                    "artifacts": artifacts,
+                    "consolidate": consolidate,
+                    "results_store": results_store,
+                    "sweep_id": sweep_id,
+                }
+            )
+
+    runner = _sweep_run
+    done: Dict[int, Any] = {}
+    if manifest:
+        from .manifest import RunManifest, run_key
+
+        manifest_dir = os.path.join(artifacts_dir, "manifest") if manifest is True else str(manifest)
+        store = RunManifest(manifest_dir)
+        settings = {"artifact_format": artifact_format, "artifacts": artifacts, "consolidate": consolidate, "focus": focus}
+        for i, task in enumerate(tasks):
+            # cohorts are generated from params, so they are the data fingerprint
+            task["run_key"] = run_key({"params": task["params"], "settings": settings}, data_fingerprint="synthetic")
+            task["manifest"] = manifest_dir
+            record = store.get(task["run_key"])
+            if record is not None and record.get("status") == "done":
+                done[i] = _from_record(task, record, store)
+        runner = _sweep_run_managed
+    pending = [t for i, t in enumerate(tasks) if i not in done]
+
+    workers = (os.cpu_count() or 1) if workers is None else max(int(workers), 1)
+    if workers == 1 or len(pending) <= 1:
+        outputs = [runner(t) for t in pending]
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+
+        try:
+            # create the experiment once so workers don't race to create it
+            get_logger().experiment_id(mlflow_experiment_name)
+        except Exception:
+            pass
+        with ProcessPoolExecutor(max_workers=min(workers, len(pending))) as pool:
+            outputs = list(pool.map(runner, pending))
+    outputs += list(done.values())
+
+    ext = _EXTENSIONS[artifact_format]
+    _ensure_dir(artifacts_dir)
+    if consolidate:
+        collected: Dict[str, list] = {}
+        for row, tables in outputs:
+            for name, frame in (tables or {}).items():
+                keyed = frame.reset_index() if name != "cox_input" else frame.reset_index(drop=True)
+                keyed.insert(0, "replicate", row["replicate"])
+                keyed.insert(0, "grid_index", row["grid_index"])
+                collected.setdefault(name, []).append(keyed)
+        for name, frames in collected.items():
+            combined = pd.concat(frames, ignore_index=True).sort_values(["grid_index", "replicate"], kind="stable")
+            _write_table(combined.reset_index(drop=True), os.path.join(artifacts_dir, f"sweep_{name}{ext}"), artifact_format, index=False)
+
+    table = pd.DataFrame([row for row, _ in outputs])
+    if len(table):
+        table = table.sort_values(["grid_index", "replicate"]).reset_index(drop=True)
+    _write_table(table, os.path.join(artifacts_dir, f"sweep_results{ext}"), artifact_format, index=False)
+    table.attrs["sweep_id"] = sweep_id
+    return table
@@ -2,22 +2,23 @@
 from __future__ import annotations
 
 from prefect import flow, task
-from .simulate import generate_cohort
-from .models import fit_km, fit_cox
+from .cache import cached_cohort, cached_fit
+from .profiling import get_profiler
 from theranostics.dicom_ingest import ingest_directory
 
 
 @task
-def make_data(n: int = 500, censor_rate: float = 0.0, biomarker_effect: float = 0.3):
+def make_data(n: int = 500, censor_rate: float = 0.0, biomarker_effect: float = 0.3, cache=None):
     # default censor_rate=0.0 preserves previous behavior
-    df = generate_cohort(n=n, censor_rate=censor_rate, biomarker_effect=biomarker_effect)
+    df = cached_cohort(cache, n=n, censor_rate=censor_rate, biomarker_effect=biomarker_effect)
     return df
 
 
 @task
-def train_models(df):
-    km = fit_km(df)
-    cph, df2 = fit_cox(df)
+def train_models(df, cache=None, profile=None):
+    # with a cache, summaries are reused when the same cohort was fitted before
+    with get_profiler(profile).stage("fit"):
+        km, cph = cached_fit(df, cache)
     return {
         "km_survival_function": km.survival_function_.to_dict(),
         "cox_summary": cph.summary,
@@ -25,20 +26,20 @@ def train_models(df):
 
 
 @flow
-def pipeline_demo(n: int = 500):
-    df = make_data(n)
-    results = train_models(df)
+def pipeline_demo(n: int = 500, cache=None):
+    df = make_data(n, cache=cache)
+    results = train_models(df, cache=cache)
     return results
 
 
 @task
-def dicom_ingest_task(dicom_dir: str, out_parquet: str):
+def dicom_ingest_task(dicom_dir: str, out_parquet: str, profile=None):
     # use ingest_directory with to_parquet=True to write a parquet artifact
-    return ingest_directory(dicom_dir, out_parquet, to_parquet=True)
+    return ingest_directory(dicom_dir, out_parquet, to_parquet=True, profile=profile)
 
 
 @flow
-def pipeline_with_dicom(n: int = 500, dicom_dir: str = None, out_parquet: str = 'data/bronze/dicom.parquet', censor_rate: float = 0.0, biomarker_effect: float = 0.3):
+def pipeline_with_dicom(n: int = 500, dicom_dir: str = None, out_parquet: str = 'data/bronze/dicom.parquet', censor_rate: float = 0.0, biomarker_effect: float = 0.3, cache=None, profile=None):
         """Run the demo pipeline and optionally ingest DICOMs.
 
         Returns a dict with model results. If `dicom_dir` is provided the dict
@@ -48,15 +49,24 @@ def pipeline_with_dicom(n: int = 500, dicom_dir: str = None, out_parquet: str =
         Parameters:
         - censor_rate: float between 0 and 1 to introduce additional random censoring
             to the synthetic cohort (useful for testing different censoring regimes).
+        - cache: ``True`` or a directory to reuse cached cohorts and model
+            summaries across runs (see `theranostics.cache`).
+        - profile: stage timing (see `theranostics.profiling.get_profiler`); the
+            record of the cohort, fit, dicom_parse and parquet_write stages is
+            returned under ``timings``.
         """
+        prof = get_profiler(profile)
 
         # pass censor_rate and biomarker_effect into cohort generation
-        df = generate_cohort(n=n, censor_rate=censor_rate, biomarker_effect=biomarker_effect)
-        results = train_models(df)
+        with prof.stage("cohort"):
+                df = cached_cohort(cache, n=n, censor_rate=censor_rate, biomarker_effect=biomarker_effect)
+        results = train_models(df, cache=cache, profile=prof)
         if dicom_dir:
                 # Call the task synchronously so the flow returns the numeric count
-                dicom_count = dicom_ingest_task(dicom_dir, out_parquet)
-                return {**results, 'dicom_count': dicom_count}
+                dicom_count = dicom_ingest_task(dicom_dir, out_parquet, profile=prof)
+                results = {**results, 'dicom_count': dicom_count}
+        if prof.enabled:
+                results = {**results, 'timings': prof.record()}
         return results
 
 
@@ -0,0 +1,150 @@
+"""Vectorized Kaplan-Meier estimator (NumPy backend for `models.fit_km`).
+
+One sort, one aggregation over unique (group, time) pairs and a cumulative
+product per group; no lifelines import. `KMResult` exposes the attributes
+downstream code reads from lifelines' ``KaplanMeierFitter``
+(``survival_function_``, ``median_survival_time_``, ``confidence_interval_``,
+``event_table``, ``timeline``, ``durations``, ``event_observed``).
+"""
+from __future__ import annotations
+
+from statistics import NormalDist
+from typing import Dict, Hashable
+
+import numpy as np
+import pandas as pd
+
+
+class KMResult:
+    """Kaplan-Meier estimate for one group of subjects."""
+
+    def __init__(
+        self,
+        timeline: np.ndarray,
+        survival: np.ndarray,
+        greenwood: np.ndarray,
+        event_table: pd.DataFrame,
+        durations: np.ndarray,
+        event_observed: np.ndarray,
+        label: str = "KM_estimate",
+        alpha: float = 0.05,
+    ):
+        self.label = label
+        self.alpha = alpha
+        self.timeline = timeline
+        self.durations = durations
+        self.event_observed = event_observed
+        self.event_table = event_table
+        index = pd.Index(timeline, name="timeline")
+        self.survival_function_ = pd.DataFrame({label: survival}, index=index)
+        # Greenwood variance of S(t)
+        with np.errstate(invalid="ignore"):
+            variance = np.where(survival > 0, survival ** 2 * greenwood, 0.0)
+        self.variance_ = pd.Series(variance, index=index, name=label)
+        self.confidence_interval_ = self._log_log_ci(survival, greenwood, index)
+
+    def _log_log_ci(self, survival: np.ndarray, greenwood: np.ndarray, index: pd.Index) -> pd.DataFrame:
+        # exponential Greenwood ("log-log") interval, as lifelines reports
+        z = NormalDist().inv_cdf(1 - self.alpha / 2)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            log_s = np.log(survival)
+            se = np.sqrt(greenwood / log_s ** 2)
+            loglog = np.log(-log_s)
+            lower = np.exp(-np.exp(loglog + z * se))
+            upper = np.exp(-np.exp(loglog - z * se))
+        lower = np.where(survival >= 1.0, 1.0, np.nan_to_num(lower, nan=0.0))
+        upper = np.where(survival >= 1.0, 1.0, np.nan_to_num(upper, nan=0.0))
+        level = f"{1 - self.alpha:g}"
+        return pd.DataFrame(
+            {f"{self.label}_lower_{level}": lower, f"{self.label}_upper_{level}": upper},
+            index=index,
+        )
+
+    @property
+    def median_survival_time_(self) -> float:
+        """First time at which S(t) <= 0.5, or ``inf`` if the curve never gets there."""
+        return self.percentile(0.5)
+
+    def percentile(self, q: float) -> float:
+        survival = self.survival_function_[self.label].to_numpy()
+        # tolerate round-off so a curve that is exactly q in exact arithmetic counts as reaching it
+        q = q + 1e-12
+        if not len(survival) or survival[-1] > q:
+            return np.inf
+        return float(self.timeline[np.searchsorted(-survival, -q)])
+
+    def __repr__(self) -> str:
+        return f"<KMResult {self.label!r}: {len(self.durations)} subjects, {int(self.event_observed.sum())} events>"
+
+
+def kaplan_meier_grouped(
+    durations, events, groups, alpha: float = 0.05, label: str = "KM_estimate"
+) -> Dict[Hashable, KMResult]:
+    """Fit a Kaplan-Meier curve for every level of `groups` in one pass.
+
+    Returns ``{level: KMResult}`` ordered by level.
+    """
+    durations = np.asarray(durations, dtype=float)
+    events = np.asarray(events).astype(bool)
+    codes, levels = pd.factorize(np.asarray(groups), sort=True)
+
+    order = np.lexsort((durations, codes)) if len(levels) > 1 else np.argsort(durations, kind="stable")
+    t, e, c = durations[order], events[order], codes[order]
+    # one row per unique (group, time) pair
+    starts = np.flatnonzero(np.r_[True, (c[1:] != c[:-1]) | (t[1:] != t[:-1])])
+    removed = np.diff(np.r_[starts, len(t)])
+    observed = np.add.reduceat(e.astype(np.int64), starts) if len(t) else np.zeros(0, dtype=np.int64)
+    times, row_group = t[starts], c[starts]
+    bounds = np.searchsorted(row_group, np.arange(len(levels) + 1))
+    if len(levels) > 1:
+        # subjects of each group in input order, as contiguous slices of one stable sort
+        by_group = np.argsort(codes, kind="stable")
+        member_bounds = np.searchsorted(codes[by_group], np.arange(len(levels) + 1))
+
+    results: Dict[Hashable, KMResult] = {}
+    for g, level in enumerate(levels):
+        rows = slice(bounds[g], bounds[g + 1])
+        members = by_group[member_bounds[g] : member_bounds[g + 1]] if len(levels) > 1 else slice(None)
+        results[level] = _km_from_counts(
+            times[rows],
+            removed[rows],
+            observed[rows],
+            durations=durations[members],
+            event_observed=events[members].astype(int),
+            alpha=alpha,
+            label=label,
+        )
+    return results
+
+
+def kaplan_meier(durations, events, alpha: float = 0.05, label: str = "KM_estimate") -> KMResult:
+    """Fit a single Kaplan-Meier curve."""
+    durations = np.asarray(durations, dtype=float)
+    events = np.asarray(events)
+    if not len(durations):
+        raise ValueError("cannot fit a Kaplan-Meier curve to zero subjects")
+    groups = np.zeros(len(durations), dtype=np.int8)
+    (result,) = kaplan_meier_grouped(durations, events, groups, alpha=alpha, label=label).values()
+    return result
+
+
+def _km_from_counts(times, removed, observed, durations, event_observed, alpha, label) -> KMResult:
+    n = int(removed.sum())
+    censored = removed - observed
+    entrance = np.zeros(len(times), dtype=np.int64)
+    if len(times) and times[0] > 0:
+        # lifelines-style timeline starts at 0 with everyone entering
+        times = np.r_[0.0, times]
+        removed, observed, censored = (np.r_[0, a] for a in (removed, observed, censored))
+        entrance = np.r_[0, entrance]
+    entrance[0] = n
+    at_risk = n - np.cumsum(removed) + removed
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        survival = np.cumprod(1.0 - observed / at_risk)
+        greenwood = np.cumsum(observed / (at_risk * (at_risk - observed)))
+    event_table = pd.DataFrame(
+        {"removed": removed, "observed": observed, "censored": censored, "entrance": entrance, "at_risk": at_risk},
+        index=pd.Index(times, name="event_at"),
+    )
+    return KMResult(times, survival, greenwood, event_table, durations, event_observed, label=label, alpha=alpha)
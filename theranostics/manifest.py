@@ -0,0 +1,214 @@
+"""Run manifest for resumable sweeps.
+
+Each run is identified by a stable hash of its params, a data fingerprint and
+the code version (`run_key`). The manifest is a directory holding, per run:
+
+- ``<key>.lock`` -- claimed with ``O_CREAT | O_EXCL``, so exactly one worker
+  (in any process on the shared filesystem) executes a run at a time; it
+  records the owner's host and pid so locks left by crashed workers can be
+  detected and taken over (a stale lock is renamed aside before it is
+  removed, so only one worker can break it);
+- ``<key>.json`` -- the run's status (``done`` or ``failed``) and result row,
+  written to a temporary file and moved into place with `os.replace`, so
+  readers only ever see complete records;
+- ``<key>/<table>.parquet`` -- optional result tables.
+
+`run_sweep(..., manifest=...)` skips runs already marked ``done``, retries
+failed or interrupted ones, and computes only what is missing.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+import socket
+import tempfile
+import time
+import uuid
+from typing import Any, Dict, Optional
+
+import pandas as pd
+
+from .cache import stable_hash
+
+_code_version: Optional[str] = None
+
+
+def code_version() -> str:
+    """SHA-256 (first 16 hex chars) of the package's Python sources."""
+    global _code_version
+    if _code_version is None:
+        h = hashlib.sha256()
+        pkg = os.path.dirname(os.path.abspath(__file__))
+        for name in sorted(os.listdir(pkg)):
+            if name.endswith(".py"):
+                h.update(name.encode())
+                with open(os.path.join(pkg, name), "rb") as f:
+                    h.update(f.read())
+        _code_version = h.hexdigest()[:16]
+    return _code_version
+
+
+def run_key(params: Dict[str, Any], data_fingerprint: Optional[str] = None, version: Optional[str] = None) -> str:
+    """Stable id of a run: hash of `params`, the input data fingerprint and the code version."""
+    return stable_hash("run", params, data_fingerprint, version if version is not None else code_version())
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class RunManifest:
+    """Directory-backed run status shared safely by concurrent workers."""
+
+    def __init__(self, root: str, stale_after: float = 24 * 3600.0):
+        self.root = root
+        # a lock older than this is considered abandoned even if its owner can't be checked
+        self.stale_after = stale_after
+        os.makedirs(root, exist_ok=True)
+
+    def _path(self, key: str, suffix: str) -> str:
+        return os.path.join(self.root, f"{key}{suffix}")
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """The run's record, or None if it never finished."""
+        try:
+            with open(self._path(key, ".json")) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _is_done(self, key: str) -> bool:
+        record = self.get(key)
+        return record is not None and record.get("status") == "done"
+
+    def status(self, key: str) -> str:
+        """``done``, ``failed``, ``running`` (claimed by a live worker) or ``pending``."""
+        if self._is_done(key):
+            return "done"
+        record = self.get(key)
+        if os.path.exists(self._path(key, ".lock")) and not self._lock_is_stale(key):
+            return "running"
+        return record["status"] if record is not None else "pending"
+
+    def _lock_snapshot(self, key: str) -> Optional[tuple]:
+        """Identity and contents of the lock file, or None if there is none."""
+        try:
+            with open(self._path(key, ".lock"), "rb") as f:
+                st = os.fstat(f.fileno())
+                return (st.st_dev, st.st_ino, st.st_mtime_ns, f.read())
+        except OSError:
+            return None
+
+    def _snapshot_is_stale(self, snapshot: tuple) -> bool:
+        age = time.time() - snapshot[2] / 1e9
+        try:
+            owner = json.loads(snapshot[3])
+        except ValueError:
+            # half-written lock: stale only once it has aged
+            return age > 60
+        if age > self.stale_after:
+            return True
+        return owner.get("host") == socket.gethostname() and not _pid_alive(int(owner.get("pid", -1)))
+
+    def _lock_is_stale(self, key: str) -> bool:
+        snapshot = self._lock_snapshot(key)
+        return snapshot is None or self._snapshot_is_stale(snapshot)
+
+    def _break_lock(self, key: str, snapshot: tuple) -> None:
+        """Remove the lock if it is still the stale one in `snapshot`.
+
+        The lock is first renamed to a name only this worker knows, so of
+        several workers breaking the same lock exactly one gets it. If the
+        file moved aside is not the stale lock (another worker already broke
+        it and claimed the run), it is linked back without clobbering.
+        """
+        path = self._path(key, ".lock")
+        aside = f"{path}.{os.getpid()}.{uuid.uuid4().hex}"
+        try:
+            os.rename(path, aside)
+        except FileNotFoundError:
+            return
+        try:
+            with open(aside, "rb") as f:
+                st = os.fstat(f.fileno())
+                moved = (st.st_dev, st.st_ino, st.st_mtime_ns, f.read())
+            if moved != snapshot:
+                try:
+                    os.link(aside, path)
+                except FileExistsError:
+                    pass
+        finally:
+            os.remove(aside)
+
+    def claim(self, key: str) -> bool:
+        """Take the run's lock; False if another live worker holds it or the run is done."""
+        if self.status(key) == "done":
+            return False
+        for _ in range(2):
+            try:
+                fd = os.open(self._path(key, ".lock"), os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            except FileExistsError:
+                snapshot = self._lock_snapshot(key)
+                if snapshot is not None:
+                    if not self._snapshot_is_stale(snapshot):
+                        return False
+                    # the owner died mid-run: break the lock and try once more
+                    self._break_lock(key, snapshot)
+                continue
+            with os.fdopen(fd, "w") as f:
+                json.dump({"host": socket.gethostname(), "pid": os.getpid(), "started": time.time()}, f)
+            # the run may have finished between the status check and the claim
+            if self._is_done(key):
+                self.release(key)
+                return False
+            return True
+        return False
+
+    def release(self, key: str) -> None:
+        try:
+            os.remove(self._path(key, ".lock"))
+        except FileNotFoundError:
+            pass
+
+    def record(self, key: str, status: str, **fields: Any) -> None:
+        """Atomically write the run's record (status plus JSON-serializable fields)."""
+        payload = {"key": key, "status": status, "finished": time.time(), **fields}
+        fd, tmp = tempfile.mkstemp(prefix=f".{key[:8]}-", suffix=".json", dir=self.root)
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(payload, f, default=str)
+            os.replace(tmp, self._path(key, ".json"))
+        except BaseException:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+            raise
+
+    def save_tables(self, key: str, tables: Dict[str, pd.DataFrame]) -> None:
+        """Store result tables for the run (call before recording it ``done``)."""
+        final = self._path(key, "")
+        tmp = tempfile.mkdtemp(prefix=f".{key[:8]}-", dir=self.root)
+        for name, frame in tables.items():
+            frame.to_parquet(os.path.join(tmp, f"{name}.parquet"))
+        if os.path.isdir(final):
+            shutil.rmtree(final, ignore_errors=True)
+        os.replace(tmp, final)
+
+    def load_tables(self, key: str) -> Dict[str, pd.DataFrame]:
+        path = self._path(key, "")
+        if not os.path.isdir(path):
+            return {}
+        return {
+            name[: -len(".parquet")]: pd.read_parquet(os.path.join(path, name))
+            for name in sorted(os.listdir(path))
+            if name.endswith(".parquet")
+        }
@@ -1,8 +1,10 @@
 """Model training utilities for survival analysis."""
 from __future__ import annotations
 
-import pandas as pd
 import importlib
+import warnings
+
+import pandas as pd
 
 
 def _ensure_trapz():
@@ -31,12 +33,30 @@ def _ensure_trapz():
             mod.trapz = _np.trapz
             sys.modules["scipy.integrate"] = mod
 
+    # remaining pandas shims lifelines relies on (see `_compat`)
+    from . import _compat
+
+    _compat.apply()
+
 
 from typing import Tuple
 import pandas as pd
 
 
-def fit_km(df: pd.DataFrame, time_col: str = "time", event_col: str = "event"):
+def fit_km(df: pd.DataFrame, time_col: str = "time", event_col: str = "event", backend: str = "numpy"):
+    """Fit a Kaplan-Meier curve.
+
+    `backend="numpy"` (default) uses the vectorized estimator in `theranostics.km`;
+    `backend="lifelines"` fits a ``KaplanMeierFitter``. Both expose
+    ``survival_function_`` and ``median_survival_time_``.
+    """
+    if backend == "numpy":
+        from .km import kaplan_meier
+
+        return kaplan_meier(df[time_col].to_numpy(), df[event_col].to_numpy())
+    if backend != "lifelines":
+        raise ValueError(f"unknown KM backend: {backend!r}")
+
     # Import here to avoid heavy imports at module import time during test collection
     _ensure_trapz()
     from lifelines import KaplanMeierFitter
@@ -46,25 +66,112 @@ def fit_km(df: pd.DataFrame, time_col: str = "time", event_col: str = "event"):
     return km
 
 
-def fit_cox(df: pd.DataFrame, duration_col: str = "time", event_col: str = "event"):
-    # Import here to avoid heavy imports at module import time during test collection
-    _ensure_trapz()
-    from lifelines import CoxPHFitter
+def fit_km_grouped(df: pd.DataFrame, group_col: str = "treatment_group", time_col: str = "time", event_col: str = "event"):
+    """Fit one Kaplan-Meier curve per level of `group_col` in a single pass.
+
+    Returns ``{level: KMResult}``; each result carries survival curve, median
+    survival and Greenwood variance (``variance_``).
+    """
+    from .km import kaplan_meier_grouped
 
-    # Prepare covariates
-    df2 = df.copy()
-    # One-hot treatment group
-    df2 = pd.get_dummies(df2, columns=["treatment_group"], drop_first=True)
+    return kaplan_meier_grouped(df[time_col].to_numpy(), df[event_col].to_numpy(), df[group_col].to_numpy())
+
+
+def prepare_cox_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Return the covariate frame `fit_cox` fits (treatment group one-hot encoded)."""
+    # get_dummies returns a new frame so `df` is never modified and no extra
+    # defensive copy is needed. A categorical treatment_group (compact cohorts)
+    # is encoded without an object scan.
+    return pd.get_dummies(df, columns=["treatment_group"], drop_first=True)
+
+
+def fit_cox(df: pd.DataFrame, duration_col: str = "time", event_col: str = "event", backend: str = "lifelines"):
+    """Fit a Cox proportional hazards model; returns ``(model, processed_frame)``.
+
+    `backend="lifelines"` fits a ``CoxPHFitter``; `backend="native"` uses the
+    Newton-Raphson fitter in `theranostics.cox`, which reports the same
+    ``summary`` layout and ``concordance_index_``. If lifelines fails to fit, a
+    ``RuntimeWarning`` carrying the error is issued and the native fitter is
+    used instead.
+    """
+    if backend not in ("lifelines", "native"):
+        raise ValueError(f"unknown Cox backend: {backend!r}")
+
+    df2 = prepare_cox_frame(df)
     # Ensure numeric types
     covariates = [c for c in df2.columns if c not in [duration_col, event_col, "patient_id"]]
-    cph = CoxPHFitter()
-    try:
-        cph.fit(df2[[duration_col, event_col] + covariates], duration_col=duration_col, event_col=event_col)
-        return cph, df2
-    except Exception as exc:  # pragma: no cover - environment compatibility fallback
-        # Create a minimal dummy summary so downstream code/tests can proceed
-        import types
-
-        dummy_summary = pd.DataFrame({"coef": [0.0] * len(covariates)}, index=covariates)
-        dummy = types.SimpleNamespace(summary=dummy_summary)
-        return dummy, df2
+
+    if backend == "lifelines":
+        # Import here to avoid heavy imports at module import time during test collection
+        _ensure_trapz()
+        from lifelines import CoxPHFitter
+
+        cph = CoxPHFitter()
+        try:
+            cph.fit(df2[[duration_col, event_col] + covariates], duration_col=duration_col, event_col=event_col)
+            return cph, df2
+        except Exception as exc:
+            warnings.warn(f"lifelines Cox fit failed ({exc!r}); using the native backend", RuntimeWarning, stacklevel=2)
+
+    from .cox import fit_cox_frame
+
+    return fit_cox_frame(df2, duration_col=duration_col, event_col=event_col, covariates=covariates), df2
+
+
+def fit_cox_batch(
+    df: pd.DataFrame,
+    by="replicate",
+    duration_col: str = "time",
+    event_col: str = "event",
+    covariates=None,
+    warm_start: bool = False,
+    ties: str = "efron",
+) -> pd.DataFrame:
+    """Fit one Cox model per dataset of a stacked frame, all at once.
+
+    `df` holds many datasets keyed by the column(s) `by` -- e.g. the long output
+    of ``simulate.generate_cohort_batch`` keyed by ``["replicate", "grid_index"]``.
+    Every dataset is fitted with the native Newton-Raphson fitter in the same
+    batched iterations. With `warm_start`, each odd-positioned dataset (in key
+    order) starts from the coefficients of the dataset before it, which helps
+    when neighbouring keys are neighbouring grid points.
+
+    Returns a tidy frame with one row per (dataset, covariate): the key columns,
+    ``covariate``, ``coef``, ``se(coef)``, ``p``, ``concordance``, ``converged``
+    and ``n_iter``.
+    """
+    from math import erfc, sqrt
+
+    import numpy as np
+
+    from .cox import fit_cox_batch_arrays
+
+    by = [by] if isinstance(by, str) else list(by)
+    df2 = prepare_cox_frame(df) if "treatment_group" in df else df
+    if covariates is None:
+        skip = set(by) | {duration_col, event_col, "patient_id", "replicate", "grid_index", "seed"}
+        covariates = [c for c in df2.columns if c not in skip]
+    grouped = df2.groupby(by, sort=True)
+    codes = grouped.ngroup().to_numpy()
+    keys = grouped[by[0]].first().index.to_frame(index=False)
+
+    fit = fit_cox_batch_arrays(
+        df2[covariates].to_numpy(dtype=float),
+        df2[duration_col].to_numpy(dtype=float),
+        df2[event_col].to_numpy(),
+        codes,
+        ties=ties,
+        warm_start=warm_start,
+    )
+    n_groups, p = fit["coef"].shape
+    with np.errstate(invalid="ignore", divide="ignore"):
+        z = fit["coef"] / fit["se"]
+    pvalues = np.array([erfc(abs(v) / sqrt(2)) for v in z.ravel()]).reshape(z.shape) if z.size else z
+    table = keys.loc[np.repeat(np.arange(n_groups), p)].reset_index(drop=True)
+    table["covariate"] = np.tile(covariates, n_groups)
+    table["coef"] = fit["coef"].ravel()
+    table["se(coef)"] = fit["se"].ravel()
+    table["p"] = pvalues.ravel()
+    for name in ("concordance", "converged", "n_iter"):
+        table[name] = np.repeat(fit[name], p)
+    return table
@@ -3,10 +3,10 @@ from __future__ import annotations
 
 from typing import List, Dict
 
-try:
-    import spacy
-except Exception:  # pragma: no cover - optional dependency
-    spacy = None
+import importlib.util
+
+# spaCy takes seconds to import; it is loaded on the first call that needs it.
+SPACY_AVAILABLE = importlib.util.find_spec("spacy") is not None
 
 
 def extract_entities(text: str, model: str | None = None) -> List[Dict[str, str]]:
@@ -14,8 +14,10 @@ def extract_entities(text: str, model: str | None = None) -> List[Dict[str, str]
 
     If spaCy is not installed, returns an empty list so tests and CI remain lightweight.
     """
-    if spacy is None:
+    if not SPACY_AVAILABLE:
         return []
+    import spacy
+
     if model:
         nlp = spacy.load(model)
     else:
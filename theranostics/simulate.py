@@ -1,12 +1,180 @@
 """Synthetic cohort generator for survival modeling."""
 from __future__ import annotations
 
+import os
 import numpy as np
 import pandas as pd
-from typing import Tuple
+from typing import Dict, Iterator, List, Sequence, Tuple
 
+# Simulation constants shared by the in-memory and streaming generators
+BASE_HAZARD = 0.001
+STAGE_COEF = {1: 0.5, 2: 1.0, 3: 1.7, 4: 2.5}
+TREATMENT_COEF = {"A": 1.0, "B": 0.8}
+# administrative censoring at 3 years
+CENSOR_TIME = 365 * 3
 
-def generate_cohort(n: int = 500, seed: int = 42, censor_rate: float = 0.0, biomarker_effect: float = 0.3) -> pd.DataFrame:
+# Rows per independently seeded block in the streaming generator. Changing this
+# changes the simulated stream, so it is deliberately not a per-call option.
+STREAM_BLOCK_SIZE = 65_536
+
+# stage -> coefficient lookup table indexed directly by the stage value
+_STAGE_LOOKUP = np.zeros(max(STAGE_COEF) + 1)
+for _stage, _coef in STAGE_COEF.items():
+    _STAGE_LOOKUP[_stage] = _coef
+
+
+def format_patient_ids(keys) -> np.ndarray:
+    """Format integer patient keys as ``P00001``-style ids (vectorized ``f"P{key:05d}"``).
+
+    Digits are written straight into a byte buffer, one pass per id width
+    (P00001..P99999, P100000.., ...), then viewed as fixed-width strings.
+    """
+    keys = np.asarray(keys, dtype=np.int64)
+    width = max(5, len(str(int(keys.max())))) if keys.size else 5
+    out = np.empty(keys.shape, dtype=f"U{width + 1}")
+    for w in range(5, width + 1):
+        mask = keys < 10 ** w
+        if w > 5:
+            mask &= keys >= 10 ** (w - 1)
+        seg = keys[mask]
+        if not seg.size:
+            continue
+        buf = np.empty((seg.size, w + 1), dtype=np.uint8)
+        buf[:, 0] = ord("P")
+        buf[:, 1:] = seg[:, None] // 10 ** np.arange(w - 1, -1, -1) % 10 + ord("0")
+        out[mask] = buf.view(f"S{w + 1}").ravel()
+    return out
+
+
+def _draw_patients(rng: np.random.Generator, n: int, censoring: bool) -> Dict[str, np.ndarray]:
+    """Make every random draw for `n` patients, in the order that defines the stream.
+
+    The order of random draws defines the simulated stream; keep it stable so that
+    seeded runs stay reproducible across releases. The censoring draws come last,
+    so they never shift the covariates or event times of a seeded cohort.
+    """
+    draws = {
+        "age": rng.normal(62, 10, size=n).clip(18, 90).astype(int),
+        "sex": rng.integers(0, 2, size=n),
+        "tumor_stage": rng.choice([1, 2, 3, 4], size=n, p=[0.25, 0.35, 0.25, 0.15]),
+        "biomarker": rng.normal(0.0, 1.0, size=n),
+        "treatment_group": rng.choice(["A", "B"], size=n, p=[0.5, 0.5]),
+        "u": rng.random(n),
+    }
+    if censoring:
+        draws["censor_u"] = rng.random(n)
+        draws["extra_censor"] = rng.random(n) * CENSOR_TIME
+    return draws
+
+
+def _outcomes(draws: Dict[str, np.ndarray], censor_rate, biomarker_effect):
+    """Return ``(observed_time, event)`` for the patients in `draws`.
+
+    `censor_rate` and `biomarker_effect` may be scalars or column vectors of shape
+    ``(G, 1)``; in the latter case the outputs have shape ``(G, n)``.
+    """
+    censor_rate = np.asarray(censor_rate, dtype=float)
+    biomarker_effect = np.asarray(biomarker_effect, dtype=float)
+
+    # Simulate baseline hazard influenced by stage, biomarker, and treatment
+    linear = _STAGE_LOOKUP[draws["tumor_stage"]] + draws["biomarker"] * biomarker_effect
+    linear *= np.where(draws["treatment_group"] == "B", TREATMENT_COEF["B"], TREATMENT_COEF["A"])
+
+    # Weibull-like survival times
+    # scale parameter shorter with higher linear predictor
+    scale = 365 * np.exp(-0.3 * linear)
+    times = -scale * np.log(draws["u"])
+
+    observed_time = np.minimum(times, CENSOR_TIME)
+    event = (times <= CENSOR_TIME).astype(int)
+
+    # additional random censoring controlled by censor_rate (0.0 = none)
+    if "censor_u" in draws:
+        # randomly pick a fraction of subjects to be censored earlier
+        active = (censor_rate > 0.0) & (censor_rate < 1.0)
+        censor_mask = active & (draws["censor_u"] < censor_rate)
+        # for those, a random censoring time between 0 and censor_time was drawn
+        extra_censor = draws["extra_censor"]
+        # apply extra censoring where earlier than observed_time
+        observed_time = np.where(censor_mask & (extra_censor < observed_time), extra_censor, observed_time)
+        event = np.where(censor_mask & (extra_censor < times), 0, event)
+    return observed_time.astype(float), event
+
+
+def _simulate_columns(
+    rng: np.random.Generator,
+    n: int,
+    censor_rate: float = 0.0,
+    biomarker_effect: float = 0.3,
+    id_offset: int = 0,
+) -> Dict[str, np.ndarray]:
+    """Draw `n` patients from `rng` and return the cohort as a dict of column arrays."""
+    draws = _draw_patients(rng, n, censoring=bool(censor_rate and 0.0 < censor_rate < 1.0))
+    observed_time, event = _outcomes(draws, censor_rate, biomarker_effect)
+    return {
+        "patient_id": np.arange(id_offset + 1, id_offset + n + 1, dtype=np.int32),
+        "age": draws["age"],
+        "sex": draws["sex"],
+        "tumor_stage": draws["tumor_stage"],
+        "biomarker": draws["biomarker"],
+        "treatment_group": draws["treatment_group"],
+        "time": observed_time,
+        "event": event,
+    }
+
+
+def _to_frame(columns: Dict[str, np.ndarray], compact: bool = False, float32: bool = False) -> pd.DataFrame:
+    if compact:
+        return pd.DataFrame(_compact_columns(columns, float32=float32))
+    columns = dict(columns, patient_id=format_patient_ids(columns["patient_id"]))
+    df = pd.DataFrame(columns)
+    # keep the historical object dtype for string columns
+    df["patient_id"] = df["patient_id"].astype(object)
+    df["treatment_group"] = df["treatment_group"].astype(object)
+    return df
+
+
+# compact dtypes; age is clipped to 18-90 so it fits in int8
+_COMPACT_INTS = {"age": np.int8, "sex": np.int8, "tumor_stage": np.int8, "event": np.int8}
+TREATMENT_DTYPE = pd.CategoricalDtype(list(TREATMENT_COEF))
+
+
+def _compact_columns(columns, float32: bool = False) -> Dict[str, object]:
+    float_dtype = np.float32 if float32 else np.float64
+    out: Dict[str, object] = {}
+    for col, values in columns.items():
+        if col == "patient_id":
+            out[col] = np.asarray(values, dtype=np.int32)
+        elif col in _COMPACT_INTS:
+            out[col] = np.asarray(values, dtype=_COMPACT_INTS[col])
+        elif col == "treatment_group":
+            out[col] = pd.Categorical(values, dtype=TREATMENT_DTYPE)
+        else:
+            out[col] = np.asarray(values, dtype=float_dtype)
+    return out
+
+
+def compact_cohort(df: pd.DataFrame, float32: bool = False) -> pd.DataFrame:
+    """Return a compact copy of a cohort frame.
+
+    Integer columns become int8, `treatment_group` a categorical, and `patient_id`
+    an int32 key (``"P00042"`` -> 42; use `format_patient_ids` to get strings back).
+    With `float32` the `biomarker` and `time` columns are downcast as well.
+    """
+    columns = {col: df[col].to_numpy() for col in df.columns}
+    if df["patient_id"].dtype == object:
+        columns["patient_id"] = df["patient_id"].str.slice(1).astype(np.int64).to_numpy()
+    return pd.DataFrame(_compact_columns(columns, float32=float32), index=df.index)
+
+
+def generate_cohort(
+    n: int = 500,
+    seed: int = 42,
+    censor_rate: float = 0.0,
+    biomarker_effect: float = 0.3,
+    compact: bool = False,
+    float32: bool = False,
+) -> pd.DataFrame:
     """Generate a synthetic cohort with clinical features and time-to-event labels.
 
     Columns:
@@ -18,58 +186,156 @@ def generate_cohort(n: int = 500, seed: int = 42, censor_rate: float = 0.0, biom
     - treatment_group (A/B)
     - time: time-to-event or censoring in days
     - event: 1=event,0=censored
+
+    With `compact` the frame uses the dtypes of `compact_cohort` (same values,
+    integer patient keys); `float32` additionally downcasts the float columns.
     """
     rng = np.random.default_rng(seed)
-    patient_id = [f"P{idx:05d}" for idx in range(1, n + 1)]
-    age = rng.normal(62, 10, size=n).clip(18, 90).astype(int)
-    sex = rng.integers(0, 2, size=n)
-    tumor_stage = rng.choice([1, 2, 3, 4], size=n, p=[0.25, 0.35, 0.25, 0.15])
-    biomarker = rng.normal(0.0, 1.0, size=n)
-    treatment_group = rng.choice(["A", "B"], size=n, p=[0.5, 0.5])
+    columns = _simulate_columns(rng, n, censor_rate=censor_rate, biomarker_effect=biomarker_effect)
+    return _to_frame(columns, compact=compact, float32=float32)
 
-    # Simulate baseline hazard influenced by stage, biomarker, and treatment
-    base_hazard = 0.001
-    stage_coef = {1: 0.5, 2: 1.0, 3: 1.7, 4: 2.5}
-    treatment_coef = {"A": 1.0, "B": 0.8}
 
-    linear = np.array([stage_coef[s] for s in tumor_stage])
-    linear += biomarker * biomarker_effect
-    linear *= np.array([treatment_coef[t] for t in treatment_group])
+def generate_cohort_batch(
+    n: int,
+    seeds: Sequence[int],
+    grid: Sequence[Tuple[float, float]],
+    as_arrow: bool = False,
+):
+    """Generate ``len(seeds) x len(grid)`` cohorts in one vectorized pass.
 
-    # Weibull-like survival times
-    u = rng.random(n)
-    # scale parameter shorter with higher linear predictor
-    scale = 365 * np.exp(-0.3 * linear)
-    times = -scale * np.log(u)
+    `grid` holds ``(censor_rate, biomarker_effect)`` points. Returns a dict of
+    columnar arrays in long format (replicate-major, then grid point, then patient)
+    with extra ``replicate``, ``grid_index`` and ``seed`` columns, or a
+    ``pyarrow.Table`` with the same columns when `as_arrow` is True.
 
-    # administrative censoring at 3 years
-    censor_time = 365 * 3
-    observed_time = np.minimum(times, censor_time)
-    event = (times <= censor_time).astype(int)
+    The rows for replicate ``r`` and grid point ``g`` are identical to
+    ``generate_cohort(n, seed=seeds[r], censor_rate=..., biomarker_effect=...)``:
+    the random draws of a seeded cohort do not depend on the grid point, so each
+    replicate is drawn once and the outcomes for all grid points are computed
+    together as ``(G, n)`` arrays.
+    """
+    grid = [(float(c), float(b)) for c, b in grid]
+    n_grid = len(grid)
+    censor_rates = np.array([c for c, _ in grid]).reshape(-1, 1)
+    effects = np.array([b for _, b in grid]).reshape(-1, 1)
+    censoring = bool(np.any((censor_rates > 0.0) & (censor_rates < 1.0)))
+    block = n_grid * n
 
-    # additional random censoring controlled by censor_rate (0.0 = none)
-    if censor_rate and 0.0 < censor_rate < 1.0:
-        # randomly pick a fraction of subjects to be censored earlier
-        censor_mask = rng.random(n) < censor_rate
-        # for those, draw a random censoring time between 0 and censor_time
-        extra_censor = rng.random(n) * censor_time
-        # apply extra censoring where earlier than observed_time
-        observed_time = np.where(censor_mask & (extra_censor < observed_time), extra_censor, observed_time)
-        event = np.where(censor_mask & (extra_censor < times), 0, event)
+    total = len(seeds) * block
+    out: Dict[str, np.ndarray] = {
+        "replicate": np.repeat(np.arange(len(seeds)), block),
+        "grid_index": np.tile(np.repeat(np.arange(n_grid), n), len(seeds)),
+        "seed": np.repeat(np.asarray(seeds, dtype=np.int64), block),
+        "patient_id": np.tile(format_patient_ids(np.arange(1, n + 1)), len(seeds) * n_grid),
+        "age": np.empty(total, dtype=int),
+        "sex": np.empty(total, dtype=np.int64),
+        "tumor_stage": np.empty(total, dtype=np.int64),
+        "biomarker": np.empty(total),
+        "treatment_group": np.empty(total, dtype="U1"),
+        "time": np.empty(total),
+        "event": np.empty(total, dtype=int),
+    }
+    for r, seed in enumerate(seeds):
+        draws = _draw_patients(np.random.default_rng(seed), n, censoring=censoring)
+        observed_time, event = _outcomes(draws, censor_rates, effects)
+        rows = slice(r * block, (r + 1) * block)
+        for col in ("age", "sex", "tumor_stage", "biomarker", "treatment_group"):
+            out[col][rows] = np.tile(draws[col], n_grid)
+        out["time"][rows] = observed_time.ravel()
+        out["event"][rows] = event.ravel()
+
+    if as_arrow:
+        import pyarrow as pa
+
+        return pa.table(out)
+    return out
+
+
+def _stream_block(n: int, block: int, seed: int, censor_rate: float, biomarker_effect: float) -> Dict[str, np.ndarray]:
+    start = block * STREAM_BLOCK_SIZE
+    size = min(STREAM_BLOCK_SIZE, n - start)
+    # each block has its own generator keyed on (seed, block index)
+    rng = np.random.default_rng([seed, block])
+    return _simulate_columns(rng, size, censor_rate=censor_rate, biomarker_effect=biomarker_effect, id_offset=start)
+
+
+def _concat_blocks(blocks: List[Dict[str, np.ndarray]]) -> Dict[str, np.ndarray]:
+    if len(blocks) == 1:
+        return blocks[0]
+    return {k: np.concatenate([b[k] for b in blocks]) for k in blocks[0]}
 
-    df = pd.DataFrame(
-        {
-            "patient_id": patient_id,
-            "age": age,
-            "sex": sex,
-            "tumor_stage": tumor_stage,
-            "biomarker": biomarker,
-            "treatment_group": treatment_group,
-            "time": observed_time.astype(float),
-            "event": event,
-        }
+
+def iter_cohort_chunks(
+    n: int,
+    chunk_size: int = 100_000,
+    seed: int = 42,
+    censor_rate: float = 0.0,
+    biomarker_effect: float = 0.3,
+    compact: bool = False,
+    float32: bool = False,
+) -> Iterator[pd.DataFrame]:
+    """Yield a synthetic cohort of `n` patients as DataFrames of at most `chunk_size` rows.
+
+    Rows are simulated in fixed blocks of ``STREAM_BLOCK_SIZE`` patients, each seeded
+    from ``(seed, block index)``, so the concatenated output depends only on `n`,
+    `seed` and the model parameters -- never on `chunk_size`. The stream differs
+    from ``generate_cohort(n, seed)``, which draws the whole cohort from one generator.
+    `compact` and `float32` are as in `generate_cohort`.
+    """
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be a positive integer")
+    n_blocks = -(-n // STREAM_BLOCK_SIZE)
+    # pending blocks are concatenated once per emitted chunk, not once per block
+    pending: List[Dict[str, np.ndarray]] = []
+    rows = 0
+    for block in range(n_blocks):
+        cols = _stream_block(n, block, seed, censor_rate, biomarker_effect)
+        pending.append(cols)
+        rows += len(cols["time"])
+        if rows < chunk_size:
+            continue
+        cols = _concat_blocks(pending)
+        start = 0
+        while rows - start >= chunk_size:
+            yield _to_frame({k: v[start : start + chunk_size] for k, v in cols.items()}, compact=compact, float32=float32)
+            start += chunk_size
+        rows -= start
+        pending = [{k: v[start:] for k, v in cols.items()}] if rows else []
+    if rows:
+        yield _to_frame(_concat_blocks(pending), compact=compact, float32=float32)
+
+
+def write_cohort_parquet(
+    out_dir: str,
+    n: int,
+    chunk_size: int = 100_000,
+    seed: int = 42,
+    censor_rate: float = 0.0,
+    biomarker_effect: float = 0.3,
+    compact: bool = False,
+    float32: bool = False,
+) -> List[str]:
+    """Stream a cohort into a Parquet dataset directory, one ``part-*.parquet`` file per chunk.
+
+    The directory can be read back with ``pd.read_parquet(out_dir)``. Only one chunk
+    is held in memory at a time. Returns the list of written file paths.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    paths: List[str] = []
+    chunks = iter_cohort_chunks(
+        n,
+        chunk_size=chunk_size,
+        seed=seed,
+        censor_rate=censor_rate,
+        biomarker_effect=biomarker_effect,
+        compact=compact,
+        float32=float32,
     )
-    return df
+    for i, chunk in enumerate(chunks):
+        path = os.path.join(out_dir, f"part-{i:05d}.parquet")
+        chunk.to_parquet(path, index=False)
+        paths.append(path)
+    return paths
 
 
 if __name__ == "__main__":
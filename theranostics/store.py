@@ -0,0 +1,391 @@
+"""Indexed local results store (SQLite in WAL mode).
+
+Every `experiments.run_experiment` call records its params, metrics, Cox
+coefficients, artifact paths and stage timings here, replacing the free-text
+``summary_*.txt`` files that used to be written under ``mlruns/``. Queries such
+as "all runs with ``censor_rate`` 0.4, sorted by the biomarker coefficient" are
+answered from indexes instead of globbing and parsing files::
+
+    store = ResultsStore()
+    store.runs(where={"censor_rate": 0.4}, order_by="coef", covariate="biomarker")
+
+WAL journaling lets readers run alongside a writer, and each run is written in
+a single short transaction, so a sweep's worker processes can record into the
+same database concurrently (each process opens its own connection; writers
+wait up to `timeout` seconds for the lock).
+
+The default database is ``mlruns/results.db`` (override with
+``THERANOSTICS_RESULTS_DB``).
+"""
+from __future__ import annotations
+
+import json
+import os
+import socket
+import sqlite3
+import time
+import uuid
+from typing import Any, Dict, Iterable, Optional
+
+import pandas as pd
+
+DEFAULT_RESULTS_DB = os.path.join("mlruns", "results.db")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    experiment TEXT NOT NULL,
+    sweep_id TEXT,
+    created REAL NOT NULL,
+    host TEXT,
+    pid INTEGER,
+    mlflow_run_id TEXT,
+    params_json TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS runs_experiment ON runs (experiment, created);
+CREATE INDEX IF NOT EXISTS runs_sweep ON runs (sweep_id);
+CREATE TABLE IF NOT EXISTS params (
+    run_id TEXT NOT NULL REFERENCES runs (run_id) ON DELETE CASCADE,
+    name TEXT NOT NULL,
+    value_num REAL,
+    value_text TEXT,
+    PRIMARY KEY (run_id, name)
+);
+CREATE INDEX IF NOT EXISTS params_num ON params (name, value_num);
+CREATE INDEX IF NOT EXISTS params_text ON params (name, value_text);
+CREATE TABLE IF NOT EXISTS metrics (
+    run_id TEXT NOT NULL REFERENCES runs (run_id) ON DELETE CASCADE,
+    name TEXT NOT NULL,
+    value REAL,
+    PRIMARY KEY (run_id, name)
+);
+CREATE INDEX IF NOT EXISTS metrics_value ON metrics (name, value);
+CREATE TABLE IF NOT EXISTS coefficients (
+    run_id TEXT NOT NULL REFERENCES runs (run_id) ON DELETE CASCADE,
+    covariate TEXT NOT NULL,
+    coef REAL,
+    se REAL,
+    p REAL,
+    exp_coef REAL,
+    PRIMARY KEY (run_id, covariate)
+);
+CREATE INDEX IF NOT EXISTS coefficients_coef ON coefficients (covariate, coef);
+CREATE TABLE IF NOT EXISTS artifacts (
+    run_id TEXT NOT NULL REFERENCES runs (run_id) ON DELETE CASCADE,
+    name TEXT NOT NULL,
+    path TEXT NOT NULL,
+    PRIMARY KEY (run_id, name)
+);
+CREATE TABLE IF NOT EXISTS timings (
+    run_id TEXT NOT NULL REFERENCES runs (run_id) ON DELETE CASCADE,
+    stage TEXT NOT NULL,
+    seconds REAL NOT NULL,
+    PRIMARY KEY (run_id, stage)
+);
+"""
+
+# Cox summary column -> coefficients column
+_COEF_COLUMNS = {"coef": "coef", "se(coef)": "se", "p": "p", "exp(coef)": "exp_coef"}
+
+
+def _split_value(value: Any):
+    """(numeric, text) storage for a param value; numbers are indexed as numbers."""
+    if isinstance(value, bool) or value is None:
+        return None, json.dumps(value)
+    if isinstance(value, (int, float)):
+        return float(value), None
+    try:
+        import numpy as np
+
+        if isinstance(value, np.number):
+            return float(value), None
+    except ImportError:  # pragma: no cover
+        pass
+    return None, value if isinstance(value, str) else json.dumps(value, default=str)
+
+
+def _float_or_none(value: Any) -> Optional[float]:
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+    return None if value != value else value  # NaN -> NULL
+
+
+class ResultsStore:
+    """SQLite-backed store of experiment runs; see the module docstring."""
+
+    def __init__(self, path: Optional[str] = None, timeout: float = 60.0):
+        self.path = path or os.environ.get("THERANOSTICS_RESULTS_DB", DEFAULT_RESULTS_DB)
+        self.timeout = timeout
+        self._conn: Optional[sqlite3.Connection] = None
+        self._pid: Optional[int] = None
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        # connections must not cross a fork: reopen in each process
+        if self._conn is None or self._pid != os.getpid():
+            directory = os.path.dirname(os.path.abspath(self.path))
+            os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            conn.executescript(_SCHEMA)
+            self._conn, self._pid = conn, os.getpid()
+        return self._conn
+
+    def close(self) -> None:
+        if self._conn is not None and self._pid == os.getpid():
+            self._conn.close()
+        self._conn = None
+
+    def __getstate__(self):
+        return {"path": self.path, "timeout": self.timeout}
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+    # -- writing -----------------------------------------------------------
+
+    def record_run(
+        self,
+        experiment: str,
+        params: Optional[Dict[str, Any]] = None,
+        metrics: Optional[Dict[str, Any]] = None,
+        coefficients: Optional[pd.DataFrame] = None,
+        artifacts: Optional[Dict[str, str]] = None,
+        timings: Optional[Dict[str, float]] = None,
+        sweep_id: Optional[str] = None,
+        mlflow_run_id: Optional[str] = None,
+        run_id: Optional[str] = None,
+    ) -> str:
+        """Insert one run in a single transaction and return its id.
+
+        `coefficients` is a Cox summary frame (index = covariate, columns
+        ``coef``, ``se(coef)``, ``p``, ``exp(coef)``).
+        """
+        run_id = run_id or uuid.uuid4().hex
+        params = params or {}
+        conn = self.conn
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "INSERT INTO runs VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    run_id,
+                    experiment,
+                    sweep_id,
+                    time.time(),
+                    socket.gethostname(),
+                    os.getpid(),
+                    mlflow_run_id,
+                    json.dumps(params, sort_keys=True, default=str),
+                ),
+            )
+            conn.executemany(
+                "INSERT INTO params VALUES (?, ?, ?, ?)",
+                [(run_id, str(k), *_split_value(v)) for k, v in params.items()],
+            )
+            conn.executemany(
+                "INSERT INTO metrics VALUES (?, ?, ?)",
+                [(run_id, str(k), _float_or_none(v)) for k, v in (metrics or {}).items()],
+            )
+            if coefficients is not None and len(coefficients):
+                cols = {src: coefficients[src] if src in coefficients else None for src in _COEF_COLUMNS}
+                conn.executemany(
+                    "INSERT INTO coefficients VALUES (?, ?, ?, ?, ?, ?)",
+                    [
+                        (run_id, str(cov), *(_float_or_none(cols[src][cov]) if cols[src] is not None else None for src in _COEF_COLUMNS))
+                        for cov in coefficients.index
+                    ],
+                )
+            conn.executemany(
+                "INSERT INTO artifacts VALUES (?, ?, ?)",
+                [(run_id, str(k), str(v)) for k, v in (artifacts or {}).items()],
+            )
+            conn.executemany(
+                "INSERT INTO timings VALUES (?, ?, ?)",
+                [(run_id, str(k), float(v)) for k, v in (timings or {}).items()],
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return run_id
+
+    def delete_runs(self, run_ids: Iterable[str]) -> int:
+        ids = list(run_ids)
+        conn = self.conn
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            n = conn.executemany("DELETE FROM runs WHERE run_id = ?", [(r,) for r in ids]).rowcount
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return n
+
+    # -- querying ----------------------------------------------------------
+
+    def _frame(self, sql: str, args=()) -> pd.DataFrame:
+        return pd.read_sql_query(sql, self.conn, params=list(args))
+
+    def runs(
+        self,
+        where: Optional[Dict[str, Any]] = None,
+        experiment: Optional[str] = None,
+        sweep_id: Optional[str] = None,
+        order_by: Optional[str] = None,
+        descending: bool = False,
+        covariate: Optional[str] = "biomarker",
+        limit: Optional[int] = None,
+    ) -> pd.DataFrame:
+        """One row per matching run: run metadata, params, metrics and `covariate`'s coefficients.
+
+        `where` matches params exactly (``{"censor_rate": 0.4}``). `order_by`
+        names a metric, a param, a coefficient column (``coef``, ``se``,
+        ``p``, ``exp_coef`` of `covariate`) or a run column such as
+        ``created``; the sort runs in SQL against the indexes.
+        """
+        sql = ["SELECT r.run_id FROM runs r"]
+        args: list = []
+        conditions = []
+        for i, (name, value) in enumerate((where or {}).items()):
+            num, text = _split_value(value)
+            column = "value_num" if num is not None else "value_text"
+            sql.append(f"JOIN params w{i} ON w{i}.run_id = r.run_id AND w{i}.name = ? AND w{i}.{column} = ?")
+            args += [name, num if num is not None else text]
+        if order_by is not None:
+            if order_by in _COEF_COLUMNS.values() or order_by in _COEF_COLUMNS:
+                column = _COEF_COLUMNS.get(order_by, order_by)
+                sql.append("LEFT JOIN coefficients o ON o.run_id = r.run_id AND o.covariate = ?")
+                args.append(covariate)
+                sort = f"o.{column}"
+            elif order_by in ("created", "experiment", "sweep_id", "run_id"):
+                sort = f"r.{order_by}"
+            else:
+                sql.append(
+                    "LEFT JOIN metrics om ON om.run_id = r.run_id AND om.name = ? "
+                    "LEFT JOIN params op ON op.run_id = r.run_id AND op.name = ?"
+                )
+                args += [order_by, order_by]
+                sort = "COALESCE(om.value, op.value_num, op.value_text)"
+        if experiment is not None:
+            conditions.append("r.experiment = ?")
+            args.append(experiment)
+        if sweep_id is not None:
+            conditions.append("r.sweep_id = ?")
+            args.append(sweep_id)
+        if conditions:
+            sql.append("WHERE " + " AND ".join(conditions))
+        # NULLs last either way, then insertion order for ties
+        sql.append(
+            f"ORDER BY {sort} IS NULL, {sort} {'DESC' if descending else 'ASC'}, r.created, r.rowid"
+            if order_by is not None
+            else "ORDER BY r.created, r.rowid"
+        )
+        if limit is not None:
+            sql.append("LIMIT ?")
+            args.append(int(limit))
+
+        ids = [row[0] for row in self.conn.execute(" ".join(sql), args)]
+        return self._assemble(ids, covariate)
+
+    def _assemble(self, ids, covariate) -> pd.DataFrame:
+        if not ids:
+            return pd.DataFrame(columns=["run_id", "experiment", "sweep_id", "created", "mlflow_run_id"])
+        conn = self.conn
+        conn.execute("CREATE TEMP TABLE IF NOT EXISTS _ids (pos INTEGER, run_id TEXT)")
+        conn.execute("DELETE FROM _ids")
+        conn.executemany("INSERT INTO _ids VALUES (?, ?)", list(enumerate(ids)))
+        runs = self._frame(
+            "SELECT r.run_id, r.experiment, r.sweep_id, r.created, r.mlflow_run_id, r.params_json "
+            "FROM _ids i JOIN runs r USING (run_id) ORDER BY i.pos"
+        )
+        params = pd.DataFrame(
+            [json.loads(p) for p in runs.pop("params_json")], index=runs.index
+        )
+        metrics = self._frame("SELECT m.run_id, m.name, m.value FROM _ids JOIN metrics m USING (run_id)")
+        metrics = metrics.pivot(index="run_id", columns="name", values="value") if len(metrics) else None
+        parts = [runs, params.drop(columns=[c for c in params.columns if c in runs.columns])]
+        if metrics is not None:
+            metrics = metrics.reindex(runs["run_id"]).reset_index(drop=True)
+            parts.append(metrics.drop(columns=[c for c in metrics.columns if c in params.columns or c in runs.columns]))
+        if covariate is not None:
+            coefs = self._frame(
+                "SELECT c.run_id, c.coef, c.se, c.p, c.exp_coef FROM _ids JOIN coefficients c USING (run_id) "
+                "WHERE c.covariate = ?",
+                (covariate,),
+            ).set_index("run_id")
+            coefs = coefs.reindex(runs["run_id"]).reset_index(drop=True)
+            parts.append(coefs.rename(columns={"se": "se(coef)", "exp_coef": "exp(coef)"}))
+        conn.execute("DELETE FROM _ids")
+        frame = pd.concat(parts, axis=1)
+        frame.columns.name = None
+        return frame
+
+    def sweeps(self, experiment: Optional[str] = None) -> pd.DataFrame:
+        """Recorded sweeps, newest first: sweep_id, experiment, started, n_runs."""
+        sql = "SELECT sweep_id, experiment, MIN(created) AS started, COUNT(*) AS n_runs FROM runs WHERE sweep_id IS NOT NULL"
+        args = []
+        if experiment is not None:
+            sql += " AND experiment = ?"
+            args.append(experiment)
+        return self._frame(sql + " GROUP BY sweep_id, experiment ORDER BY started DESC", args)
+
+    def coefficients(self, run_id: str) -> pd.DataFrame:
+        """The full Cox summary stored for one run (index = covariate)."""
+        frame = self._frame(
+            "SELECT covariate, coef, se, p, exp_coef FROM coefficients WHERE run_id = ? ORDER BY rowid", (run_id,)
+        ).set_index("covariate")
+        return frame.rename(columns={"se": "se(coef)", "exp_coef": "exp(coef)"})
+
+    def artifacts(self, run_id: str) -> Dict[str, str]:
+        return dict(self.conn.execute("SELECT name, path FROM artifacts WHERE run_id = ?", (run_id,)).fetchall())
+
+    def timings(self, run_id: Optional[str] = None) -> pd.DataFrame:
+        """Stage timings (run_id, stage, seconds), for one run or all."""
+        if run_id is None:
+            return self._frame("SELECT run_id, stage, seconds FROM timings ORDER BY rowid")
+        return self._frame("SELECT run_id, stage, seconds FROM timings WHERE run_id = ? ORDER BY rowid", (run_id,))
+
+    def sql(self, query: str, args=()) -> pd.DataFrame:
+        """Run an arbitrary read query against the store."""
+        return self._frame(query, args)
+
+
+_default: Optional[ResultsStore] = None
+
+
+def resolve_store(store) -> Optional[ResultsStore]:
+    """Accept ``None`` (the default store), ``False`` (no recording), a database path or a `ResultsStore`."""
+    global _default
+    if store is False:
+        return None
+    if isinstance(store, ResultsStore):
+        return store
+    if store is None or store is True:
+        path = os.environ.get("THERANOSTICS_RESULTS_DB", DEFAULT_RESULTS_DB)
+        if _default is None or _default.path != path:
+            _default = ResultsStore(path)
+        return _default
+    return ResultsStore(str(store))
+
+
+def to_markdown(df: pd.DataFrame, floatfmt: str = ".3g") -> str:
+    """A GitHub-flavoured markdown table (numbers right-aligned), without optional dependencies."""
+    cols = [str(c) for c in df.columns]
+    numeric = [pd.api.types.is_numeric_dtype(df[c]) for c in df.columns]
+
+    def fmt(v, is_num):
+        if v is None or (isinstance(v, float) and v != v):
+            return ""
+        if is_num and isinstance(v, float):
+            return format(v, floatfmt)
+        return str(v)
+
+    lines = ["| " + " | ".join(cols) + " |", "|" + "|".join("---:" if n else "---" for n in numeric) + "|"]
+    for row in df.itertuples(index=False):
+        lines.append("| " + " | ".join(fmt(v, n) for v, n in zip(row, numeric)) + " |")
+    return "\n".join(lines)
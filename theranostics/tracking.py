@@ -0,0 +1,218 @@
+"""Buffered, background MLflow logging.
+
+`RunLogger` talks to MLflow through ``MlflowClient`` (no global active-run
+state) and keeps tracking I/O off the critical path:
+
+- params and metrics are buffered per run and written with one ``log_batch``
+  call (chunked to MLflow's per-request limits) when the run ends;
+- artifact uploads and run termination go through a bounded queue served by a
+  background thread; `log_artifact` blocks only when the queue is full;
+- `flush()` waits for everything queued so far, and the process-wide logger
+  from `get_logger()` is flushed at interpreter exit (and at pool-worker exit).
+
+``RunLogger(enabled=False)`` -- or ``THERANOSTICS_TRACKING=off`` for the
+default logger -- is a no-op with the same interface. MLflow is imported only
+when an enabled logger is first used.
+"""
+from __future__ import annotations
+
+import atexit
+import importlib.util
+import os
+import queue
+import threading
+import time
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional
+
+# MLflow's per-request limits for log_batch
+_MAX_PARAMS_PER_BATCH = 100
+_MAX_METRICS_PER_BATCH = 1000
+
+_STOP = object()
+
+
+class RunLogger:
+    """Buffered MLflow logger; see the module docstring."""
+
+    def __init__(self, tracking_uri: Optional[str] = None, enabled: Optional[bool] = None, max_queue: int = 64):
+        if enabled is None:
+            enabled = importlib.util.find_spec("mlflow") is not None
+        self.enabled = bool(enabled)
+        self.tracking_uri = tracking_uri
+        self.max_queue = max_queue
+        self.errors: List[str] = []
+        self._client = None
+        self._experiments: Dict[str, str] = {}
+        self._buffers: Dict[str, Dict[str, list]] = {}
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_queue)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._pending = Counter()
+        self._pending_changed = threading.Condition(self._lock)
+        self._closed = False
+
+    # -- MLflow plumbing -------------------------------------------------
+
+    @property
+    def client(self):
+        if self._client is None:
+            from mlflow.tracking import MlflowClient
+
+            self._client = MlflowClient(tracking_uri=self.tracking_uri)
+            if self.tracking_uri is None:
+                import mlflow
+
+                self.tracking_uri = mlflow.get_tracking_uri()
+        return self._client
+
+    def experiment_id(self, name: str) -> Optional[str]:
+        """Id of experiment `name`, created on first use."""
+        if not self.enabled:
+            return None
+        if name not in self._experiments:
+            exp = self.client.get_experiment_by_name(name)
+            if exp is None:
+                try:
+                    exp_id = self.client.create_experiment(name)
+                except Exception:
+                    # another process created it concurrently
+                    exp_id = self.client.get_experiment_by_name(name).experiment_id
+            else:
+                exp_id = exp.experiment_id
+            self._experiments[name] = exp_id
+        return self._experiments[name]
+
+    def _ensure_thread(self) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._worker, name="theranostics-mlflow", daemon=True)
+            self._thread.start()
+
+    def _worker(self) -> None:
+        while True:
+            item = self._queue.get()
+            try:
+                if item is _STOP:
+                    return
+                op, args, path = item
+                try:
+                    op(*args)
+                except Exception as exc:  # never let tracking failures kill the worker
+                    self.errors.append(f"{getattr(op, '__name__', op)}: {exc}")
+                finally:
+                    if path is not None:
+                        with self._pending_changed:
+                            self._pending[path] -= 1
+                            if self._pending[path] <= 0:
+                                del self._pending[path]
+                            self._pending_changed.notify_all()
+            finally:
+                self._queue.task_done()
+
+    def _submit(self, op, *args, path: Optional[str] = None) -> None:
+        if self._closed:
+            op(*args)
+            return
+        if path is not None:
+            with self._pending_changed:
+                self._pending[path] += 1
+        self._ensure_thread()
+        self._queue.put((op, args, path))
+
+    # -- public API --------------------------------------------------------
+
+    def start_run(self, experiment_name: str, params: Optional[Dict[str, Any]] = None, tags=None) -> Optional[str]:
+        """Create a run and return its id (None when disabled); params are buffered."""
+        if not self.enabled:
+            return None
+        run = self.client.create_run(self.experiment_id(experiment_name), start_time=int(time.time() * 1000), tags=tags)
+        run_id = run.info.run_id
+        self._buffers[run_id] = {"params": [], "metrics": []}
+        if params:
+            self.log_params(run_id, params)
+        return run_id
+
+    def log_params(self, run_id: Optional[str], params: Dict[str, Any]) -> None:
+        if not self.enabled or run_id is None:
+            return
+        self._buffers.setdefault(run_id, {"params": [], "metrics": []})["params"].extend(params.items())
+
+    def log_metrics(self, run_id: Optional[str], metrics: Dict[str, Any], step: int = 0) -> None:
+        """Buffer metrics; None values are skipped."""
+        if not self.enabled or run_id is None:
+            return
+        now = int(time.time() * 1000)
+        buf = self._buffers.setdefault(run_id, {"params": [], "metrics": []})["metrics"]
+        buf.extend((k, float(v), now, step) for k, v in metrics.items() if v is not None)
+
+    def log_artifact(self, run_id: Optional[str], path: str, artifact_path: Optional[str] = None) -> None:
+        """Queue `path` for upload. Do not modify the file until `wait_for(path)` or `flush()`."""
+        if not self.enabled or run_id is None:
+            return
+        self._submit(self.client.log_artifact, run_id, path, artifact_path, path=os.path.abspath(path))
+
+    def _write_batch(self, run_id: str) -> None:
+        from mlflow.entities import Metric, Param
+
+        buf = self._buffers.pop(run_id, None)
+        if not buf:
+            return
+        params = [Param(str(k), str(v)) for k, v in dict(buf["params"]).items()]
+        metrics = [Metric(k, v, ts, step) for k, v, ts, step in buf["metrics"]]
+        while params or metrics:
+            self.client.log_batch(
+                run_id, metrics=metrics[:_MAX_METRICS_PER_BATCH], params=params[:_MAX_PARAMS_PER_BATCH]
+            )
+            params, metrics = params[_MAX_PARAMS_PER_BATCH:], metrics[_MAX_METRICS_PER_BATCH:]
+
+    def end_run(self, run_id: Optional[str], status: str = "FINISHED") -> None:
+        """Write the run's buffered params/metrics in one batch and mark it terminated (in the background)."""
+        if not self.enabled or run_id is None:
+            return
+        self._submit(self._write_batch, run_id)
+        self._submit(self.client.set_terminated, run_id, status)
+
+    def wait_for(self, paths: Iterable[str]) -> None:
+        """Block until no queued upload refers to any of `paths`."""
+        targets = {os.path.abspath(p) for p in paths}
+        with self._pending_changed:
+            self._pending_changed.wait_for(lambda: not targets.intersection(self._pending))
+
+    def flush(self) -> None:
+        """Wait for every queued operation to finish."""
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.join()
+
+    def close(self) -> None:
+        """Flush, then write any runs still buffered and stop the background thread."""
+        if self._closed:
+            return
+        self.flush()
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join()
+        self._closed = True
+        for run_id in list(self._buffers):
+            try:
+                self._write_batch(run_id)
+            except Exception as exc:
+                self.errors.append(f"log_batch: {exc}")
+
+
+_default: Optional[RunLogger] = None
+_default_pid: Optional[int] = None
+
+
+def get_logger() -> RunLogger:
+    """Process-wide `RunLogger`, flushed at exit; disabled with ``THERANOSTICS_TRACKING=off``."""
+    global _default, _default_pid
+    # a forked child must not reuse the parent's logger (its thread did not survive the fork)
+    if _default is None or _default_pid != os.getpid():
+        enabled = None if os.environ.get("THERANOSTICS_TRACKING", "").lower() not in ("off", "0", "false") else False
+        _default, _default_pid = RunLogger(enabled=enabled), os.getpid()
+        atexit.register(_default.close)
+        # pool workers leave through multiprocessing's exit hooks, which skip atexit
+        from multiprocessing import util
+
+        util.Finalize(_default, _default.close, exitpriority=10)
+    return _default